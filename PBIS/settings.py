@@ -1,4 +1,5 @@
 import os
+import importlib.util
 import dj_database_url
 from pathlib import Path
 from datetime import timedelta
@@ -61,6 +62,7 @@ try:
         "vendor",
         "brand",
         "users",
+        "core",
     ]
 except Exception as e:
     raise RuntimeError(f"Error setting INSTALLED_APPS: {e}")
@@ -73,17 +75,24 @@ except Exception as e:
 try:
     REST_FRAMEWORK = {
         "DEFAULT_AUTHENTICATION_CLASSES": (
-            "rest_framework_simplejwt.authentication.JWTAuthentication",
+            "users.authentication.CachedJWTAuthentication",
         ),
         "DEFAULT_PERMISSION_CLASSES": (
             "rest_framework.permissions.IsAuthenticated",
         ),
         "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
         "PAGE_SIZE": 50,
-        "DEFAULT_RENDERER_CLASSES": (
-            "rest_framework.renderers.JSONRenderer",
-        ),
+        "DEFAULT_RENDERER_CLASSES": [
+            "core.renderers.FastJSONRenderer",
+        ],
+        "DEFAULT_PARSER_CLASSES": [
+            "core.renderers.FastJSONParser",
+            "rest_framework.parsers.FormParser",
+            "rest_framework.parsers.MultiPartParser",
+        ],
     }
+    if importlib.util.find_spec("msgpack") is not None:
+        REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].append("core.renderers.MessagePackRenderer")
 except Exception as e:
     raise RuntimeError(f"Error configuring REST_FRAMEWORK: {e}")
 
@@ -92,16 +101,86 @@ try:
         "corsheaders.middleware.CorsMiddleware",
         "django.middleware.security.SecurityMiddleware",
         "whitenoise.middleware.WhiteNoiseMiddleware",
-        "django.contrib.sessions.middleware.SessionMiddleware",
+        "core.middleware.SessionMiddleware",
         "django.middleware.common.CommonMiddleware",
-        "django.middleware.csrf.CsrfViewMiddleware",
-        "django.contrib.auth.middleware.AuthenticationMiddleware",
-        "django.contrib.messages.middleware.MessageMiddleware",
-        "django.middleware.clickjacking.XFrameOptionsMiddleware",
+        "core.metrics.RequestMetricsMiddleware",
+        "core.slow_queries.SlowQueryMiddleware",
+        "core.query_budget.QueryBudgetMiddleware",
+        "core.idempotency.IdempotencyMiddleware",
+        "core.replica.ReplicaRoutingMiddleware",
+        "core.middleware.CsrfViewMiddleware",
+        "core.middleware.AuthenticationMiddleware",
+        "core.middleware.MessageMiddleware",
+        "core.middleware.XFrameOptionsMiddleware",
     ]
+    # Bearer-token API requests skip the session, CSRF, auth, messages and
+    # clickjacking middleware above; admin/ and the SPA keep all of them.
+    LEAN_API_PATH_PREFIXES = ["/api/"]
 except Exception as e:
     raise RuntimeError(f"Error setting MIDDLEWARE: {e}")
 
+try:
+    METRICS = {
+        "ENABLED": os.getenv("METRICS_ENABLED", "False") == "True",
+        "SAMPLE_RATE": float(os.getenv("METRICS_SAMPLE_RATE", "0.1")),
+        "DIR": os.getenv("METRICS_DIR"),
+        "FLUSH_INTERVAL": 10,
+    }
+except Exception as e:
+    raise RuntimeError(f"Error configuring METRICS: {e}")
+
+try:
+    SLOW_QUERIES = {
+        "ENABLED": os.getenv("SLOW_QUERIES_ENABLED", "False") == "True",
+        "THRESHOLD_MS": float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200")),
+        "EXPLAIN_SAMPLE_RATE": float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1")),
+        "EXPLAIN_ANALYZE": os.getenv("SLOW_QUERY_EXPLAIN_ANALYZE", "False") == "True",
+        "BUFFER_SIZE": 500,
+    }
+except Exception as e:
+    raise RuntimeError(f"Error configuring SLOW_QUERIES: {e}")
+
+try:
+    QUERY_BUDGET = {
+        "MAX_QUERIES": int(os.getenv("QUERY_BUDGET_MAX_QUERIES", "50")),
+        "REPEAT_THRESHOLD": int(os.getenv("QUERY_BUDGET_REPEAT_THRESHOLD", "10")),
+    }
+except Exception as e:
+    raise RuntimeError(f"Error configuring QUERY_BUDGET: {e}")
+
+try:
+    IDEMPOTENCY = {
+        "TTL": int(os.getenv("IDEMPOTENCY_TTL", str(24 * 60 * 60))),
+        "LOCK_TIMEOUT": float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "10")),
+        "PENDING_TIMEOUT": 300,
+    }
+except Exception as e:
+    raise RuntimeError(f"Error configuring IDEMPOTENCY: {e}")
+
+try:
+    OUTBOX = {
+        "SINK": os.getenv("OUTBOX_SINK", "stdout"),
+        "FILE_PATH": os.getenv("OUTBOX_FILE_PATH", str(BASE_DIR / "outbox.ndjson")),
+        "HTTP_URL": os.getenv("OUTBOX_HTTP_URL", "http://127.0.0.1:8001/events"),
+        "HTTP_TIMEOUT": float(os.getenv("OUTBOX_HTTP_TIMEOUT", "5")),
+        "BATCH_SIZE": int(os.getenv("OUTBOX_BATCH_SIZE", "100")),
+        "MAX_ATTEMPTS": int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10")),
+        "BACKOFF": 5,
+        "MAX_BACKOFF": 3600,
+    }
+except Exception as e:
+    raise RuntimeError(f"Error configuring OUTBOX: {e}")
+
+try:
+    SHEET_ARCHIVE_RETENTION_DAYS = int(os.getenv("SHEET_ARCHIVE_RETENTION_DAYS", "180"))
+except Exception as e:
+    raise RuntimeError(f"Error configuring SHEET_ARCHIVE_RETENTION_DAYS: {e}")
+
+try:
+    COUNT_STATUS_CACHE_SECONDS = int(os.getenv("COUNT_STATUS_CACHE_SECONDS", "30"))
+except Exception as e:
+    raise RuntimeError(f"Error configuring COUNT_STATUS_CACHE_SECONDS: {e}")
+
 try:
     ROOT_URLCONF = "PBIS.urls"
 except Exception as e:
@@ -135,15 +214,60 @@ try:
     if not DATABASE_URL:
         raise RuntimeError("DATABASE_URL is not set in .env file")
 
-    DATABASES = {
-        "default": dj_database_url.parse(
-            DATABASE_URL,
-            conn_max_age=600,
+    # DATABASE_POOL=True switches to Django's psycopg 3 connection pool
+    # (requires psycopg[pool]). Each gunicorn worker opens its own pool lazily
+    # after fork, so size it to the worker's thread count, not the whole server.
+    DATABASE_POOL = os.getenv("DATABASE_POOL", "False") == "True"
+    DATABASE_POOL_OPTIONS = {
+        "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "1")),
+        "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "4")),
+        "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+    }
+
+    def database_config(url):
+        config = dj_database_url.parse(
+            url,
+            conn_max_age=0 if DATABASE_POOL else int(os.getenv("DATABASE_CONN_MAX_AGE", "600")),
         )
+        if DATABASE_POOL:
+            if config["ENGINE"] != "django.db.backends.postgresql":
+                raise RuntimeError("DATABASE_POOL requires a PostgreSQL DATABASE_URL")
+            config.setdefault("OPTIONS", {})["pool"] = dict(DATABASE_POOL_OPTIONS)
+        return config
+
+    DATABASES = {
+        "default": database_config(DATABASE_URL),
     }
+
+    # Optional read replica for GET requests under /api/; see core.replica.
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+    DATABASE_READ_REPLICA = None
+    if DATABASE_REPLICA_URL:
+        DATABASES["replica"] = database_config(DATABASE_REPLICA_URL)
+        DATABASE_READ_REPLICA = "replica"
+    DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", "5"))
+    DATABASE_ROUTERS = ["core.replica.ReplicaRouter"]
 except Exception as e:
     raise RuntimeError(f"Error configuring DATABASES: {e}")
 
+try:
+    REDIS_URL = os.getenv("REDIS_URL")
+    if REDIS_URL:
+        CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": REDIS_URL,
+            }
+        }
+    else:
+        CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            }
+        }
+except Exception as e:
+    raise RuntimeError(f"Error configuring CACHES: {e}")
+
 try:
     AUTH_PASSWORD_VALIDATORS = [
         {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -185,6 +309,13 @@ try:
         "ROTATE_REFRESH_TOKENS": True,
         "BLACKLIST_AFTER_ROTATION": True,
         "AUTH_HEADER_TYPES": ("Bearer",),
+        "TOKEN_OBTAIN_SERIALIZER": "users.serializers.RoleTokenObtainPairSerializer",
+    }
+    JWT_USER_CACHE = {
+        "TTL": int(os.getenv("JWT_USER_CACHE_TTL", "60")),
+        "STRICT": os.getenv("JWT_USER_CACHE_STRICT", "False") == "True",
+        "STRICT_TTL": 5,
+        "MAX_SIZE": int(os.getenv("JWT_USER_CACHE_MAX_SIZE", "10000")),
     }
 except Exception as e:
     raise RuntimeError(f"Error configuring SIMPLE_JWT: {e}")
@@ -13,6 +13,7 @@ api_patterns = [
     path("", include("counts.urls")),
     path("", include("reports.urls")),
     path("", include("brand.urls")),
+    path("", include("core.urls")),
 ]
 
 urlpatterns = [
@@ -0,0 +1,166 @@
+from .models import ChangeLogEntry, ChangeSequence, IdempotencyRecord, OutboxEvent, SlowQuery
+from django.contrib import admin
+from django.utils.html import format_html
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "created_at",
+        "duration_ms",
+        "view",
+        "serializer_field",
+        "short_sql",
+        "has_plan",
+    )
+
+    list_filter = (
+        "view",
+        ("created_at", admin.DateFieldListFilter),
+    )
+
+    search_fields = (
+        "sql",
+        "view",
+        "serializer_field",
+    )
+
+    ordering = ("-created_at",)
+
+    readonly_fields = (
+        "created_at",
+        "duration_ms",
+        "view",
+        "serializer_field",
+        "fingerprint",
+        "sql_display",
+        "plan_display",
+    )
+
+    fields = readonly_fields
+
+    def short_sql(self, obj):
+        return obj.sql[:120]
+    short_sql.short_description = "SQL"
+
+    def has_plan(self, obj):
+        return bool(obj.plan)
+    has_plan.boolean = True
+    has_plan.short_description = "Plan"
+
+    def sql_display(self, obj):
+        return format_html('<pre style="white-space: pre-wrap;">{}</pre>', obj.sql)
+    sql_display.short_description = "SQL"
+
+    def plan_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.plan or "-")
+    plan_display.short_description = "Plan"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(IdempotencyRecord)
+class IdempotencyRecordAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "key",
+        "status_code",
+        "content_type",
+        "created_at",
+        "expires_at",
+    )
+
+    list_filter = (
+        "status_code",
+        ("created_at", admin.DateFieldListFilter),
+    )
+
+    search_fields = (
+        "key",
+    )
+
+    exclude = ("body",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ChangeLogEntry)
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "seq",
+        "action",
+        "model",
+        "object_id",
+        "changed_at",
+    )
+
+    list_filter = (
+        "action",
+        "model",
+        ("changed_at", admin.DateFieldListFilter),
+    )
+
+    search_fields = (
+        "object_id",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ChangeSequence)
+class ChangeSequenceAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "name",
+        "value",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "id",
+        "topic",
+        "status",
+        "attempts",
+        "available_at",
+        "created_at",
+        "delivered_at",
+    )
+
+    list_filter = (
+        "status",
+        "topic",
+        ("created_at", admin.DateFieldListFilter),
+    )
+
+    search_fields = (
+        "last_error",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,213 @@
+"""In-process endpoint benchmarks run against a generated load dataset."""
+import time
+import json
+import platform
+import statistics
+import subprocess
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import User
+from reports.models import Report
+from counts.models import CountEntry, CountSheet, CountSheetStatus
+from . import loaddata, renderers
+from .middleware import DJANGO_EQUIVALENTS
+
+
+class _Rollback(Exception):
+    pass
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class BenchmarkRunner:
+    """Times key API calls and reports latency percentiles and query counts.
+
+    Write benchmarks run inside a transaction that is rolled back after each
+    iteration so repeated runs see the same dataset.
+    """
+
+    def __init__(self, repeat=20, warmup=2, prefix=loaddata.PREFIX):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.prefix = prefix
+        host = next(
+            (h for h in settings.ALLOWED_HOSTS if h and h != "*" and not h.startswith(".")),
+            "localhost",
+        )
+        self.host = host
+        self.client = APIClient(SERVER_NAME=host)
+        admin = User.objects.get(username=f"{prefix.lower()}-admin")
+        self.client.force_authenticate(admin)
+        self.admin = admin
+
+    def _fixtures(self):
+        submitted = CountSheet.objects.filter(
+            location__name__startswith=f"{self.prefix} Location ",
+            status=CountSheetStatus.SUBMITTED,
+        ).order_by("-count_date", "pk").first()
+        draft = CountSheet.objects.filter(
+            location__name__startswith=f"{self.prefix} Location ",
+            status=CountSheetStatus.DRAFT,
+        ).order_by("-count_date", "pk").first()
+        if submitted is None or draft is None:
+            raise RuntimeError("No load data found; run generate_load_data first.")
+        return submitted, draft
+
+    def benchmarks(self):
+        submitted, draft = self._fixtures()
+        entries = list(
+            CountEntry.objects.filter(sheet=draft).values("item_id", "on_hand_quantity")
+        )
+
+        def fresh_sheet():
+            return CountSheet.objects.create(
+                location_id=draft.location_id,
+                frequency_id=draft.frequency_id,
+                count_date=timezone.localdate(),
+                created_by=self.admin,
+            )
+
+        def bulk_write():
+            sheet = fresh_sheet()
+            payload = [
+                {"sheet": sheet.pk, "item": e["item_id"], "on_hand_quantity": str(e["on_hand_quantity"])}
+                for e in entries
+            ]
+            return self.client.post("/api/count-entries/create/", payload, format="json")
+
+        def submit():
+            return self.client.post(f"/api/count-sheets/{draft.pk}/submit/")
+
+        return {
+            "sheet_load": (False, lambda: self.client.get(
+                "/api/count-entries/", {"sheet": submitted.pk})),
+            "bulk_count_write": (True, bulk_write),
+            "submit": (True, submit),
+            "report_list": (False, lambda: self.client.get("/api/reports/")),
+            "report_list_by_location": (False, lambda: self.client.get(
+                "/api/reports/", {"location": submitted.location_id})),
+        }
+
+    def _time(self, func, write):
+        queries = _QueryCounter()
+        with connection.execute_wrapper(queries):
+            start = time.perf_counter()
+            if write:
+                try:
+                    with transaction.atomic():
+                        response = func()
+                        raise _Rollback
+                except _Rollback:
+                    pass
+            else:
+                response = func()
+            elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise RuntimeError(f"Benchmark request failed with {response.status_code}")
+        return elapsed, queries.count, len(getattr(response, "content", b""))
+
+    def renderer_benchmarks(self):
+        """Encode the report list payload with each available renderer."""
+        data = self.client.get("/api/reports/").data
+        candidates = {
+            "render_report_stdlib": JSONRenderer(),
+            "render_report_fast_json": renderers.FastJSONRenderer(),
+        }
+        if renderers.msgpack is not None:
+            candidates["render_report_msgpack"] = renderers.MessagePackRenderer()
+        return {
+            name: (lambda renderer=renderer: renderer.render(data))
+            for name, renderer in candidates.items()
+        }
+
+    def middleware_benchmarks(self):
+        """GET a trivial endpoint with a bearer token through Django's stock
+        middleware and through the lean API profile in settings."""
+        stacks = {
+            "api_me_stock_middleware": [DJANGO_EQUIVALENTS.get(m, m) for m in settings.MIDDLEWARE],
+            "api_me_lean_middleware": list(settings.MIDDLEWARE),
+        }
+        token = str(AccessToken.for_user(self.admin))
+        calls = {}
+        for name, middleware in stacks.items():
+            client = APIClient(SERVER_NAME=self.host, HTTP_AUTHORIZATION=f"Bearer {token}")
+            # The middleware chain is built on the first request and kept.
+            with override_settings(MIDDLEWARE=middleware):
+                response = client.get("/api/auth/me/")
+            if response.status_code >= 400:
+                raise RuntimeError(f"Benchmark request failed with {response.status_code}")
+            calls[name] = (lambda client=client: client.get("/api/auth/me/").content)
+        return calls
+
+    def _summary(self, timings, queries, size):
+        timings.sort()
+        return {
+            "iterations": self.repeat,
+            "min_ms": round(timings[0], 3),
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            "max_ms": round(timings[-1], 3),
+            "queries": queries,
+            "response_bytes": size,
+        }
+
+    def run(self, only=None):
+        results = {}
+        for name, (write, func) in self.benchmarks().items():
+            if only and name not in only:
+                continue
+            for _ in range(self.warmup):
+                self._time(func, write)
+            timings, queries, size = [], 0, 0
+            for _ in range(self.repeat):
+                elapsed, queries, size = self._time(func, write)
+                timings.append(elapsed * 1000)
+            results[name] = self._summary(timings, queries, size)
+
+        calls = {**self.renderer_benchmarks(), **self.middleware_benchmarks()}
+        for name, call in calls.items():
+            if only and name not in only:
+                continue
+            for _ in range(self.warmup):
+                call()
+            timings = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                body = call()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = self._summary(timings, 0, len(body))
+        return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "database": connection.vendor,
+        "timestamp": timezone.now().isoformat(),
+    }
+
+
+def write_results(path, results, dataset):
+    with open(path, "w") as fh:
+        json.dump({"environment": environment(), "dataset": dataset, "results": results},
+                  fh, indent=2, sort_keys=True)
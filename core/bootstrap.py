@@ -0,0 +1,70 @@
+"""Versioned reference-list payloads for the bootstrap endpoint.
+
+Section versions are counter rows in the database, bumped in the writing
+transaction, so every worker agrees on them without a shared cache. Built
+payloads are cached per version; with a per-process cache each worker
+simply builds its own copy.
+"""
+from django.core.cache import cache
+from brand.models import Brand
+from vendor.models import Vendor
+from locations.models import Location
+from frequency.models import Frequency
+from brand.serializers import BrandSerializer
+from vendor.serializers import VendorSerializer
+from locations.serializers import LocationSerializer
+from frequency.serializers import FrequencySerializer
+from .models import ChangeSequence
+
+PAYLOAD_TIMEOUT = 60 * 5
+
+# Order matters: the version token lists section versions in this order.
+SECTIONS = {
+    "locations": (Location, lambda: Location.objects.filter(is_active=True), LocationSerializer),
+    "frequencies": (Frequency, lambda: Frequency.objects.filter(is_active=True), FrequencySerializer),
+    "vendors": (Vendor, lambda: Vendor.objects.all(), VendorSerializer),
+    "brands": (Brand, lambda: Brand.objects.all(), BrandSerializer),
+}
+
+
+def _version_key(section):
+    return f"bootstrap:{section}"
+
+
+def bump_version(section):
+    ChangeSequence.objects.bump(_version_key(section))
+
+
+def get_versions():
+    values = dict(ChangeSequence.objects.filter(
+        name__in=[_version_key(section) for section in SECTIONS]).values_list("name", "value"))
+    return {section: values.get(_version_key(section), 0) for section in SECTIONS}
+
+
+def make_token(versions):
+    return "-".join(str(versions[section]) for section in SECTIONS)
+
+
+def parse_token(token):
+    """Return the section versions encoded in ``token`` or None if malformed."""
+    parts = (token or "").split("-")
+    if len(parts) != len(SECTIONS) or not all(p.isdigit() for p in parts):
+        return None
+    return dict(zip(SECTIONS, (int(p) for p in parts)))
+
+
+def get_section(section, version):
+    key = f"bootstrap:payload:{section}:{version}"
+    data = cache.get(key)
+    if data is None:
+        _, queryset, serializer_class = SECTIONS[section]
+        data = serializer_class(queryset(), many=True).data
+        cache.set(key, data, timeout=PAYLOAD_TIMEOUT)
+    return data
+
+
+def section_for_model(model):
+    for section, (section_model, _, _) in SECTIONS.items():
+        if section_model is model:
+            return section
+    return None
@@ -0,0 +1,71 @@
+"""Change data capture for counts, reports and inventory items.
+
+Model signals record every save and delete of a tracked model in
+ChangeLogEntry. Bulk paths that bypass signals call record() themselves, and
+code that writes many rows wraps the work in batch() so all of its changes
+share one sequence allocation instead of one per row.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .models import ChangeLogEntry
+
+TRACKED_MODELS = {
+    "counts.countentry",
+    "counts.countsheet",
+    "reports.report",
+    "inventory.inventoryitem",
+}
+
+_pending = ContextVar("changelog_pending", default=None)
+
+
+def is_tracked(model):
+    return model._meta.label_lower in TRACKED_MODELS
+
+
+def snapshot(instance):
+    """Concrete field values already loaded on the instance; never triggers queries."""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname in instance.__dict__
+    }
+
+
+def record(instances, action):
+    """Log ``action`` for tracked model instances, batched if inside batch()."""
+    rows = [
+        (
+            instance._meta.label_lower,
+            str(instance.pk),
+            action,
+            snapshot(instance),
+        )
+        for instance in instances
+        if is_tracked(type(instance))
+    ]
+    pending = _pending.get()
+    if pending is not None:
+        pending.extend(rows)
+    else:
+        ChangeLogEntry.objects.append(rows)
+
+
+@contextmanager
+def batch():
+    """Collect changes recorded inside the block and append them in one go on exit.
+
+    Use inside the transaction doing the writes; nothing is logged if the
+    block raises.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+    pending = []
+    token = _pending.set(pending)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+    ChangeLogEntry.objects.append(pending)
+
@@ -0,0 +1,147 @@
+"""Idempotency-Key support for mutating API requests.
+
+The first POST/PUT/PATCH/DELETE with a given key stores its response in
+IdempotencyRecord; retries of the same request get that response back without
+running the view again. A concurrent duplicate waits for the first request to
+finish instead of doing the work twice. Keys are scoped to the authenticated
+user, and reusing a key for a different request is rejected.
+"""
+import time
+import hashlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from .models import IdempotencyRecord
+
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1
+
+
+def idempotency_settings():
+    return {
+        "TTL": 24 * 60 * 60,
+        "LOCK_TIMEOUT": 10,
+        "PENDING_TIMEOUT": 300,
+        **getattr(settings, "IDEMPOTENCY", {}),
+    }
+
+
+def request_user_id(request):
+    """Authenticate the bearer token the same way DRF will, without failing the request."""
+    from users.authentication import CachedJWTAuthentication
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    return result[0].pk if result else None
+
+
+def fingerprint(request):
+    digest = hashlib.sha256()
+    for part in (request.method, request.get_full_path()):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = idempotency_settings()
+        self.ttl = timedelta(seconds=config["TTL"])
+        self.lock_timeout = config["LOCK_TIMEOUT"]
+        self.pending_timeout = timedelta(seconds=config["PENDING_TIMEOUT"])
+
+    def __call__(self, request):
+        client_key = request.META.get(HEADER)
+        if not client_key or request.method not in METHODS or not request.path.startswith("/api/"):
+            return self.get_response(request)
+        if len(client_key) > MAX_KEY_LENGTH:
+            return JsonResponse({"error": "Idempotency-Key is too long."}, status=400)
+
+        user_id = request_user_id(request)
+        if user_id is None:
+            # Unauthenticated: let the view reject it; nothing to scope the key to.
+            return self.get_response(request)
+
+        key = hashlib.sha256(f"{user_id}:{client_key}".encode()).hexdigest()
+        request_hash = fingerprint(request)
+        record = self._claim(key, request_hash)
+        if record is not None:
+            return self._replay(record, request_hash)
+
+        try:
+            response = self.get_response(request)
+        except Exception:
+            IdempotencyRecord.objects.filter(key=key, status_code__isnull=True).delete()
+            raise
+
+        if response.status_code >= 500 or getattr(response, "streaming", False):
+            # Not a final answer: release the key so the client can retry.
+            IdempotencyRecord.objects.filter(key=key, status_code__isnull=True).delete()
+        else:
+            IdempotencyRecord.objects.filter(key=key).update(
+                status_code=response.status_code,
+                content_type=response.get("Content-Type", ""),
+                body=response.content,
+            )
+        return response
+
+    def _claim(self, key, request_hash):
+        """Insert the placeholder row for ``key``.
+
+        Returns None once this request owns the key. Otherwise returns the
+        existing record, after waiting up to LOCK_TIMEOUT for a concurrent
+        request with the same key to finish.
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    IdempotencyRecord.objects.create(
+                        key=key, request_hash=request_hash, expires_at=now + self.ttl)
+                return None
+            except IntegrityError:
+                pass
+
+            record = IdempotencyRecord.objects.filter(key=key).first()
+            if record is None:
+                continue
+            if record.expires_at <= now or (
+                not record.is_complete and record.created_at <= now - self.pending_timeout
+            ):
+                # Expired, or abandoned by a worker that died mid-request.
+                IdempotencyRecord.objects.filter(pk=record.pk).delete()
+                continue
+            if record.is_complete or record.request_hash != request_hash:
+                return record
+            if time.monotonic() >= deadline:
+                return record
+            time.sleep(POLL_INTERVAL)
+
+    def _replay(self, record, request_hash):
+        if record.request_hash != request_hash:
+            return JsonResponse(
+                {"error": "Idempotency-Key was already used for a different request."},
+                status=422,
+            )
+        if not record.is_complete:
+            response = JsonResponse(
+                {"error": "A request with this Idempotency-Key is still in progress."},
+                status=409,
+            )
+            response["Retry-After"] = "1"
+            return response
+        response = HttpResponse(
+            bytes(record.body or b""), status=record.status_code,
+            content_type=record.content_type or None,
+        )
+        response["Idempotent-Replayed"] = "true"
+        return response
@@ -0,0 +1,232 @@
+"""Deterministic synthetic dataset used by load generation, benchmarks and query-budget tests."""
+import random
+from decimal import Decimal
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from brand.models import Brand
+from vendor.models import Vendor
+from reports.models import Report
+from users.models import User, UserRole
+from locations.models import Location
+from frequency.models import Frequency, Weekday
+from inventory.models import InventoryItem, InventoryItemVersion, EffectiveItemParameter
+from counts.models import (
+    CountEntry,
+    CountSheet,
+    CountSheetStatus,
+    OrderParameters,
+    StockSnapshot,
+    calculate_order,
+)
+from . import bootstrap, changelog
+from .models import ChangeAction
+
+PREFIX = "Load"
+BATCH_SIZE = 2000
+PACK_SIZES = (1, 2, 4, 6, 12, 24)
+
+
+def clear(prefix=PREFIX):
+    """Remove everything previously generated under ``prefix``."""
+    with transaction.atomic(), changelog.batch():
+        locations = Location.objects.filter(name__startswith=f"{prefix} Location ")
+        Report.objects.filter(location__in=locations).delete()
+        CountEntry.objects.filter(sheet__location__in=locations).delete()
+        CountSheet.objects.filter(location__in=locations).delete()
+        InventoryItem.objects.filter(location__in=locations).delete()
+        locations.delete()
+        Frequency.objects.filter(frequency_name__startswith=f"{prefix} ").delete()
+        Vendor.objects.filter(name__startswith=f"{prefix} Vendor ").delete()
+        Brand.objects.filter(name__startswith=f"{prefix} Brand ").delete()
+
+
+def generate(locations=10, items=200, weeks=12, seed=1, end_date=None, prefix=PREFIX, log=None):
+    """Build ``locations`` x ``items`` catalog rows and ``weeks`` of submitted sheets.
+
+    Every random choice comes from ``random.Random(seed)`` so the same
+    arguments always produce the same rows. Returns a summary of row counts.
+    """
+    rng = random.Random(seed)
+    end_date = end_date or timezone.localdate()
+    log = log or (lambda message: None)
+
+    # Owner of the generated rows only; it cannot log in.
+    admin, _ = User.objects.update_or_create(
+        username=f"{prefix.lower()}-admin",
+        defaults={"role": UserRole.ADMIN, "is_superuser": False, "is_staff": False},
+    )
+    if admin.has_usable_password():
+        admin.set_unusable_password()
+        admin.save(update_fields=["password"])
+
+    daily, _ = Frequency.objects.update_or_create(
+        frequency_name=f"{prefix} Daily", defaults={"interval_days": 1})
+    weekly, _ = Frequency.objects.update_or_create(
+        frequency_name=f"{prefix} Weekly", defaults={"interval_days": 7, "weekday": Weekday.MONDAY})
+
+    Vendor.objects.bulk_create(
+        [Vendor(name=f"{prefix} Vendor {i:02d}", color=f"#{rng.randrange(0x1000000):06X}")
+         for i in range(8)],
+        ignore_conflicts=True,
+    )
+    Brand.objects.bulk_create(
+        [Brand(name=f"{prefix} Brand {i:02d}") for i in range(8)], ignore_conflicts=True
+    )
+    vendors = list(Vendor.objects.filter(name__startswith=f"{prefix} Vendor ").order_by("name"))
+    brands = list(Brand.objects.filter(name__startswith=f"{prefix} Brand ").order_by("name"))
+
+    Location.objects.bulk_create(
+        [Location(name=f"{prefix} Location {i:04d}") for i in range(locations)]
+    )
+    location_rows = list(
+        Location.objects.filter(name__startswith=f"{prefix} Location ").order_by("name")
+    )
+    log(f"Created {len(location_rows)} locations")
+
+    categories = [choice for choice, _ in InventoryItem.ItemCategory.choices]
+    catalog = []
+    for location in location_rows:
+        for j in range(items):
+            par_level = Decimal(rng.randint(4, 120))
+            catalog.append(InventoryItem(
+                name=f"{prefix} Item {j:04d}",
+                category=rng.choice(categories),
+                count_unit="each",
+                order_unit="case",
+                pack_size=rng.choice(PACK_SIZES),
+                vendor=rng.choice(vendors),
+                brand=rng.choice(brands),
+                location=location,
+                frequency=daily if j % 3 == 0 else weekly,
+                par_level=par_level,
+                order_point=(par_level * Decimal("0.3")).quantize(Decimal("0.01")),
+                display_order=j,
+            ))
+    InventoryItem.objects.bulk_create(catalog, batch_size=BATCH_SIZE)
+    item_rows = list(
+        InventoryItem.objects.filter(location__in=location_rows).order_by("location_id", "display_order")
+    )
+    item_ids = [item.pk for item in item_rows]
+    changelog.record(item_rows, ChangeAction.CREATE)
+    for start in range(0, len(item_ids), BATCH_SIZE):
+        EffectiveItemParameter.objects.refresh_for_items(item_ids[start:start + BATCH_SIZE])
+    versions = {}
+    for start in range(0, len(item_ids), BATCH_SIZE):
+        versions.update(InventoryItemVersion.objects.record(item_ids[start:start + BATCH_SIZE]))
+    log(f"Created {len(item_rows)} items")
+
+    items_by_list = {}
+    for item in item_rows:
+        items_by_list.setdefault((item.location_id, item.frequency_id), []).append(item)
+
+    first_day = end_date - timedelta(days=weeks * 7 - 1)
+    sheets = []
+    for offset in range(weeks * 7):
+        count_date = first_day + timedelta(days=offset)
+        for location in location_rows:
+            frequencies = [f for f in (daily, weekly) if f.is_due_on(count_date)]
+            for frequency in frequencies:
+                is_open = count_date == end_date
+                sheets.append(CountSheet(
+                    location=location,
+                    frequency=frequency,
+                    count_date=count_date,
+                    status=CountSheetStatus.DRAFT if is_open else CountSheetStatus.SUBMITTED,
+                    submitted_by=None if is_open else admin,
+                    submitted_at=None if is_open else timezone.now(),
+                    created_by=admin,
+                    updated_by=admin,
+                ))
+    CountSheet.objects.bulk_create(sheets, batch_size=BATCH_SIZE)
+    sheet_rows = list(
+        CountSheet.objects.filter(location__in=location_rows).order_by("count_date", "location_id", "frequency_id")
+    )
+    changelog.record(sheet_rows, ChangeAction.CREATE)
+    log(f"Created {len(sheet_rows)} sheets")
+
+    entry_total = 0
+    pending = []
+
+    def flush():
+        nonlocal entry_total
+        CountEntry.objects.bulk_create(pending, batch_size=BATCH_SIZE)
+        changelog.record(pending, ChangeAction.CREATE)
+        entry_total += len(pending)
+        pending.clear()
+
+    counted_at = timezone.now()
+    for sheet in sheet_rows:
+        for item in items_by_list.get((sheet.location_id, sheet.frequency_id), ()):
+            on_hand = Decimal(rng.randint(0, int(item.par_level * Decimal("1.5"))))
+            calc = calculate_order(on_hand, OrderParameters(
+                par_level=item.par_level,
+                order_point=item.order_point,
+                pack_size=Decimal(item.pack_size),
+            ))
+            pending.append(CountEntry(
+                sheet=sheet,
+                item=item,
+                item_version=versions.get(item.pk),
+                count_date=sheet.count_date,
+                on_hand_quantity=on_hand,
+                calculated_qty_to_order=calc.qty_to_order,
+                calculated_order_units=calc.order_units,
+                highlight_state=calc.highlight_state,
+                counted_at=counted_at,
+                created_by=admin,
+                updated_by=admin,
+            ))
+        if len(pending) >= BATCH_SIZE:
+            flush()
+    flush()
+    CountSheet.objects.filter(location__in=location_rows).refresh_counters()
+    log(f"Created {entry_total} entries")
+
+    submitted = [s for s in sheet_rows if s.status == CountSheetStatus.SUBMITTED]
+    Report.objects.bulk_create(
+        [Report(location_id=s.location_id, frequency_id=s.frequency_id,
+                period_start=s.count_date, created_by=admin, updated_by=admin)
+         for s in submitted],
+        batch_size=BATCH_SIZE,
+    )
+    report_ids = dict(
+        ((location_id, frequency_id, period_start), pk)
+        for pk, location_id, frequency_id, period_start in Report.objects.filter(
+            location__in=location_rows
+        ).values_list("pk", "location_id", "frequency_id", "period_start")
+    )
+    through = Report.count_entries.through
+    for start in range(0, len(submitted), 200):
+        batch = {s.pk: s for s in submitted[start:start + 200]}
+        links = [
+            through(
+                report_id=report_ids[(batch[sheet_id].location_id, batch[sheet_id].frequency_id,
+                                      batch[sheet_id].count_date)],
+                countentry_id=entry_id,
+            )
+            for entry_id, sheet_id in CountEntry.objects.filter(
+                sheet_id__in=batch
+            ).values_list("pk", "sheet_id")
+        ]
+        through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+    changelog.record(Report.objects.filter(pk__in=report_ids.values()), ChangeAction.CREATE)
+    log(f"Created {len(report_ids)} reports")
+
+    latest = {}
+    for sheet in submitted:
+        latest[(sheet.location_id, sheet.frequency_id)] = sheet
+    for sheet in latest.values():
+        StockSnapshot.objects.refresh_from_sheet(sheet)
+
+    for section in bootstrap.SECTIONS:
+        bootstrap.bump_version(section)
+
+    return {
+        "locations": len(location_rows),
+        "items": len(item_rows),
+        "sheets": len(sheet_rows),
+        "entries": entry_total,
+        "reports": len(report_ids),
+        "admin": admin.username,
+    }
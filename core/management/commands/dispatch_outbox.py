@@ -0,0 +1,58 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core import outbox
+from core.models import OutboxEvent, OutboxStatus
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbox events to the configured sink in batches, retrying "
+        "failures with exponential backoff. Runs until interrupted unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sink', choices=('stdout', 'file', 'http'),
+                            help='Override OUTBOX["SINK"]')
+        parser.add_argument('--file', help='Path for the file sink')
+        parser.add_argument('--url', help='Endpoint for the http sink')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait when no events are due')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit as soon as no events are due')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Requeue events that exhausted their attempts before dispatching')
+
+    def handle(self, *args, **options):
+        config = outbox.outbox_settings()
+        for option, key in (('file', 'FILE_PATH'), ('url', 'HTTP_URL'), ('batch_size', 'BATCH_SIZE')):
+            if options[option] is not None:
+                config[key] = options[option]
+        if config['BATCH_SIZE'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        try:
+            sink = outbox.build_sink(options['sink'], config)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if isinstance(sink, outbox.StdoutSink):
+            sink.stream = self.stdout
+
+        if options['retry_failed']:
+            requeued = OutboxEvent.objects.filter(status=OutboxStatus.FAILED).retry()
+            self.stderr.write(f"Requeued {requeued} failed events")
+
+        delivered = failed = 0
+        try:
+            while True:
+                sent, errors = outbox.dispatch_batch(sink, config)
+                delivered += sent
+                failed += errors
+                if sent and not errors:
+                    continue
+                # Nothing due, or the sink is failing: don't hammer it with the next batch.
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stderr.write(f"Delivered {delivered} events, {failed} failed attempts")
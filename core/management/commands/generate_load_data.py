@@ -0,0 +1,51 @@
+from datetime import date
+from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from core import loaddata
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset: N locations x M items x K weeks "
+        "of count sheets, entries and reports, written with bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--locations', type=int, default=10)
+        parser.add_argument('--items', type=int, default=200, help='Items per location')
+        parser.add_argument('--weeks', type=int, default=12)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--end-date', type=date.fromisoformat, default=None,
+            help='Last count date (YYYY-MM-DD); defaults to today'
+        )
+        parser.add_argument('--prefix', default=loaddata.PREFIX)
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete previously generated rows with the same prefix first'
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            loaddata.clear(options['prefix'])
+            self.stdout.write(self.style.WARNING('Cleared previous load data'))
+
+        try:
+            with transaction.atomic():
+                summary = loaddata.generate(
+                    locations=options['locations'],
+                    items=options['items'],
+                    weeks=options['weeks'],
+                    seed=options['seed'],
+                    end_date=options['end_date'],
+                    prefix=options['prefix'],
+                    log=self.stdout.write,
+                )
+        except Exception as e:
+            raise CommandError(f"Load data generation failed: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {summary['locations']} locations, {summary['items']} items, "
+            f"{summary['sheets']} sheets, {summary['entries']} entries and "
+            f"{summary['reports']} reports"
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from core.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses whose TTL has expired."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyRecord.objects.expired().delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency records"))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from counts.models import CountEntry, CountSheet
+from core import loaddata
+from core.benchmarks import BenchmarkRunner, write_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Time sheet load, bulk count write, submit, report list (all and by "
+        "location), report rendering and the API middleware stack in-process "
+        "against data from generate_load_data and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--prefix', default=loaddata.PREFIX)
+        parser.add_argument('--only', action='append', help='Run only the named benchmark')
+        parser.add_argument('--output', default='benchmark_results.json')
+
+    def handle(self, *args, **options):
+        try:
+            runner = BenchmarkRunner(
+                repeat=options['repeat'], warmup=options['warmup'], prefix=options['prefix']
+            )
+            results = runner.run(only=options['only'])
+        except Exception as e:
+            raise CommandError(f"Benchmark run failed: {e}")
+
+        dataset = {
+            "sheets": CountSheet.objects.filter(
+                location__name__startswith=f"{options['prefix']} Location ").count(),
+            "entries": CountEntry.objects.filter(
+                sheet__location__name__startswith=f"{options['prefix']} Location ").count(),
+        }
+        write_results(options['output'], results, dataset)
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24} median {result['median_ms']:>9.2f} ms  "
+                f"p95 {result['p95_ms']:>9.2f} ms  queries {result['queries']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
@@ -0,0 +1,275 @@
+import os
+import re
+import json
+import atexit
+import time
+import random
+import tempfile
+import threading
+import contextvars
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .replica import execute_wrapper_all
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_probe = contextvars.ContextVar("pbis_request_probe", default=None)
+
+_WORKER_FILE = re.compile(r"^metrics_(\d+)\.json$")
+
+
+def metrics_settings():
+    return {
+        "ENABLED": False,
+        "SAMPLE_RATE": 0.1,
+        "DIR": None,
+        "FLUSH_INTERVAL": 10,
+        "PATH_PREFIX": "/api/",
+        **getattr(settings, "METRICS", {}),
+    }
+
+
+class RequestProbe:
+    """DB execute wrapper collecting query count and time for one sampled request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def current_probe():
+    return _request_probe.get()
+
+
+class MetricsStore:
+    """Per-process aggregates, periodically written to ``DIR/metrics_<pid>.json``.
+
+    Each worker only ever writes its own file, so the files can be merged by
+    any worker without locking. Point ``DIR`` at a tmpfs such as /dev/shm,
+    private to one host: files of workers that have exited are deleted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._last_flush = time.monotonic()
+
+    def _empty(self):
+        return {
+            "count": 0,
+            "latency_sum": 0.0,
+            "buckets": [0] * len(LATENCY_BUCKETS),
+            "sampled": 0,
+            "db_queries": 0,
+            "db_time": 0.0,
+            "serializer_time": 0.0,
+            "response_bytes": 0,
+        }
+
+    def observe(self, view, method, latency, response_bytes, probe=None):
+        key = f"{view}|{method}"
+        with self._lock:
+            series = self._series.setdefault(key, self._empty())
+            series["count"] += 1
+            series["latency_sum"] += latency
+            series["response_bytes"] += response_bytes
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    series["buckets"][index] += 1
+                    break
+            if probe is not None:
+                series["sampled"] += 1
+                series["db_queries"] += probe.queries
+                series["db_time"] += probe.db_time
+                series["serializer_time"] += probe.serializer_time
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return json.loads(json.dumps(self._series))
+
+    def maybe_flush(self, force=False):
+        config = metrics_settings()
+        directory = config["DIR"]
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < config["FLUSH_INTERVAL"]:
+            return
+        self._last_flush = now
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics_")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp_path, os.path.join(directory, f"metrics_{os.getpid()}.json"))
+
+    def discard(self):
+        """Remove this worker's file; registered to run at worker exit."""
+        directory = metrics_settings()["DIR"]
+        if directory:
+            try:
+                os.remove(os.path.join(directory, f"metrics_{os.getpid()}.json"))
+            except FileNotFoundError:
+                pass
+
+    def collect(self):
+        """Merge the series of every worker, using live values for this one."""
+        merged = {}
+        sources = [self.snapshot()]
+        directory = metrics_settings()["DIR"]
+        if directory and os.path.isdir(directory):
+            for name in os.listdir(directory):
+                match = _WORKER_FILE.match(name)
+                if match is None or int(match.group(1)) == os.getpid():
+                    continue
+                path = os.path.join(directory, name)
+                if not _pid_alive(int(match.group(1))):
+                    # A recycled worker; its counts would otherwise be added forever.
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    continue
+                try:
+                    with open(path) as fh:
+                        sources.append(json.load(fh))
+                except (OSError, ValueError):
+                    continue
+        for source in sources:
+            for key, series in source.items():
+                target = merged.setdefault(key, self._empty())
+                for field, value in series.items():
+                    if field == "buckets":
+                        target["buckets"] = [a + b for a, b in zip(target["buckets"], value)]
+                    else:
+                        target[field] += value
+        return merged
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+store = MetricsStore()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_prometheus(series):
+    lines = [
+        "# HELP pbis_request_duration_seconds Request latency by view.",
+        "# TYPE pbis_request_duration_seconds histogram",
+    ]
+    counters = {
+        "pbis_requests_sampled_total": ("sampled", "Requests with DB and serializer sampling."),
+        "pbis_db_queries_total": ("db_queries", "DB queries issued by sampled requests."),
+        "pbis_db_seconds_total": ("db_time", "DB time spent by sampled requests."),
+        "pbis_serializer_seconds_total": ("serializer_time", "Serializer time of sampled requests."),
+        "pbis_response_bytes_total": ("response_bytes", "Response body bytes."),
+    }
+    for key in sorted(series):
+        view, method = key.split("|", 1)
+        labels = f'view="{_label(view)}",method="{_label(method)}"'
+        data = series[key]
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, data["buckets"]):
+            cumulative += count
+            lines.append(f'pbis_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'pbis_request_duration_seconds_bucket{{{labels},le="+Inf"}} {data["count"]}')
+        lines.append(f"pbis_request_duration_seconds_sum{{{labels}}} {data['latency_sum']}")
+        lines.append(f"pbis_request_duration_seconds_count{{{labels}}} {data['count']}")
+    for name, (field, help_text) in counters.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for key in sorted(series):
+            view, method = key.split("|", 1)
+            lines.append(
+                f'{name}{{view="{_label(view)}",method="{_label(method)}"}} {series[key][field]}'
+            )
+    return "\n".join(lines) + "\n"
+
+
+def instrument_serializers():
+    """Time top-level ``Serializer.data`` calls for sampled requests."""
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        original = cls.data
+        if getattr(original.fget, "_pbis_timed", False):
+            continue
+
+        def timed(self, _fget=original.fget):
+            probe = _request_probe.get()
+            if probe is None:
+                return _fget(self)
+            start = time.perf_counter()
+            try:
+                return _fget(self)
+            finally:
+                probe.serializer_time += time.perf_counter() - start
+
+        timed._pbis_timed = True
+        cls.data = property(timed)
+
+
+class RequestMetricsMiddleware:
+    """Per-view latency, DB and payload metrics for API requests.
+
+    Every request feeds the latency histogram; a ``SAMPLE_RATE`` fraction is
+    additionally wrapped with a DB execute wrapper and serializer timer.
+    """
+
+    def __init__(self, get_response):
+        config = metrics_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.prefix = config["PATH_PREFIX"]
+        instrument_serializers()
+        if config["DIR"]:
+            atexit.register(store.discard)
+
+    def __call__(self, request):
+        if not request.path.startswith(self.prefix):
+            return self.get_response(request)
+
+        probe = RequestProbe() if random.random() < self.sample_rate else None
+        start = time.perf_counter()
+        if probe is not None:
+            token = _request_probe.set(probe)
+            try:
+                with execute_wrapper_all(probe):
+                    response = self.get_response(request)
+            finally:
+                _request_probe.reset(token)
+        else:
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name or match.route) if match else "unresolved"
+        size = 0 if response.streaming else len(response.content)
+        store.observe(view, request.method, latency, size, probe)
+        return response
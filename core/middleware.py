@@ -0,0 +1,57 @@
+"""Path-aware versions of Django's browser-only middleware.
+
+The API authenticates with JWT bearer tokens, so sessions, CSRF cookies,
+messages, request.user and frame options only matter for admin/ and the SPA.
+Each class behaves exactly like its Django parent, except that requests under
+LEAN_API_PATH_PREFIXES pass straight through to the next middleware.
+"""
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import clickjacking, csrf
+
+
+DJANGO_EQUIVALENTS = {
+    "core.middleware.SessionMiddleware": "django.contrib.sessions.middleware.SessionMiddleware",
+    "core.middleware.CsrfViewMiddleware": "django.middleware.csrf.CsrfViewMiddleware",
+    "core.middleware.AuthenticationMiddleware": "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.MessageMiddleware": "django.contrib.messages.middleware.MessageMiddleware",
+    "core.middleware.XFrameOptionsMiddleware": "django.middleware.clickjacking.XFrameOptionsMiddleware",
+}
+
+
+def is_lean_api_request(request):
+    prefixes = getattr(settings, "LEAN_API_PATH_PREFIXES", ("/api/",))
+    return request.path_info.startswith(tuple(prefixes))
+
+
+class LeanAPIMixin:
+    def __call__(self, request):
+        if is_lean_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(LeanAPIMixin, sessions_middleware.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(LeanAPIMixin, csrf.CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # process_view is called by the handler directly, outside __call__.
+        if is_lean_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(LeanAPIMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(LeanAPIMixin, messages_middleware.MessageMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(LeanAPIMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
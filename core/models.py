@@ -0,0 +1,200 @@
+from django.db import models, transaction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class SlowQuery(models.Model):
+    """Ring buffer of slow SQL statements captured by SlowQueryMiddleware."""
+    sql = models.TextField(help_text=_("Normalized SQL with literals replaced by ?"))
+    fingerprint = models.CharField(max_length=40, db_index=True)
+    duration_ms = models.FloatField()
+    view = models.CharField(max_length=255, blank=True)
+    serializer_field = models.CharField(max_length=255, blank=True)
+    plan = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = _("Slow Query")
+        verbose_name_plural = _("Slow Queries")
+
+    def __str__(self) -> str:
+        return f"{self.duration_ms:.1f} ms · {self.view or '-'}"
+
+
+class IdempotencyRecordQuerySet(models.QuerySet):
+    def expired(self, now=None):
+        return self.filter(expires_at__lte=now or timezone.now())
+
+
+class IdempotencyRecord(models.Model):
+    """Stored response for an Idempotency-Key, replayed to retries of the same request.
+
+    A row without status_code is a placeholder held while the first request
+    runs; concurrent duplicates wait for it to be filled in.
+    """
+    key = models.CharField(max_length=64, unique=True,
+                           help_text=_("SHA-256 of the user and the client's Idempotency-Key"))
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=128, blank=True)
+    body = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = IdempotencyRecordQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Idempotency Record")
+        verbose_name_plural = _("Idempotency Records")
+
+    def __str__(self) -> str:
+        return f"{self.key[:12]} ({self.status_code or 'pending'})"
+
+    @property
+    def is_complete(self):
+        return self.status_code is not None
+
+
+class ChangeAction(models.TextChoices):
+    CREATE = "create", _("Create")
+    UPDATE = "update", _("Update")
+    DELETE = "delete", _("Delete")
+
+
+class ChangeSequenceQuerySet(models.QuerySet):
+    def bump(self, name) -> None:
+        """Increment the named counter, creating it at 1, in the caller's transaction."""
+        if self.filter(name=name).update(value=F("value") + 1):
+            return
+        _counter, created = self.get_or_create(name=name, defaults={"value": 1})
+        if not created:
+            self.filter(name=name).update(value=F("value") + 1)
+
+
+class ChangeSequence(models.Model):
+    """Named counter row: the change log sequence and the bootstrap and count
+    status versions.
+
+    Change log writers lock the "changes" row until they commit, so its
+    numbers are gapless and become visible in order.
+    """
+    name = models.CharField(max_length=32, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    objects = ChangeSequenceQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Change Sequence")
+        verbose_name_plural = _("Change Sequences")
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.value}"
+
+
+class ChangeLogEntryQuerySet(models.QuerySet):
+    def append(self, rows) -> list:
+        """Append (model, object_id, action, data) rows with consecutive sequence numbers.
+
+        Runs in the caller's transaction: the counter row stays locked until it
+        commits, and a rollback releases the numbers together with the rows.
+        Writers wrap the change itself in the same transaction so neither can
+        commit without the other.
+        """
+        if not rows:
+            return []
+        with transaction.atomic():
+            counter, _created = ChangeSequence.objects.select_for_update().get_or_create(
+                name="changes")
+            start = counter.value
+            ChangeSequence.objects.filter(pk=counter.pk).update(value=start + len(rows))
+            now = timezone.now()
+            return self.bulk_create([
+                self.model(seq=start + offset, model=model, object_id=object_id,
+                           action=action, data=data, changed_at=now)
+                for offset, (model, object_id, action, data) in enumerate(rows, start=1)
+            ])
+
+
+class ChangeLogEntry(models.Model):
+    """Append-only change data capture feed, read incrementally by sequence number."""
+    seq = models.BigIntegerField(primary_key=True)
+    model = models.CharField(max_length=64)
+    object_id = models.CharField(max_length=64)
+    action = models.CharField(max_length=8, choices=ChangeAction.choices)
+    data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    objects = ChangeLogEntryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["seq"]
+        verbose_name = _("Change Log Entry")
+        verbose_name_plural = _("Change Log Entries")
+        indexes = [
+            models.Index(fields=['model', 'object_id']),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.seq} {self.action} {self.model}:{self.object_id}"
+
+
+class OutboxStatus(models.TextChoices):
+    PENDING = "pending", _("Pending")
+    DELIVERED = "delivered", _("Delivered")
+    FAILED = "failed", _("Failed")
+
+
+class OutboxEventQuerySet(models.QuerySet):
+    def publish(self, topic, payload):
+        """Queue an integration event in the caller's transaction."""
+        return self.create(topic=topic, payload=payload)
+
+    def due(self, now=None):
+        return self.filter(
+            status=OutboxStatus.PENDING, available_at__lte=now or timezone.now()
+        ).order_by("pk")
+
+    def retry(self):
+        """Put failed events back in the queue for immediate delivery."""
+        return self.exclude(status=OutboxStatus.DELIVERED).update(
+            status=OutboxStatus.PENDING, available_at=timezone.now(), last_error="")
+
+
+class OutboxEvent(models.Model):
+    """Integration event waiting to be delivered by dispatch_outbox.
+
+    Rows are written in the same transaction as the change they describe, so an
+    event exists exactly when its change was committed.
+    """
+    topic = models.CharField(max_length=64, db_index=True)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=16, choices=OutboxStatus.choices, default=OutboxStatus.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboxEventQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-pk"]
+        verbose_name = _("Outbox Event")
+        verbose_name_plural = _("Outbox Events")
+        indexes = [
+            models.Index(fields=['status', 'available_at']),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.pk} {self.topic} ({self.status})"
+
+    def as_message(self):
+        return {
+            "id": self.pk,
+            "topic": self.topic,
+            "created_at": self.created_at,
+            "payload": self.payload,
+        }
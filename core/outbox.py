@@ -0,0 +1,176 @@
+"""Transactional outbox for integration events.
+
+publish() writes an OutboxEvent inside the caller's transaction; nothing talks
+to downstream systems during the request. The dispatch_outbox command drains
+due events in batches to a sink. Delivery is at least once: consumers should
+ignore event ids they have already seen.
+"""
+import sys
+import json
+import logging
+import urllib.request
+from datetime import timedelta
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEvent, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+
+def outbox_settings():
+    return {
+        "SINK": "stdout",
+        "FILE_PATH": "outbox.ndjson",
+        "HTTP_URL": "http://127.0.0.1:8001/events",
+        "HTTP_TIMEOUT": 5,
+        "BATCH_SIZE": 100,
+        "MAX_ATTEMPTS": 10,
+        "BACKOFF": 5,
+        "MAX_BACKOFF": 3600,
+        **getattr(settings, "OUTBOX", {}),
+    }
+
+
+SHEET_SUBMITTED = "countsheet.submitted"
+ITEM_CHANGED = "inventoryitem.changed"
+
+
+def publish(topic, payload):
+    return OutboxEvent.objects.publish(topic, payload)
+
+
+def publish_sheet_submitted(sheet, report):
+    return publish_sheets_submitted([(sheet, report)])[0]
+
+
+def publish_sheets_submitted(submitted):
+    """Queue one SHEET_SUBMITTED event per ``(sheet, report)`` pair."""
+    from counts.models import CountEntry
+    entries = {}
+    for entry in CountEntry.objects.filter(
+        sheet_id__in=[sheet.pk for sheet, _ in submitted], deleted_at__isnull=True
+    ).order_by("item_id").values(
+        "sheet_id", "item_id", "on_hand_quantity", "calculated_qty_to_order", "calculated_order_units"
+    ):
+        entries.setdefault(entry.pop("sheet_id"), []).append(entry)
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=SHEET_SUBMITTED, payload={
+            "sheet_id": sheet.pk,
+            "location_id": sheet.location_id,
+            "frequency_id": sheet.frequency_id,
+            "count_date": sheet.count_date,
+            "submitted_by_id": sheet.submitted_by_id,
+            "submitted_at": sheet.submitted_at,
+            "report_id": report.pk,
+            "entries": entries.get(sheet.pk, []),
+        })
+        for sheet, report in submitted
+    ])
+
+
+def publish_item_changes(items, action):
+    from .changelog import snapshot
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=ITEM_CHANGED, payload={"action": action, "item": snapshot(item)})
+        for item in items
+    ])
+
+
+def encode(message):
+    return json.dumps(message, cls=DjangoJSONEncoder, separators=(",", ":"))
+
+
+class StdoutSink:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, messages):
+        self.stream.write("".join(encode(message) + "\n" for message in messages))
+        self.stream.flush()
+
+
+class FileSink:
+    """Appends one JSON line per event to ``path``."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, messages):
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write("".join(encode(message) + "\n" for message in messages))
+
+
+class HTTPSink:
+    """POSTs each batch as ``{"events": [...]}``; any non-2xx response is a failure."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, messages):
+        request = urllib.request.Request(
+            self.url,
+            data=encode({"events": messages}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if not 200 <= response.status < 300:
+                raise OSError(f"{self.url} answered {response.status}")
+
+
+def build_sink(name=None, config=None):
+    config = config or outbox_settings()
+    name = name or config["SINK"]
+    if name == "stdout":
+        return StdoutSink()
+    if name == "file":
+        return FileSink(config["FILE_PATH"])
+    if name == "http":
+        return HTTPSink(config["HTTP_URL"], timeout=config["HTTP_TIMEOUT"])
+    raise ValueError(f"Unknown outbox sink {name!r}; expected stdout, file or http.")
+
+
+def backoff_delay(attempts, config):
+    return timedelta(seconds=min(config["MAX_BACKOFF"], config["BACKOFF"] * 2 ** (attempts - 1)))
+
+
+def dispatch_batch(sink, config=None):
+    """Send the next batch of due events to ``sink``.
+
+    The batch stays row-locked (skipping rows other workers hold) until its
+    outcome is saved, so parallel dispatchers never send the same batch. A
+    failed batch is retried as a whole after an exponential backoff, and gives
+    up after MAX_ATTEMPTS. Returns (delivered, failed) counts.
+    """
+    config = config or outbox_settings()
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.due(now).select_for_update(skip_locked=True)[:config["BATCH_SIZE"]]
+        )
+        if not events:
+            return 0, 0
+        try:
+            sink.send([event.as_message() for event in events])
+        except Exception as exc:
+            for event in events:
+                event.attempts += 1
+                event.last_error = str(exc)[:1000] or type(exc).__name__
+                if event.attempts >= config["MAX_ATTEMPTS"]:
+                    event.status = OutboxStatus.FAILED
+                else:
+                    event.available_at = now + backoff_delay(event.attempts, config)
+            OutboxEvent.objects.bulk_update(events, ["attempts", "last_error", "status", "available_at"])
+            logger.warning("Outbox delivery of %d events failed: %s", len(events), exc)
+            return 0, len(events)
+
+        for event in events:
+            event.attempts += 1
+            event.status = OutboxStatus.DELIVERED
+            event.delivered_at = now
+            event.last_error = ""
+        OutboxEvent.objects.bulk_update(events, ["attempts", "status", "delivered_at", "last_error"])
+        return len(events), 0
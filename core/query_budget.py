@@ -0,0 +1,132 @@
+"""Query recording, API route discovery and N+1 detection.
+
+Used by the query-budget tests and, in DEBUG, by QueryBudgetMiddleware.
+"""
+import re
+import logging
+import traceback
+from collections import Counter
+from django.conf import settings
+from django.urls import URLPattern, URLResolver
+from django.urls.resolvers import RoutePattern
+from django.core.exceptions import MiddlewareNotUsed
+from .replica import execute_wrapper_all
+from .slow_queries import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+_CONVERTER = re.compile(r"<(?:(?P<converter>\w+):)?(?P<name>\w+)>")
+_REGEX_GROUP = re.compile(r"\(\?P<(?P<name>\w+)>[^)]*\)")
+
+
+def query_budget_settings():
+    return {
+        "MAX_QUERIES": 50,
+        "REPEAT_THRESHOLD": 10,
+        **getattr(settings, "QUERY_BUDGET", {}),
+    }
+
+
+class QueryRecorder:
+    """Execute wrapper keeping each statement with the project frames that issued it."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        stack = [
+            frame for frame in traceback.extract_stack()[:-1]
+            if str(settings.BASE_DIR) in frame.filename
+            and "site-packages" not in frame.filename
+        ]
+        self.queries.append((sql, stack))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold):
+        """Normalized statements issued at least ``threshold`` times."""
+        counts = Counter(normalize_sql(sql) for sql, _ in self.queries)
+        return {sql: n for sql, n in counts.items() if n >= threshold}
+
+    def describe(self, sql):
+        """Example SQL and stack trace for a normalized statement."""
+        for raw, stack in self.queries:
+            if normalize_sql(raw) == sql:
+                return f"{raw}\n" + "".join(traceback.format_list(stack[-6:]))
+        return sql
+
+
+def _route_template(pattern):
+    if isinstance(pattern, RoutePattern):
+        return str(pattern)
+    return pattern.regex.pattern.lstrip("^").rstrip("$").replace("\\", "")
+
+
+def iter_api_routes(patterns, prefix=""):
+    """Yield ``(template, callback)`` for every GET endpoint under ``patterns``."""
+    for entry in patterns:
+        template = prefix + _route_template(entry.pattern)
+        if isinstance(entry, URLResolver):
+            yield from iter_api_routes(entry.url_patterns, template)
+            continue
+        if not isinstance(entry, URLPattern) or "format" in template:
+            continue
+        callback = entry.callback
+        actions = getattr(callback, "actions", None)
+        cls = getattr(callback, "cls", None)
+        if actions is not None:
+            if "get" not in actions:
+                continue
+        elif cls is None or not hasattr(cls, "get"):
+            continue
+        yield template, callback
+
+
+def fill_route(template, values):
+    """Substitute path parameters from ``values``; None if one is missing."""
+    missing = []
+
+    def substitute(match):
+        name = match.group("name")
+        if name not in values:
+            missing.append(name)
+            return ""
+        return str(values[name])
+
+    path = _REGEX_GROUP.sub(substitute, template)
+    path = _CONVERTER.sub(substitute, path)
+    return None if missing else path
+
+
+class QueryBudgetMiddleware:
+    """DEBUG-only warnings for API requests that exceed the query budget or repeat a query."""
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        config = query_budget_settings()
+        self.max_queries = config["MAX_QUERIES"]
+        self.repeat_threshold = config["REPEAT_THRESHOLD"]
+
+    def __call__(self, request):
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with execute_wrapper_all(recorder):
+            response = self.get_response(request)
+
+        if len(recorder) > self.max_queries:
+            logger.warning(
+                "%s %s issued %d queries (budget %d)",
+                request.method, request.path, len(recorder), self.max_queries,
+            )
+        for sql, count in recorder.repeated(self.repeat_threshold).items():
+            logger.warning(
+                "Possible N+1 on %s %s: %d x %s",
+                request.method, request.path, count, recorder.describe(sql),
+            )
+        return response
@@ -0,0 +1,96 @@
+"""Fast JSON and optional MessagePack renderers/parsers for the DRF API.
+
+orjson and msgpack are optional: when orjson is missing the JSON classes fall
+back to DRF's stdlib implementation, and the MessagePack renderer is only
+listed in REST_FRAMEWORK when msgpack is installed.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised by the fallback tests
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+_encoder = encoders.JSONEncoder()
+
+
+def encode_default(obj):
+    """Convert values the fast encoders don't handle natively.
+
+    Delegates to DRF's JSONEncoder so Decimal, datetimes, lazy translation
+    strings, querysets and generators render exactly as with JSONRenderer.
+    """
+    return _encoder.default(obj)
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed.
+
+    Output matches JSONRenderer for compact, UTF-8 responses. Pretty-printed
+    (``; indent=``) or ASCII-only output is delegated to the stdlib path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Values orjson refuses (e.g. integers beyond 64 bits).
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that decodes with orjson when it is installed."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        encoding = get_encoding(parser_context or {})
+
+        body = stream.read() if stream is not None else b''
+        try:
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renders responses as MessagePack for clients sending
+    ``Accept: application/msgpack``. Values are converted like the JSON
+    renderer, so both formats carry the same data."""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if msgpack is None:
+            raise RuntimeError("MessagePackRenderer requires the msgpack package.")
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
@@ -0,0 +1,70 @@
+from django.dispatch import receiver
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from counts import status as count_status
+from . import changelog, outbox
+from .models import ChangeAction
+from .bootstrap import bump_version, section_for_model
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_bootstrap(sender, raw=False, **kwargs):
+    if raw:
+        return
+    section = section_for_model(sender)
+    if section is not None:
+        bump_version(section)
+
+
+@receiver(post_save)
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if raw or not changelog.is_tracked(sender):
+        return
+    changelog.record([instance], ChangeAction.CREATE if created else ChangeAction.UPDATE)
+
+
+@receiver(post_delete)
+def log_delete(sender, instance, **kwargs):
+    if changelog.is_tracked(sender):
+        changelog.record([instance], ChangeAction.DELETE)
+
+
+@receiver(m2m_changed)
+def log_relation_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        changelog.record([instance], ChangeAction.UPDATE)
+    elif pk_set and changelog.is_tracked(model):
+        changelog.record(model.objects.filter(pk__in=pk_set), ChangeAction.UPDATE)
+
+
+@receiver(post_save, sender="inventory.InventoryItem")
+def publish_item_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        outbox.publish_item_changes([instance], ChangeAction.CREATE if created else ChangeAction.UPDATE)
+
+
+@receiver(post_delete, sender="inventory.InventoryItem")
+def publish_item_delete(sender, instance, **kwargs):
+    outbox.publish_item_changes([instance], ChangeAction.DELETE)
+
+
+@receiver(post_delete, sender="counts.CountEntry")
+def release_sheet_counters(sender, instance, origin=None, **kwargs):
+    # Queryset deletes recount their sheets themselves, and cascades from a
+    # deleted sheet have nothing left to update.
+    if isinstance(origin, sender):
+        instance.update_sheet_counters(getattr(instance, "_counted_as", None), (instance.sheet_id, {}))
+
+
+@receiver(post_save, sender="counts.CountSheet")
+@receiver(post_delete, sender="counts.CountSheet")
+@receiver(post_save, sender="frequency.Frequency")
+@receiver(post_delete, sender="frequency.Frequency")
+@receiver(post_save, sender="locations.Location")
+@receiver(post_delete, sender="locations.Location")
+def invalidate_count_status(sender, raw=False, **kwargs):
+    if raw:
+        return
+    count_status.invalidate()
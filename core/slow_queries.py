@@ -0,0 +1,161 @@
+import re
+import sys
+import time
+import random
+import hashlib
+import logging
+import contextvars
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .replica import execute_wrapper_all
+
+logger = logging.getLogger(__name__)
+
+_active_request = contextvars.ContextVar("pbis_slow_query_request", default=None)
+_capturing = contextvars.ContextVar("pbis_slow_query_capturing", default=False)
+_pending = contextvars.ContextVar("pbis_slow_query_pending", default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.\"])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def slow_query_settings():
+    return {
+        "ENABLED": False,
+        "THRESHOLD_MS": 200,
+        "EXPLAIN_SAMPLE_RATE": 0.1,
+        "EXPLAIN_ANALYZE": False,
+        "BUFFER_SIZE": 500,
+        **getattr(settings, "SLOW_QUERIES", {}),
+    }
+
+
+def normalize_sql(sql):
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def find_serializer_field():
+    """Name the DRF field whose to_representation issued the current query."""
+    from rest_framework.fields import Field
+
+    frame = sys._getframe(2)
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        if isinstance(owner, Field) and owner.field_name:
+            parent = type(owner.parent).__name__ if owner.parent is not None else ""
+            return f"{parent}.{owner.field_name}" if parent else owner.field_name
+        frame = frame.f_back
+    return ""
+
+
+def _view_name():
+    request = _active_request.get()
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return ""
+    return match.view_name or match.route or ""
+
+
+def _explain(connection_, sql, params, analyze):
+    options = {"analyze": True} if analyze and connection_.vendor == "postgresql" else {}
+    prefix = connection_.ops.explain_query_prefix(**options)
+    with connection_.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}", params)
+        return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+
+
+def record(sql, params, duration, connection_):
+    from .models import SlowQuery
+
+    config = slow_query_settings()
+    normalized = normalize_sql(sql)
+    plan = ""
+    if (sql.lstrip()[:6].upper() == "SELECT"
+            and random.random() < config["EXPLAIN_SAMPLE_RATE"]):
+        try:
+            plan = _explain(connection_, sql, params, config["EXPLAIN_ANALYZE"])
+        except Exception:
+            logger.debug("EXPLAIN failed for slow query", exc_info=True)
+    entry = SlowQuery(
+        sql=normalized,
+        fingerprint=hashlib.sha1(normalized.encode()).hexdigest(),
+        duration_ms=duration * 1000,
+        view=_view_name()[:255],
+        serializer_field=find_serializer_field()[:255],
+        plan=plan,
+    )
+    pending = _pending.get()
+    if pending is not None:
+        pending.append(entry)
+    else:
+        save_captures([entry])
+    return entry
+
+
+def save_captures(entries):
+    """Write captured slow queries and trim the table to the newest BUFFER_SIZE rows."""
+    from .models import SlowQuery
+
+    if not entries:
+        return
+    SlowQuery.objects.bulk_create(entries)
+    first, last = entries[0].pk, entries[-1].pk
+    if last is None:
+        return
+    # Trim every 50 rows rather than on each write.
+    cutoff = last - slow_query_settings()["BUFFER_SIZE"]
+    if cutoff > 0 and (first - 1) // 50 != last // 50:
+        SlowQuery.objects.filter(pk__lte=cutoff).delete()
+
+
+class SlowQueryRecorder:
+    """DB execute wrapper that captures statements slower than THRESHOLD_MS."""
+
+    def __init__(self, threshold_ms):
+        self.threshold = threshold_ms / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        if _capturing.get():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= self.threshold and not many:
+            token = _capturing.set(True)
+            try:
+                record(sql, params, duration, context["connection"])
+            except Exception:
+                logger.warning("Could not record slow query", exc_info=True)
+            finally:
+                _capturing.reset(token)
+        return result
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        config = slow_query_settings()
+        if not config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.recorder = SlowQueryRecorder(config["THRESHOLD_MS"])
+
+    def __call__(self, request):
+        # Captures are written after the response, outside the request's
+        # transactions, so a request that fails and rolls back keeps them.
+        pending = []
+        tokens = (_active_request.set(request), _pending.set(pending))
+        try:
+            with execute_wrapper_all(self.recorder):
+                return self.get_response(request)
+        finally:
+            _pending.reset(tokens[1])
+            _active_request.reset(tokens[0])
+            try:
+                save_captures(pending)
+            except Exception:
+                logger.warning("Could not save slow queries", exc_info=True)
@@ -0,0 +1,710 @@
+import io
+import os
+import json
+import time
+import sys
+import uuid
+import tempfile
+import subprocess
+from decimal import Decimal
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock, skipUnless
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.core.exceptions import MiddlewareNotUsed
+from django.conf import settings
+from django.core.management import call_command
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from brand.models import Brand
+from locations.models import Location
+from frequency.models import Frequency
+from counts.models import CountEntry, CountSheet
+from users.models import User, UserRole
+from core import bootstrap, changelog, loaddata, metrics, outbox, renderers
+from core.replica import (
+    PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, execute_wrapper_all, read_from_replica,
+)
+from reports.models import Report
+from core.models import (
+    ChangeAction, ChangeLogEntry, ChangeSequence, IdempotencyRecord, OutboxEvent, OutboxStatus, SlowQuery,
+)
+from inventory.models import InventoryItem
+from core.slow_queries import SlowQueryMiddleware, SlowQueryRecorder, normalize_sql
+from core.query_budget import QueryRecorder, fill_route, iter_api_routes
+from PBIS.urls import api_patterns
+
+
+class BootstrapViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="staff", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("api:bootstrap")
+        Location.objects.create(name="Downtown")
+
+    def test_returns_all_sections(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["user"]["username"], "staff")
+        for section in ("locations", "frequencies", "vendors", "brands"):
+            self.assertIn(section, response.data)
+        self.assertEqual(len(response.data["locations"]), 1)
+
+    def test_since_returns_only_changed_sections(self):
+        token = self.client.get(self.url).data["version"]
+
+        unchanged = self.client.get(self.url, {"since": token})
+        self.assertNotIn("brands", unchanged.data)
+        self.assertEqual(unchanged.data["version"], token)
+
+        Brand.objects.create(name="Acme")
+        changed = self.client.get(self.url, {"since": token})
+        self.assertNotEqual(changed.data["version"], token)
+        self.assertEqual([b["name"] for b in changed.data["brands"]], ["Acme"])
+        self.assertNotIn("locations", changed.data)
+
+    def test_cached_sections_only_read_versions(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_versions_are_shared_through_the_database(self):
+        token = self.client.get(self.url).data["version"]
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, {"since": token}).data["version"], token)
+
+        Location.objects.filter(name="Downtown").update(name="Uptown")
+        bootstrap.bump_version("locations")
+        changed = self.client.get(self.url, {"since": token}).data
+        self.assertEqual([row["name"] for row in changed["locations"]], ["Uptown"])
+
+
+@override_settings(METRICS={"ENABLED": True, "SAMPLE_RATE": 1.0, "DIR": None})
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.store.reset()
+        self.admin = User.objects.create_user(
+            username="admin", password="pass1234", role=UserRole.ADMIN
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_records_per_view_metrics(self):
+        self.client.get(reverse("api:bootstrap"))
+
+        series = metrics.store.snapshot()["api:bootstrap|GET"]
+        self.assertEqual(series["count"], 1)
+        self.assertEqual(series["sampled"], 1)
+        self.assertGreater(series["db_queries"], 0)
+        self.assertGreater(series["response_bytes"], 0)
+        self.assertGreater(series["serializer_time"], 0)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.client.get(reverse("api:bootstrap"))
+        response = self.client.get(reverse("api:metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('pbis_request_duration_seconds_count{view="api:bootstrap",method="GET"} 1', body)
+
+        staff = User.objects.create_user(username="staff", password="pass1234")
+        self.client.force_authenticate(staff)
+        self.assertEqual(self.client.get(reverse("api:metrics")).status_code, 403)
+
+    def test_workers_are_merged_from_metrics_dir(self):
+        exited = subprocess.Popen([sys.executable, "-c", ""])
+        exited.wait()
+        with tempfile.TemporaryDirectory() as directory:
+            other = metrics.MetricsStore()
+            other.observe("api:bootstrap", "GET", 0.02, 10)
+            for pid in (os.getppid(), exited.pid):
+                with open(os.path.join(directory, f"metrics_{pid}.json"), "w") as fh:
+                    json.dump(other.snapshot(), fh)
+            metrics.store.observe("api:bootstrap", "GET", 0.02, 10)
+
+            with override_settings(METRICS={"DIR": directory}):
+                merged = metrics.store.collect()
+                self.assertEqual(os.listdir(directory), [f"metrics_{os.getppid()}.json"])
+                metrics.store.maybe_flush(force=True)
+                metrics.store.discard()
+                self.assertEqual(os.listdir(directory), [f"metrics_{os.getppid()}.json"])
+
+        self.assertEqual(merged["api:bootstrap|GET"]["count"], 2)
+        self.assertEqual(merged["api:bootstrap|GET"]["response_bytes"], 20)
+
+
+@override_settings(SLOW_QUERIES={
+    "ENABLED": True, "THRESHOLD_MS": 0, "EXPLAIN_SAMPLE_RATE": 1.0, "BUFFER_SIZE": 500,
+})
+class SlowQueryCaptureTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="staff", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_normalize_sql_strips_literals(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE a = 'x''y' AND b IN (1, 2, 3) AND c = 4.5"),
+            "SELECT * FROM t WHERE a = ? AND b IN (...) AND c = ?",
+        )
+
+    def test_captures_view_and_plan(self):
+        self.client.get(reverse("api:bootstrap"))
+
+        captured = SlowQuery.objects.filter(view="api:bootstrap")
+        self.assertTrue(captured.exists())
+        self.assertTrue(captured.exclude(plan="").exists())
+        self.assertFalse(SlowQuery.objects.filter(sql__icontains="core_slowquery").exists())
+
+    def test_failed_requests_keep_their_captures(self):
+        def failing_view(request):
+            with transaction.atomic():
+                Location.objects.count()
+                raise RuntimeError
+
+        middleware = SlowQueryMiddleware(failing_view)
+        with self.assertRaises(RuntimeError):
+            middleware(RequestFactory().get("/api/locations/"))
+        self.assertTrue(SlowQuery.objects.filter(sql__icontains="locations_location").exists())
+
+    def test_attributes_query_to_serializer_field(self):
+        class ProbeSerializer(serializers.Serializer):
+            location_count = serializers.SerializerMethodField()
+
+            def get_location_count(self, obj):
+                return Location.objects.count()
+
+        with connection.execute_wrapper(SlowQueryRecorder(threshold_ms=0)):
+            ProbeSerializer({}).data
+
+        fields = set(SlowQuery.objects.values_list("serializer_field", flat=True))
+        self.assertIn("ProbeSerializer.location_count", fields)
+
+
+class LoadDataTests(TestCase):
+    def _generate(self):
+        return loaddata.generate(
+            locations=2, items=6, weeks=1, seed=7, end_date=date(2025, 3, 2)
+        )
+
+    def test_generates_consistent_dataset(self):
+        summary = self._generate()
+
+        self.assertEqual(summary["locations"], 2)
+        self.assertEqual(summary["items"], 12)
+        self.assertEqual(summary["sheets"], CountSheet.objects.count())
+        self.assertEqual(summary["entries"], CountEntry.objects.count())
+        self.assertEqual(
+            Report.count_entries.through.objects.count(),
+            CountEntry.objects.filter(sheet__status="submitted").count(),
+        )
+        owner = User.objects.get(username=summary["admin"])
+        self.assertFalse(owner.has_usable_password())
+        self.assertFalse(owner.is_superuser or owner.is_staff)
+
+    def test_same_seed_produces_same_counts(self):
+        self._generate()
+        first = list(CountEntry.objects.order_by("pk").values_list("on_hand_quantity", flat=True))
+        loaddata.clear()
+        self._generate()
+        second = list(CountEntry.objects.order_by("pk").values_list("on_hand_quantity", flat=True))
+
+        self.assertEqual(first, second)
+
+
+class QueryBudgetTests(TestCase):
+    """Every GET route under api_patterns must not issue more queries on a larger dataset."""
+
+    SMALL = {"locations": 1, "items": 3, "weeks": 1}
+    LARGE = {"locations": 3, "items": 12, "weeks": 2}
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="budget", password="pass1234", role=UserRole.ADMIN
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _latest_pk(self, callback):
+        cls = callback.cls
+        queryset = getattr(cls, "queryset", None)
+        model = queryset.model if queryset is not None else cls.serializer_class.Meta.model
+        return model.objects.order_by("-pk").values_list("pk", flat=True).first()
+
+    def _measure(self):
+        cache.clear()
+        results = {}
+        for template, callback in iter_api_routes(api_patterns):
+            values = {}
+            if "pk" in template:
+                values["pk"] = self._latest_pk(callback)
+            path = fill_route(f"/api/{template}", values)
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder):
+                response = self.client.get(path)
+            results[template] = (path, response.status_code, recorder)
+        return results
+
+    def test_query_counts_do_not_grow_with_result_size(self):
+        loaddata.generate(prefix="Small", end_date=date(2025, 3, 2), **self.SMALL)
+        small = self._measure()
+        loaddata.generate(prefix="Large", end_date=date(2025, 3, 2), **self.LARGE)
+        large = self._measure()
+
+        self.assertIn("reports/", large)
+        for template, (path, status_code, recorder) in large.items():
+            with self.subTest(route=template):
+                self.assertLess(status_code, 500, path)
+                baseline = len(small[template][2])
+                if len(recorder) > baseline:
+                    details = "\n\n".join(
+                        f"{count} x {recorder.describe(sql)}"
+                        for sql, count in recorder.repeated(2).items()
+                    )
+                    self.fail(
+                        f"GET {path} grew from {baseline} to {len(recorder)} queries:\n{details}"
+                    )
+
+    @override_settings(DEBUG=True, QUERY_BUDGET={"MAX_QUERIES": 1, "REPEAT_THRESHOLD": 2})
+    def test_middleware_logs_budget_warnings_in_debug(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        loaddata.generate(prefix="Small", end_date=date(2025, 3, 2), **self.SMALL)
+
+        with self.assertLogs("core.query_budget", level="WARNING") as logs:
+            client.get("/api/locations/")
+
+        self.assertTrue(any("budget 1" in line for line in logs.output))
+
+
+class RendererTests(TestCase):
+    def setUp(self):
+        self.data = {
+            "name": _("Inventory"),
+            "quantity": Decimal("12.50"),
+            "count_date": date(2025, 3, 1),
+            "submitted_at": datetime(2025, 3, 1, 18, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "token": uuid.UUID(int=1),
+            "by_index": {0: ["a", "\u2028"]},
+            "nested": [{"value": Decimal("0.1")}, None, True],
+        }
+
+    def test_fast_renderer_matches_json_renderer(self):
+        expected = JSONRenderer().render(self.data)
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), expected)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), expected)
+
+    def test_indent_falls_back_to_stdlib(self):
+        rendered = renderers.FastJSONRenderer().render(
+            {"a": 1}, accepted_media_type="application/json; indent=2")
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_parser_reads_and_rejects_json(self):
+        parser = renderers.FastJSONParser()
+        self.assertEqual(
+            parser.parse(io.BytesIO(b'{"on_hand": 1.5, "notes": "\xc3\xa9"}')),
+            {"on_hand": 1.5, "notes": "\u00e9"},
+        )
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b"{not json"))
+
+    def test_api_uses_fast_renderer(self):
+        admin = User.objects.create_user(username="render-admin", password="pw", role=UserRole.ADMIN)
+        client = APIClient()
+        client.force_authenticate(admin)
+        Location.objects.create(name="Render Store")
+
+        response = client.post(
+            "/api/locations/create/", data=b'{"name": "Parsed Store"}',
+            content_type="application/json",
+        )
+        self.assertLess(response.status_code, 300, response.content)
+        response = client.get("/api/locations/")
+        self.assertIsInstance(response.accepted_renderer, renderers.FastJSONRenderer)
+        names = {row["name"] for row in json.loads(response.content)["results"]}
+        self.assertTrue({"Render Store", "Parsed Store"} <= names)
+
+    @skipUnless(renderers.msgpack, "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        packed = renderers.MessagePackRenderer().render(self.data)
+        unpacked = renderers.msgpack.unpackb(packed, strict_map_key=False)
+        self.assertEqual(unpacked["quantity"], 12.5)
+        self.assertEqual(unpacked["submitted_at"], "2025-03-01T18:30:15.123456Z")
+        self.assertEqual(unpacked["by_index"], {0: ["a", "\u2028"]})
+
+
+class LeanAPIMiddlewareTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="lean-admin", password="pw", role=UserRole.ADMIN)
+
+    def test_admin_keeps_frame_options_and_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.get("/admin/login/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Frame-Options"], "DENY")
+        self.assertIn("csrftoken", response.cookies)
+
+        response = client.post("/admin/login/", {"username": "lean-admin", "password": "pw"})
+        self.assertEqual(response.status_code, 403)
+
+        token = client.cookies["csrftoken"].value
+        response = client.post(
+            "/admin/login/?next=/admin/",
+            {"username": "lean-admin", "password": "pw", "csrfmiddlewaretoken": token},
+        )
+        self.assertRedirects(response, "/admin/", fetch_redirect_response=False)
+        self.assertIn("sessionid", response.cookies)
+        self.assertEqual(client.get("/admin/").status_code, 200)
+
+    def test_api_skips_browser_middleware(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(
+            "/api/auth/login/", {"username": "lean-admin", "password": "pw"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Frame-Options", response)
+        self.assertNotIn("sessionid", response.cookies)
+        self.assertNotIn("csrftoken", response.cookies)
+
+        response = client.get(
+            "/api/auth/me/", HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["username"], "lean-admin")
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+
+
+@override_settings(DATABASE_READ_REPLICA="replica", DATABASE_REPLICA_PIN_SECONDS=60)
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self._view)
+
+    def _view(self, request):
+        self.read_alias = ReplicaRouter().db_for_read(Location)
+        return HttpResponse(status=400 if request.GET.get("fail") else 200)
+
+    def _route(self, method, path, cookies=None, **extra):
+        request = getattr(self.factory, method)(path, **extra)
+        request.COOKIES.update(cookies or {})
+        self.response = self.middleware(request)
+        return self.read_alias
+
+    def test_router_reads_replica_only_when_marked(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Location), "default")
+        with read_from_replica():
+            self.assertEqual(router.db_for_read(Location), "replica")
+            self.assertEqual(router.db_for_write(Location), "default")
+        with override_settings(DATABASE_READ_REPLICA=None), read_from_replica():
+            self.assertEqual(router.db_for_read(Location), "default")
+
+    def test_safe_api_requests_use_replica(self):
+        self.assertEqual(self._route("get", "/api/reports/"), "replica")
+        self.assertEqual(self._route("post", "/api/reports/", data={"fail": 1}), "default")
+        self.assertEqual(self._route("get", "/admin/"), "default")
+
+    def test_successful_write_pins_client_to_primary(self):
+        self._route("post", "/api/count-sheets/create/?fail=1")
+        self.assertNotIn(PIN_COOKIE, self.response.cookies)
+
+        self._route("post", "/api/count-sheets/create/")
+        pin = {PIN_COOKIE: self.response.cookies[PIN_COOKIE].value}
+        self.assertEqual(self.response.cookies[PIN_COOKIE]["max-age"], 60)
+        self.assertEqual(self._route("get", "/api/count-sheets/", cookies=pin), "default")
+        self.assertEqual(self._route("get", "/api/count-sheets/"), "replica")
+        self.assertEqual(self._route("get", "/api/count-sheets/", cookies={PIN_COOKIE: "1"}), "replica")
+
+        with mock.patch("django.core.signing.time.time", return_value=time.time() + 61):
+            self.assertEqual(self._route("get", "/api/count-sheets/", cookies=pin), "replica")
+
+    def test_execute_wrappers_cover_every_connection(self):
+        wrapper = object()
+        fakes = {"default": mock.MagicMock(), "replica": mock.MagicMock()}
+        with mock.patch("core.replica.connections", fakes), execute_wrapper_all(wrapper):
+            pass
+        for fake in fakes.values():
+            fake.execute_wrapper.assert_called_once_with(wrapper)
+
+    def test_disabled_without_replica(self):
+        with override_settings(DATABASE_READ_REPLICA=None):
+            with self.assertRaises(MiddlewareNotUsed):
+                ReplicaRoutingMiddleware(self._view)
+
+
+REPLICA = getattr(settings, "DATABASE_READ_REPLICA", None)
+
+
+@skipUnless(REPLICA, "DATABASE_REPLICA_URL is not set")
+class ReplicaDatabaseTests(TestCase):
+    """Run with a second local database, e.g.
+    DATABASE_REPLICA_URL=sqlite:////tmp/replica.db python manage.py test core.tests.ReplicaDatabaseTests
+    The test replica is a separate database, so rows written to the primary
+    only show up in replica reads if routing is wrong."""
+
+    databases = {"default", REPLICA} if REPLICA else {"default"}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username="replica-admin", password="pw", role=UserRole.ADMIN)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.admin)}")
+        Location.objects.create(name="Primary Store")
+        Location.objects.using("replica").create(name="Replica Store")
+
+    def _names(self):
+        response = self.client.get("/api/locations/")
+        self.assertEqual(response.status_code, 200)
+        return {row["name"] for row in response.json()["results"]}
+
+    def test_reads_replica_until_client_writes(self):
+        self.assertEqual(self._names(), {"Replica Store"})
+
+        response = self.client.post("/api/locations/create/", {"name": "New Store"}, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self._names(), {"Primary Store", "New Store"})
+        self.assertFalse(Location.objects.using("replica").filter(name="New Store").exists())
+
+
+@override_settings(IDEMPOTENCY={"LOCK_TIMEOUT": 0.3})
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="retrier", password="pw")
+        self.location = Location.objects.create(name="Retry Store")
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def _create_sheet(self, key=None, **payload):
+        extra = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post("/api/count-sheets/create/", {
+            "location": self.location.pk, "frequency": self.frequency.pk, **payload,
+        }, format="json", **extra)
+
+    def test_retry_replays_first_response(self):
+        first = self._create_sheet("abc")
+        second = self._create_sheet("abc")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(CountSheet.objects.count(), 1)
+
+        self._create_sheet()
+        self._create_sheet()
+        self.assertEqual(CountSheet.objects.count(), 3)
+
+    def test_key_reuse_with_different_request_is_rejected(self):
+        self._create_sheet("abc")
+        response = self._create_sheet("abc", notes="different")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CountSheet.objects.count(), 1)
+
+    def test_keys_are_scoped_per_user(self):
+        self._create_sheet("abc")
+        other = User.objects.create_user(username="other", password="pw")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other)}")
+        self.assertNotIn("Idempotent-Replayed", self._create_sheet("abc"))
+        self.assertEqual(CountSheet.objects.count(), 2)
+
+    def test_concurrent_duplicate_waits_for_first_request(self):
+        self._create_sheet("abc")
+        record = IdempotencyRecord.objects.get()
+        stored = (record.status_code, record.body)
+        IdempotencyRecord.objects.update(status_code=None, body=None)
+
+        def finish_elsewhere(seconds):
+            IdempotencyRecord.objects.update(status_code=stored[0], body=stored[1])
+
+        with mock.patch("core.idempotency.time.sleep", side_effect=finish_elsewhere) as sleep:
+            response = self._create_sheet("abc")
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+
+        IdempotencyRecord.objects.update(status_code=None, body=None)
+        response = self._create_sheet("abc")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(CountSheet.objects.count(), 1)
+
+    def test_errors_release_the_key(self):
+        with mock.patch("counts.views.CountSheetViewSet.create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError), self.assertLogs("django.request", "ERROR"):
+                self._create_sheet("abc")
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        self.assertEqual(self._create_sheet("abc").status_code, 201)
+
+
+class ChangeLogTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username="feed", password="pw", role=UserRole.ADMIN)
+        self.location = Location.objects.create(name="Feed Store")
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _changes(self, **params):
+        response = self.client.get(reverse("api:changes"), params)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_writes_get_consecutive_sequence_numbers(self):
+        sheet = CountSheet.objects.create(location=self.location, frequency=self.frequency, count_date=date(2024, 1, 1))
+        sheet.notes = "edited"
+        sheet.save()
+        sheet.delete()
+
+        rows = list(ChangeLogEntry.objects.values_list("seq", "model", "action"))
+        self.assertEqual([seq for seq, _, _ in rows], list(range(1, len(rows) + 1)))
+        self.assertEqual(
+            [(model, action) for _, model, action in rows],
+            [("counts.countsheet", ChangeAction.CREATE),
+             ("counts.countsheet", ChangeAction.UPDATE),
+             ("counts.countsheet", ChangeAction.DELETE)],
+        )
+        self.assertEqual(ChangeSequence.objects.get(name="changes").value, 3)
+
+    def test_batch_allocates_once_and_rolls_back_with_the_transaction(self):
+        with self.assertRaises(RuntimeError), transaction.atomic(), changelog.batch():
+            CountSheet.objects.create(location=self.location, frequency=self.frequency)
+            raise RuntimeError
+        self.assertFalse(ChangeLogEntry.objects.exists())
+
+        with transaction.atomic(), changelog.batch():
+            for day in (1, 2, 3):
+                CountSheet.objects.create(
+                    location=self.location, frequency=self.frequency, count_date=date(2024, 1, day))
+            self.assertFalse(ChangeLogEntry.objects.exists())
+        self.assertEqual(list(ChangeLogEntry.objects.values_list("seq", flat=True)), [1, 2, 3])
+
+    def test_api_writes_roll_back_when_the_change_cannot_be_logged(self):
+        sheet = CountSheet.objects.create(location=self.location, frequency=self.frequency)
+        entry = CountEntry.objects.create(
+            sheet=sheet, item=InventoryItem.objects.create(name="Feed Item"), notes="before")
+        with mock.patch.object(ChangeLogEntry.objects, "append", side_effect=RuntimeError), \
+                self.assertLogs("django.request", "ERROR"):
+            with self.assertRaises(RuntimeError):
+                self.client.patch(
+                    reverse("api:countentry-update", args=[entry.pk]), {"notes": "after"}, format="json")
+            with self.assertRaises(RuntimeError):
+                self.client.delete(reverse("api:countentry-delete", args=[entry.pk]))
+        entry.refresh_from_db()
+        self.assertEqual(entry.notes, "before")
+
+    def test_feed_streams_entries_after_a_sequence_number(self):
+        for day in range(1, 6):
+            CountSheet.objects.create(location=self.location, frequency=self.frequency, count_date=date(2024, 1, day))
+
+        rows = self._changes(after=2, limit=2)
+        self.assertEqual([row["seq"] for row in rows], [3, 4])
+        self.assertEqual(rows[0]["data"]["count_date"], "2024-01-03")
+        self.assertEqual([row["seq"] for row in self._changes(after=4)], [5])
+        self.assertEqual(self.client.get(reverse("api:changes"), {"limit": "x"}).status_code, 400)
+
+        self.client.force_authenticate(User.objects.create_user(username="staffer", password="pw"))
+        self.assertEqual(self.client.get(reverse("api:changes")).status_code, 403)
+
+    def test_bulk_item_updates_are_logged(self):
+        items = [InventoryItem.objects.create(name=f"Feed {i}", display_order=i) for i in range(2)]
+        start = ChangeLogEntry.objects.count()
+        response = self.client.post(
+            reverse("api:inventoryitem-bulk-update"),
+            [{"id": item.pk, "display_order": 9} for item in items], format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        logged = ChangeLogEntry.objects.filter(seq__gt=start)
+        self.assertEqual(
+            sorted(logged.values_list("object_id", flat=True)), sorted(str(item.pk) for item in items))
+        self.assertTrue(all(entry.data["display_order"] == 9 for entry in logged))
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="sender", password="pw", role=UserRole.ADMIN)
+        self.location = Location.objects.create(name="Outbox Store")
+        self.frequency = Frequency.objects.create(frequency_name="Weekly")
+        self.item = InventoryItem.objects.create(name="Outbox Item", par_level=Decimal("10"))
+        self.sheet = CountSheet.objects.create(location=self.location, frequency=self.frequency)
+        CountEntry.objects.create(sheet=self.sheet, item=self.item, on_hand_quantity=Decimal("4"))
+        OutboxEvent.objects.all().delete()
+        self.config = {**outbox.outbox_settings(), "BATCH_SIZE": 2, "MAX_ATTEMPTS": 2, "BACKOFF": 10}
+
+    def test_submit_queues_event_in_its_transaction(self):
+        with mock.patch("core.outbox.publish_sheets_submitted", side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            self.sheet.submit(self.user)
+        self.sheet.refresh_from_db()
+        self.assertEqual(self.sheet.status, "draft")
+
+        self.sheet.submit(self.user)
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.topic, outbox.SHEET_SUBMITTED)
+        self.assertEqual(event.payload["sheet_id"], self.sheet.pk)
+        self.assertEqual(event.payload["entries"][0]["item_id"], self.item.pk)
+        self.assertEqual(event.payload["entries"][0]["on_hand_quantity"], "4.00")
+
+    def test_item_changes_queue_events(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.post(reverse("api:inventoryitem-bulk-update"), [{"id": self.item.pk, "display_order": 3}],
+                    format="json")
+        client.patch(reverse("api:inventoryitem-update", args=[self.item.pk]), {"notes": "moved"},
+                     format="json")
+        self.assertEqual(
+            list(OutboxEvent.objects.order_by("pk").values_list("topic", "payload__item__id")),
+            [(outbox.ITEM_CHANGED, self.item.pk)] * 2,
+        )
+
+    def test_dispatch_delivers_in_batches(self):
+        for n in range(3):
+            outbox.publish("test.event", {"n": n})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "events.ndjson")
+            sink = outbox.FileSink(path)
+            self.assertEqual(outbox.dispatch_batch(sink, self.config), (2, 0))
+            self.assertEqual(outbox.dispatch_batch(sink, self.config), (1, 0))
+            self.assertEqual(outbox.dispatch_batch(sink, self.config), (0, 0))
+            with open(path) as handle:
+                self.assertEqual([json.loads(line)["payload"]["n"] for line in handle], [0, 1, 2])
+        self.assertFalse(OutboxEvent.objects.exclude(status=OutboxStatus.DELIVERED).exists())
+
+    def test_failed_delivery_backs_off_then_gives_up(self):
+        event = outbox.publish("test.event", {})
+        sink = mock.Mock()
+        sink.send.side_effect = OSError("connection refused")
+
+        with self.assertLogs("core.outbox", "WARNING"):
+            self.assertEqual(outbox.dispatch_batch(sink, self.config), (0, 1))
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts, event.last_error),
+                         (OutboxStatus.PENDING, 1, "connection refused"))
+        self.assertGreater(event.available_at, event.created_at)
+        self.assertEqual(outbox.dispatch_batch(sink, self.config), (0, 0))
+
+        OutboxEvent.objects.update(available_at=event.created_at)
+        with self.assertLogs("core.outbox", "WARNING"):
+            outbox.dispatch_batch(sink, self.config)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), (OutboxStatus.FAILED, 2))
+
+        out = io.StringIO()
+        call_command("dispatch_outbox", "--once", "--retry-failed", stdout=out, stderr=io.StringIO())
+        self.assertEqual(json.loads(out.getvalue())["id"], event.pk)
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxStatus.DELIVERED)
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import BootstrapView, ChangesView, MetricsView
+
+urlpatterns = [
+    path("bootstrap/", BootstrapView.as_view(), name="bootstrap"),
+    path("changes/", ChangesView.as_view(), name="changes"),
+    path("_metrics", MetricsView.as_view(), name="metrics"),
+]
@@ -0,0 +1,78 @@
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from users.serializers import UserSerializer
+from users.permissions import IsAdmin
+from . import bootstrap, metrics
+from .models import ChangeLogEntry
+from .renderers import FastJSONRenderer
+
+CHANGES_DEFAULT_LIMIT = 1000
+CHANGES_MAX_LIMIT = 10000
+
+
+class BootstrapView(APIView):
+    """All reference lists and the current user in one payload.
+
+    Pass ``?since=<version>`` to receive only the sections that changed.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        versions = bootstrap.get_versions()
+        known = bootstrap.parse_token(request.query_params.get("since")) or {}
+
+        data = {
+            "version": bootstrap.make_token(versions),
+            "user": UserSerializer(request.user, context={'request': request}).data,
+            "unchanged": [],
+        }
+        for section, version in versions.items():
+            if known.get(section) == version:
+                data["unchanged"].append(section)
+            else:
+                data[section] = bootstrap.get_section(section, version)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """Request metrics of all workers in Prometheus text format."""
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            metrics.render_prometheus(metrics.store.collect()),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
+class ChangesView(APIView):
+    """Change log entries after ``?after=<seq>`` as newline-delimited JSON.
+
+    Consumers resume from the last ``seq`` they processed; sequence numbers are
+    gapless and appear in commit order, so no change is ever skipped.
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            after = int(request.query_params.get("after", 0))
+            limit = int(request.query_params.get("limit", CHANGES_DEFAULT_LIMIT))
+        except ValueError:
+            return JsonResponse({"error": "after and limit must be integers."}, status=400)
+        if after < 0 or not 1 <= limit <= CHANGES_MAX_LIMIT:
+            return JsonResponse(
+                {"error": f"after must be >= 0 and limit between 1 and {CHANGES_MAX_LIMIT}."},
+                status=400,
+            )
+
+        rows = (
+            ChangeLogEntry.objects.filter(seq__gt=after)
+            .order_by("seq")
+            .values("seq", "model", "object_id", "action", "changed_at", "data")[:limit]
+        )
+        renderer = FastJSONRenderer()
+        lines = (renderer.render(row) + b"\n" for row in rows.iterator(chunk_size=500))
+        return StreamingHttpResponse(lines, content_type="application/x-ndjson")
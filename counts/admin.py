@@ -1,5 +1,5 @@
 from django.contrib import admin
-from counts.models import CountEntry
+from counts.models import CountEntry, SheetArchive, StockSnapshot, SyncOperation
 from django.utils.html import format_html
 
 @admin.register(CountEntry)
@@ -20,7 +20,7 @@ class CountEntryAdmin(admin.ModelAdmin):
     list_filter = (
         "highlight_state",
         ("sheet__status", admin.ChoicesFieldListFilter),
-        ("sheet__count_date", admin.DateFieldListFilter),
+        ("count_date", admin.DateFieldListFilter),
     )
 
     search_fields = (
@@ -125,3 +125,101 @@ class CountEntryAdmin(admin.ModelAdmin):
     def sheet_updated_by(self, obj):
         return obj.sheet.updated_by if obj.sheet else "-"
     sheet_updated_by.short_description = "Updated By"
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "location",
+        "item",
+        "on_hand_quantity",
+        "calculated_order_units",
+        "highlight_state",
+        "count_date",
+        "updated_at",
+    )
+
+    list_filter = (
+        "highlight_state",
+        "location",
+        ("count_date", admin.DateFieldListFilter),
+    )
+
+    search_fields = (
+        "item__name",
+        "location__name",
+    )
+
+    list_select_related = ("location", "item")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SheetArchive)
+class SheetArchiveAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "sheet",
+        "entry_count",
+        "payload_size",
+        "archived_at",
+    )
+
+    list_filter = (
+        ("archived_at", admin.DateFieldListFilter),
+    )
+
+    search_fields = (
+        "sheet__location__name",
+    )
+
+    exclude = ("payload",)
+    list_select_related = ("sheet", "sheet__location")
+
+    @admin.display(description="Compressed size (bytes)")
+    def payload_size(self, obj):
+        return len(obj.payload)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SyncOperation)
+class SyncOperationAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "device_id",
+        "op_id",
+        "sheet",
+        "entry",
+        "status",
+        "created_at",
+    )
+
+    list_filter = (
+        "status",
+        ("created_at", admin.DateFieldListFilter),
+    )
+
+    search_fields = (
+        "device_id",
+        "op_id",
+    )
+
+    list_select_related = (
+        "sheet__location", "entry__sheet__location", "entry__item",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,41 @@
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+from counts.models import SheetArchive
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive submitted sheets older than the retention window: their entries are "
+        "moved into one compressed SheetArchive row per sheet and the sheet is marked archived."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SHEET_ARCHIVE_RETENTION_DAYS,
+            help='Archive sheets counted more than this many days ago'
+        )
+        parser.add_argument('--limit', type=int, help='Archive at most this many sheets')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError("--days must be positive")
+        cutoff = timezone.localdate() - timedelta(days=options['days'])
+        sheets = SheetArchive.objects.archivable(cutoff).order_by('count_date', 'pk')
+        if options['limit']:
+            sheets = sheets[:options['limit']]
+
+        if options['dry_run']:
+            self.stdout.write(f"{sheets.count()} sheets counted before {cutoff} would be archived")
+            return
+
+        archived = entries = 0
+        for sheet in sheets.iterator():
+            archive = SheetArchive.objects.archive_sheet(sheet)
+            if archive is not None:
+                archived += 1
+                entries += archive.entry_count
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} sheets ({entries} entries) counted before {cutoff}"))
@@ -0,0 +1,124 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.core.management.base import BaseCommand, CommandError
+from core import changelog
+from core.models import ChangeAction
+from counts.models import CountEntry, CountSheet
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain count entry history: backfill the denormalized count_date, recount sheet "
+        "progress counters, soft-delete duplicate live entries, purge soft-deleted entries "
+        "older than a date and print live/deleted rows per month."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true',
+                            help='Copy count_date from the sheet onto entries missing it')
+        parser.add_argument('--dedupe', action='store_true',
+                            help='Soft-delete all but the newest live entry per (sheet, item); '
+                                 'required before the live (sheet, item) unique constraint is added')
+        parser.add_argument('--purge-deleted-before', metavar='YYYY-MM-DD',
+                            help='Permanently delete soft-deleted entries counted before this date')
+        parser.add_argument('--recount-sheets', action='store_true',
+                            help='Recompute every sheet\'s progress counters from its live entries')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        if options['backfill']:
+            total = self.backfill(batch_size)
+            self.stdout.write(f"Backfilled count_date on {total} entries")
+
+        if options['dedupe']:
+            total = self.dedupe(batch_size)
+            self.stdout.write(f"Soft-deleted {total} duplicate entries")
+
+        if options['purge_deleted_before']:
+            try:
+                cutoff = parse_date(options['purge_deleted_before'])
+            except ValueError:
+                cutoff = None
+            if cutoff is None:
+                raise CommandError("--purge-deleted-before must be a YYYY-MM-DD date")
+            total = self.purge_deleted(cutoff, batch_size)
+            self.stdout.write(f"Purged {total} soft-deleted entries counted before {cutoff}")
+
+        if options['recount_sheets']:
+            total = self.recount_sheets(batch_size)
+            self.stdout.write(f"Recounted {total} sheets")
+
+        rows = (
+            CountEntry.objects.filter(count_date__isnull=False)
+            .annotate(month=TruncMonth('count_date'))
+            .values('month')
+            .annotate(
+                live=Count('pk', filter=Q(deleted_at__isnull=True)),
+                deleted=Count('pk', filter=Q(deleted_at__isnull=False)),
+            )
+            .order_by('month')
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['month']:%Y-%m}  live {row['live']:>9}  deleted {row['deleted']:>9}")
+        missing = CountEntry.objects.filter(count_date__isnull=True).count()
+        if missing:
+            self.stdout.write(self.style.WARNING(
+                f"{missing} entries have no count_date; run with --backfill"))
+
+    def backfill(self, batch_size):
+        sheet_date = CountSheet.objects.filter(pk=OuterRef('sheet_id')).values('count_date')[:1]
+        total = 0
+        while True:
+            ids = list(
+                CountEntry.objects.filter(count_date__isnull=True)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            total += CountEntry.objects.filter(pk__in=ids).update(count_date=Subquery(sheet_date))
+
+    def recount_sheets(self, batch_size):
+        total, last = 0, 0
+        while True:
+            ids = list(
+                CountSheet.objects.filter(pk__gt=last).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            total += CountSheet.objects.filter(pk__in=ids).refresh_counters()
+            last = ids[-1]
+
+    def dedupe(self, batch_size):
+        total = 0
+        while True:
+            ids = list(CountEntry.objects.live_duplicates().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return total
+            with transaction.atomic(), changelog.batch():
+                duplicates = CountEntry.objects.filter(pk__in=ids)
+                duplicates.update(deleted_at=timezone.now())
+                changelog.record(duplicates, ChangeAction.UPDATE)
+                CountSheet.objects.filter(entries__in=ids).distinct().refresh_counters()
+            total += len(ids)
+
+    def purge_deleted(self, cutoff, batch_size):
+        total = 0
+        while True:
+            ids = list(
+                CountEntry.objects.filter(deleted_at__isnull=False, count_date__lt=cutoff)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            with transaction.atomic(), changelog.batch():
+                CountEntry.objects.filter(pk__in=ids).delete()
+            total += len(ids)
@@ -0,0 +1,54 @@
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.core.management.base import BaseCommand, CommandError
+from counts import status as count_status
+from counts.models import CountEntry, CountSheet
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the count sheets, with their entries, that Frequency cadences make due "
+        "between --date and --days-ahead days later. Sheets that already exist are "
+        "skipped, so it is safe to run from cron as often as needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', metavar='YYYY-MM-DD', help='First count date (default: today)')
+        parser.add_argument('--days-ahead', type=int, default=1,
+                            help='Also generate sheets for this many following days')
+        parser.add_argument('--copy-forward', action='store_true',
+                            help='Seed entries from the previous submitted sheet')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        start = timezone.localdate()
+        if options['date']:
+            try:
+                start = parse_date(options['date'])
+            except ValueError:
+                start = None
+            if start is None:
+                raise CommandError("--date must be a YYYY-MM-DD date")
+        if options['days_ahead'] < 0:
+            raise CommandError("--days-ahead cannot be negative")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+        end = start + timedelta(days=options['days_ahead'])
+
+        with transaction.atomic():
+            sheets = CountSheet.objects.generate_due(
+                start, end, copy_forward=options['copy_forward'], batch_size=options['batch_size'])
+            entries = CountEntry.objects.filter(sheet__in=sheets).count()
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        if options['dry_run']:
+            self.stdout.write(f"{len(sheets)} sheets ({entries} entries) due {start}..{end} would be created")
+            return
+        # bulk_create skips the signals that normally refresh the status feed.
+        count_status.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(sheets)} sheets ({entries} entries) due {start}..{end}"))
@@ -1,10 +1,15 @@
 from __future__ import annotations
-from django.db import models
+import json
+import zlib
+from django.db import connections, models, router, transaction
 from datetime import timedelta
 from django.conf import settings
 from dataclasses import dataclass
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from reports.models import Report
+from core import changelog, outbox
+from core.models import ChangeAction
 from django.core.exceptions import ValidationError
 from decimal import Decimal, ROUND_CEILING
 from django.utils.translation import gettext_lazy as _
@@ -20,6 +25,210 @@ class OrderCalculation:
     order_units: Decimal
     highlight_state: str
 
+@dataclass(frozen=True)
+class OrderParameters:
+    par_level: Decimal
+    order_point: Decimal
+    pack_size: Decimal
+
+# Progress counters on CountSheet, kept in step with its live entries.
+SHEET_COUNTER_FIELDS = (
+    "entry_count", "counted_count", "red_count", "yellow_count", "green_count", "total_order_units",
+)
+
+
+class CountSheetQuerySet(models.QuerySet):
+    def add_to_counters(self, delta):
+        """Apply ``{counter: change}`` with atomic F() increments."""
+        changes = {name: models.F(name) + value for name, value in delta.items() if value}
+        return self.update(**changes) if changes else 0
+
+    def refresh_counters(self):
+        """Recompute the counters of these sheets from their live entries in one UPDATE.
+
+        Used after bulk writes that bypass CountEntry.save.
+        """
+        live = CountEntry.objects.filter(
+            sheet=models.OuterRef("pk"), deleted_at__isnull=True).order_by().values("sheet")
+
+        def total(aggregate, output_field=models.IntegerField()):
+            return Coalesce(
+                models.Subquery(live.annotate(value=aggregate).values("value")),
+                models.Value(0), output_field=output_field)
+
+        def highlighted(state):
+            return total(models.Count("pk", filter=models.Q(highlight_state=state)))
+
+        return self.update(
+            entry_count=total(models.Count("pk")),
+            counted_count=total(models.Count("pk", filter=models.Q(counted_at__isnull=False))),
+            red_count=highlighted(CountEntry.HIGHLIGHT_RED),
+            yellow_count=highlighted(CountEntry.HIGHLIGHT_YELLOW),
+            green_count=highlighted(CountEntry.HIGHLIGHT_GREEN),
+            total_order_units=total(
+                models.Sum("calculated_order_units"),
+                models.DecimalField(max_digits=12, decimal_places=2)),
+        )
+
+    def submit_batch(self, sheet_ids, user) -> list:
+        """Submit the draft sheets ``sheet_ids`` together in one transaction.
+
+        Locks the sheets, then validates all of them before writing anything:
+        a ValidationError keyed by sheet id is raised if any is missing or not
+        a draft. Stock snapshots, reports, report links, change log rows and
+        outbox events are written in bulk for the whole batch. Returns
+        ``(sheet, report)`` pairs in the order of ``sheet_ids``.
+        """
+        from . import status as count_status
+
+        sheet_ids = list(dict.fromkeys(sheet_ids))
+        with transaction.atomic(), changelog.batch():
+            found = self.select_for_update().in_bulk(sheet_ids)
+            errors = {}
+            for pk in sheet_ids:
+                if pk not in found:
+                    errors[str(pk)] = _("Sheet not found.")
+                elif found[pk].status != CountSheetStatus.DRAFT:
+                    errors[str(pk)] = _("Only draft sheets can be submitted.")
+            if errors:
+                raise ValidationError(errors)
+            sheets = [found[pk] for pk in sheet_ids]
+
+            now = timezone.now()
+            self.filter(pk__in=sheet_ids).update(
+                status=CountSheetStatus.SUBMITTED, submitted_by=user, submitted_at=now)
+            for sheet in sheets:
+                sheet.status, sheet.submitted_by, sheet.submitted_at = CountSheetStatus.SUBMITTED, user, now
+            changelog.record(sheets, ChangeAction.UPDATE)
+            StockSnapshot.objects.refresh_from_sheets(sheets)
+
+            keys = {(sheet.location_id, sheet.frequency_id, sheet.count_date) for sheet in sheets}
+            reports = {}
+            for report in Report.objects.filter(
+                location_id__in={key[0] for key in keys},
+                frequency_id__in={key[1] for key in keys},
+                period_start__in={key[2] for key in keys},
+            ).order_by("pk"):
+                reports.setdefault((report.location_id, report.frequency_id, report.period_start), report)
+            existing = [reports[key] for key in keys if key in reports]
+            created = Report.objects.bulk_create([
+                Report(location_id=location_id, frequency_id=frequency_id, period_start=period_start,
+                       is_active=True)
+                for location_id, frequency_id, period_start in keys - set(reports)
+            ])
+            for report in created:
+                reports[(report.location_id, report.frequency_id, report.period_start)] = report
+            if existing:
+                Report.objects.filter(pk__in=[report.pk for report in existing]).update(updated_at=now)
+                for report in existing:
+                    report.updated_at = now
+
+            report_for_sheet = {
+                sheet.pk: reports[(sheet.location_id, sheet.frequency_id, sheet.count_date)]
+                for sheet in sheets
+            }
+            Link = Report.count_entries.through
+            Link.objects.bulk_create([
+                Link(report_id=report_for_sheet[sheet_id].pk, countentry_id=entry_id)
+                for entry_id, sheet_id in CountEntry.objects.filter(
+                    sheet_id__in=sheet_ids).values_list("pk", "sheet_id")
+            ], ignore_conflicts=True)
+            changelog.record(created, ChangeAction.CREATE)
+            changelog.record(existing, ChangeAction.UPDATE)
+
+            submitted = [(sheet, report_for_sheet[sheet.pk]) for sheet in sheets]
+            outbox.publish_sheets_submitted(submitted)
+            count_status.invalidate()
+        return submitted
+
+    def generate_due(self, start, end, user=None, copy_forward=False, batch_size=2000) -> list:
+        """Create the missing sheets, with entries, for every scheduled count in [start, end].
+
+        A sheet is due for each (active location, scheduled frequency) pair that
+        has active items, on each day the frequency's cadence falls on. Sheets
+        that already exist for a pair and day are left alone, so repeated runs
+        only fill gaps. New sheets get one uncounted entry per active item,
+        seeded from the previous submitted sheet when ``copy_forward`` is set.
+        Returns the created sheets.
+        """
+        from frequency.models import Frequency
+        from inventory.models import EffectiveItemParameter, InventoryItem, InventoryItemVersion
+
+        with transaction.atomic(), changelog.batch():
+            # Locking the schedules makes concurrent runs wait for each other.
+            frequencies = list(Frequency.objects.scheduled().select_for_update().order_by("pk"))
+            days = [start + timedelta(days=n) for n in range((end - start).days + 1)]
+            items_by_list = {}
+            for item in InventoryItem.objects.active().filter(
+                location__is_active=True, frequency__in=frequencies
+            ).order_by("display_order", "pk"):
+                items_by_list.setdefault((item.location_id, item.frequency_id), []).append(item)
+
+            existing = set(self.filter(
+                frequency__in=frequencies, count_date__range=(start, end)
+            ).values_list("location_id", "frequency_id", "count_date"))
+            sheets = [
+                self.model(location_id=location_id, frequency=frequency, count_date=day,
+                           created_by=user, updated_by=user)
+                for day in days
+                for frequency in frequencies if frequency.is_due_on(day)
+                for location_id, frequency_id in items_by_list
+                if frequency_id == frequency.pk and (location_id, frequency.pk, day) not in existing
+            ]
+            if not sheets:
+                return []
+            self.bulk_create(sheets, batch_size=batch_size)
+            changelog.record(sheets, ChangeAction.CREATE)
+
+            seeded = set()
+            if copy_forward:
+                for sheet in sheets:
+                    CountEntry.objects.copy_forward(sheet, user=user)
+                seeded = set(CountEntry.objects.filter(
+                    sheet__in=sheets, deleted_at__isnull=True).values_list("sheet_id", "item_id"))
+
+            item_ids = {item.pk for items in items_by_list.values() for item in items}
+            effective = {
+                (location_id, item_id): values
+                for location_id, item_id, *values in EffectiveItemParameter.objects.filter(
+                    item_id__in=item_ids).values_list(
+                    "location_id", "item_id", "par_level", "order_point", "pack_size")
+            }
+            versions = {v.item_id: v for v in InventoryItemVersion.objects.current().filter(
+                item_id__in=item_ids)}
+            missing = item_ids - set(versions)
+            if missing:
+                versions.update(InventoryItemVersion.objects.record(missing))
+
+            pending = []
+
+            def flush():
+                CountEntry.objects.bulk_create(pending, batch_size=batch_size)
+                changelog.record(pending, ChangeAction.CREATE)
+                pending.clear()
+
+            for sheet in sheets:
+                for item in items_by_list[(sheet.location_id, sheet.frequency_id)]:
+                    if (sheet.pk, item.pk) in seeded:
+                        continue
+                    entry = CountEntry(
+                        sheet=sheet, item=item, item_version=versions.get(item.pk),
+                        count_date=sheet.count_date, created_by=user, updated_by=user,
+                    )
+                    entry.effective_par_level, entry.effective_order_point, entry.effective_pack_size = (
+                        effective.get((sheet.location_id, item.pk), (None, None, None)))
+                    calc = entry.perform_calculation()
+                    entry.calculated_qty_to_order = calc.qty_to_order
+                    entry.calculated_order_units = calc.order_units
+                    entry.highlight_state = calc.highlight_state
+                    pending.append(entry)
+                if len(pending) >= batch_size:
+                    flush()
+            flush()
+            self.filter(pk__in=[sheet.pk for sheet in sheets]).refresh_counters()
+        return sheets
+
+
 class CountSheet(models.Model):
     location = models.ForeignKey(
         'locations.Location',
@@ -52,31 +261,323 @@ class CountSheet(models.Model):
     notes = models.TextField(blank=True, null=True,
                              help_text=_("Optional notes"))
 
+    entry_count = models.PositiveIntegerField(default=0, editable=False)
+    counted_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text=_("Live entries with a quantity entered by a counter"))
+    red_count = models.PositiveIntegerField(default=0, editable=False)
+    yellow_count = models.PositiveIntegerField(default=0, editable=False)
+    green_count = models.PositiveIntegerField(default=0, editable=False)
+    total_order_units = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0, editable=False)
+
+    objects = CountSheetQuerySet.as_manager()
+
     class Meta:
         ordering = ["-count_date"]
         verbose_name = _("Count Sheet")
         verbose_name_plural = _("Count Sheets")
+        indexes = [
+            models.Index(fields=["location", "frequency", "-count_date"], name="countsheet_latest_idx"),
+        ]
 
     def __str__(self):
         return f"{self.location} - {self.count_date} ({self.get_status_display()})"
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not adding and kwargs.get("update_fields") is None:
+            # Counters move with F() increments; never write back a stale copy.
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in SHEET_COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if not adding and (update_fields is None or "count_date" in update_fields):
+            stale = list(self.entries.exclude(count_date=self.count_date).values_list("pk", flat=True))
+            if stale:
+                entries = CountEntry.objects.filter(pk__in=stale)
+                entries.update(count_date=self.count_date)
+                changelog.record(entries, ChangeAction.UPDATE)
+
     def submit(self, user):
         if self.status != CountSheetStatus.DRAFT:
             raise ValidationError(_("Only draft sheets can be submitted."))
-        self.status = CountSheetStatus.SUBMITTED
-        self.submitted_by = user
-        self.submitted_at = timezone.now()
-        self.save(update_fields=['status', 'submitted_by', 'submitted_at'])
-
-        report, created = Report.objects.get_or_create(
-            location=self.location,
-            frequency=self.frequency,
-            period_start=self.count_date,
-            defaults={'is_active': True}
+        [(sheet, report)] = CountSheet.objects.submit_batch([self.pk], user)
+        self.status, self.submitted_by, self.submitted_at = sheet.status, user, sheet.submitted_at
+        return report
+
+
+
+SYNC_TOKEN_OVERLAP = timedelta(seconds=5)
+
+
+class CountEntryQuerySet(models.QuerySet):
+    def with_effective_parameters(self):
+        """Join the sheet location's effective item parameters onto each entry."""
+        return self.annotate(
+            effective=models.FilteredRelation(
+                "item__effective_parameters",
+                condition=models.Q(
+                    item__effective_parameters__location=models.F("sheet__location")),
+            ),
+            effective_par_level=models.F("effective__par_level"),
+            effective_order_point=models.F("effective__order_point"),
+            effective_pack_size=models.F("effective__pack_size"),
         )
-        report.count_entries.add(*self.entries.all())
-        report.save()
 
+    def changed_since(self, since):
+        """Entries created, edited or soft-deleted after ``since`` (a datetime).
+
+        Reaches back SYNC_TOKEN_OVERLAP so rows committed by transactions that
+        were still open when the token was issued are not missed.
+        """
+        if since is None:
+            return self
+        since = since - SYNC_TOKEN_OVERLAP
+        return self.filter(models.Q(updated_at__gt=since) | models.Q(deleted_at__gt=since))
+
+    def counted_between(self, start=None, end=None):
+        """Live entries whose sheet count date falls within [start, end].
+
+        Filters on the denormalized count_date so the partial date index
+        is used instead of joining and scanning every sheet.
+        """
+        qs = self.filter(deleted_at__isnull=True)
+        if start is not None:
+            qs = qs.filter(count_date__gte=start)
+        if end is not None:
+            qs = qs.filter(count_date__lte=end)
+        return qs
+
+    def delete(self):
+        sheet_ids = set(self.values_list("sheet_id", flat=True).distinct())
+        result = super().delete()
+        CountSheet.objects.filter(pk__in=sheet_ids).refresh_counters()
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def live_duplicates(self):
+        """Live entries shadowed by a newer live entry for the same (sheet, item)."""
+        newer = self.model.objects.filter(
+            sheet=models.OuterRef("sheet"), item=models.OuterRef("item"),
+            deleted_at__isnull=True, pk__gt=models.OuterRef("pk"))
+        return self.filter(deleted_at__isnull=True).filter(models.Exists(newer))
+
+    def upsert(self, rows, user=None) -> list:
+        """Create or update the live entry of each (sheet, item) in a single statement.
+
+        ``rows`` are dicts with ``sheet`` and ``item`` ids, ``on_hand_quantity``
+        and optional ``notes``; the last row for a (sheet, item) wins and omitted
+        notes keep the stored value. Order calculations are done here, then all
+        rows are written with one INSERT ... ON CONFLICT DO UPDATE against the
+        live (sheet, item) unique constraint. Raises ValidationError, writing
+        nothing, if any sheet is unknown or not a draft, or any item is unknown.
+        Returns the written entries, each with ``created`` set.
+        """
+        from inventory.models import EffectiveItemParameter, InventoryItem, InventoryItemVersion
+
+        latest = {(row["sheet"], row["item"]): row for row in rows}
+        if not latest:
+            return []
+        sheet_ids = {sheet_id for sheet_id, _ in latest}
+        item_ids = {item_id for _, item_id in latest}
+
+        with transaction.atomic(), changelog.batch():
+            sheets = CountSheet.objects.select_for_update().in_bulk(sheet_ids)
+            items = InventoryItem.objects.in_bulk(item_ids)
+            errors = [
+                f"Count sheet {sheet_id} does not exist." if sheet_id not in sheets
+                else f"Count sheet {sheet_id} is not a draft."
+                for sheet_id in sorted(sheet_ids)
+                if sheet_id not in sheets or sheets[sheet_id].status != CountSheetStatus.DRAFT
+            ] + [f"Inventory item {item_id} does not exist." for item_id in sorted(item_ids - set(items))]
+            if errors:
+                raise ValidationError(errors)
+
+            existing = {
+                (entry.sheet_id, entry.item_id): entry
+                for entry in self.filter(
+                    deleted_at__isnull=True, sheet_id__in=sheet_ids, item_id__in=item_ids
+                ).only("sheet_id", "item_id", "par_level", "order_point", "notes")
+            }
+            effective = {
+                (location_id, item_id): values
+                for location_id, item_id, *values in EffectiveItemParameter.objects.filter(
+                    location_id__in={sheet.location_id for sheet in sheets.values()},
+                    item_id__in=item_ids,
+                ).values_list("location_id", "item_id", "par_level", "order_point", "pack_size")
+            }
+            versions = {v.item_id: v for v in InventoryItemVersion.objects.current().filter(item_id__in=item_ids)}
+            missing = item_ids - set(versions)
+            if missing:
+                versions.update(InventoryItemVersion.objects.record(missing))
+
+            now = timezone.now()
+            decimal_fields = [
+                field for field in (self.model._meta.get_field(name) for name in UPSERT_INSERT_FIELDS)
+                if isinstance(field, models.DecimalField)
+            ]
+            entries = []
+            for (sheet_id, item_id), row in latest.items():
+                sheet = sheets[sheet_id]
+                current = existing.get((sheet_id, item_id))
+                entry = self.model(
+                    sheet=sheet, item=items[item_id], item_version=versions.get(item_id),
+                    count_date=sheet.count_date, on_hand_quantity=row["on_hand_quantity"],
+                    notes=row.get("notes"), par_level=current.par_level if current else None,
+                    order_point=current.order_point if current else None,
+                    created_by=user, updated_by=user, created_at=now, updated_at=now, counted_at=now,
+                )
+                entry.effective_par_level, entry.effective_order_point, entry.effective_pack_size = (
+                    effective.get((sheet.location_id, item_id), (None, None, None)))
+                calc = entry.perform_calculation()
+                entry.calculated_qty_to_order = calc.qty_to_order
+                entry.calculated_order_units = calc.order_units
+                entry.highlight_state = calc.highlight_state
+                # Match what the column stores and what the serializers render.
+                for field in decimal_fields:
+                    setattr(entry, field.attname, Decimal(getattr(entry, field.attname)).quantize(
+                        Decimal(1).scaleb(-field.decimal_places)))
+                entry.created = current is None
+                entries.append(entry)
+
+            ids = self._insert_on_conflict(entries)
+            CountSheet.objects.filter(pk__in=sheet_ids).refresh_counters()
+            for entry in entries:
+                entry.pk = ids[(entry.sheet_id, entry.item_id)]
+                current = existing.get((entry.sheet_id, entry.item_id))
+                if current is not None:
+                    # Existing rows kept their creator; don't report ours as written.
+                    entry.__dict__.pop("created_by_id")
+                    entry.__dict__.pop("created_at")
+                    if entry.notes is None:
+                        entry.notes = current.notes
+            for created in (True, False):
+                changelog.record(
+                    [entry for entry in entries if entry.created is created],
+                    ChangeAction.CREATE if created else ChangeAction.UPDATE,
+                )
+        return entries
+
+    def copy_forward(self, sheet, user=None) -> int:
+        """Seed ``sheet`` with the previous submitted sheet's live entries.
+
+        The previous sheet is the latest submitted one for the same location
+        and frequency counted on or before ``sheet.count_date``. Each active
+        item's on-hand quantity and notes are copied with a single INSERT ...
+        SELECT, linked to the item's current version; order calculations are
+        then redone under today's effective parameters in one bulk update.
+        Copied entries are not marked counted (counted_at stays empty), and
+        items already on ``sheet`` are skipped. Returns the number of entries.
+        """
+        from inventory.models import InventoryItem, InventoryItemVersion
+
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        entry_table = quote(self.model._meta.db_table)
+        # Calculations are inserted as placeholders and redone below.
+        copied = ("on_hand_quantity", "notes")
+        now = self.model._meta.get_field("created_at").get_db_prep_save(timezone.now(), connection)
+        sql = f"""
+            INSERT INTO {entry_table} (
+                sheet_id, item_id, item_version_id, count_date, {", ".join(quote(c) for c in copied)},
+                calculated_qty_to_order, calculated_order_units, highlight_state,
+                created_by_id, updated_by_id, created_at, updated_at
+            )
+            SELECT %s, e.item_id,
+                (SELECT v.id FROM {quote(InventoryItemVersion._meta.db_table)} v
+                 WHERE v.item_id = e.item_id AND v.valid_to IS NULL
+                 ORDER BY v.valid_from DESC LIMIT 1),
+                %s, {", ".join("e." + quote(c) for c in copied)},
+                0, 0, '', %s, %s, %s, %s
+            FROM {entry_table} e
+            JOIN {quote(InventoryItem._meta.db_table)} i ON i.id = e.item_id
+            WHERE e.deleted_at IS NULL AND i.is_active
+              AND e.sheet_id = (
+                SELECT s.id FROM {quote(CountSheet._meta.db_table)} s
+                WHERE s.location_id = %s AND s.frequency_id = %s AND s.status = %s
+                  AND s.count_date <= %s AND s.id <> %s
+                ORDER BY s.count_date DESC, s.submitted_at DESC, s.id DESC
+                LIMIT 1
+              )
+              AND NOT EXISTS (
+                SELECT 1 FROM {entry_table} x
+                WHERE x.sheet_id = %s AND x.item_id = e.item_id AND x.deleted_at IS NULL
+              )
+            RETURNING id
+        """
+        user_id = user.pk if user is not None else None
+        count_date = CountSheet._meta.get_field("count_date").get_db_prep_save(sheet.count_date, connection)
+        params = [
+            sheet.pk, count_date, user_id, user_id, now, now,
+            sheet.location_id, sheet.frequency_id, CountSheetStatus.SUBMITTED.value, count_date, sheet.pk,
+            sheet.pk,
+        ]
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                ids = [row[0] for row in cursor.fetchall()]
+            if ids:
+                entries = list(self.model.objects.with_effective_parameters().select_related(
+                    "item").filter(pk__in=ids))
+                for entry in entries:
+                    calc = entry.perform_calculation()
+                    entry.calculated_qty_to_order = calc.qty_to_order
+                    entry.calculated_order_units = calc.order_units
+                    entry.highlight_state = calc.highlight_state
+                self.model.objects.bulk_update(
+                    entries, ["calculated_qty_to_order", "calculated_order_units", "highlight_state"],
+                    batch_size=500)
+                changelog.record(entries, ChangeAction.CREATE)
+                CountSheet.objects.filter(pk=sheet.pk).refresh_counters()
+        return len(ids)
+
+    def _insert_on_conflict(self, entries) -> dict:
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        meta = self.model._meta
+        table = quote(meta.db_table)
+        fields = [meta.get_field(name) for name in UPSERT_INSERT_FIELDS]
+        assignments = [
+            f"{quote(field.column)} = EXCLUDED.{quote(field.column)}"
+            for field in (meta.get_field(name) for name in UPSERT_UPDATE_FIELDS)
+        ] + [f'{quote("notes")} = COALESCE(EXCLUDED.{quote("notes")}, {table}.{quote("notes")})']
+        row = "(" + ", ".join(["%s"] * len(fields)) + ")"
+        # One statement per chunk so backends with a bound-parameter limit
+        # (SQLite) accept full batches; the caller's transaction spans them all.
+        max_params = connection.features.max_query_params
+        chunk_size = max(1, max_params // len(fields)) if max_params else len(entries)
+        ids = {}
+        with connection.cursor() as cursor:
+            for start in range(0, len(entries), chunk_size):
+                chunk = entries[start:start + chunk_size]
+                sql = (
+                    f"INSERT INTO {table} ({', '.join(quote(field.column) for field in fields)}) "
+                    f"VALUES {', '.join([row] * len(chunk))} "
+                    f"ON CONFLICT ({quote('sheet_id')}, {quote('item_id')}) WHERE {quote('deleted_at')} IS NULL "
+                    f"DO UPDATE SET {', '.join(assignments)} "
+                    f"RETURNING {quote('id')}, {quote('sheet_id')}, {quote('item_id')}"
+                )
+                params = [
+                    field.get_db_prep_save(getattr(entry, field.attname), connection)
+                    for entry in chunk for field in fields
+                ]
+                cursor.execute(sql, params)
+                ids.update({(sheet_id, item_id): pk for pk, sheet_id, item_id in cursor.fetchall()})
+        return ids
+
+
+# Columns written by CountEntry.objects.upsert(); the second list is what an
+# existing live entry takes from the new row (notes only when given).
+UPSERT_UPDATE_FIELDS = (
+    "item_version", "count_date", "client_updated_at", "counted_at", "on_hand_quantity",
+    "calculated_qty_to_order", "calculated_order_units", "highlight_state",
+    "updated_by", "updated_at",
+)
+UPSERT_INSERT_FIELDS = ("sheet", "item", "notes", "created_by", "created_at") + UPSERT_UPDATE_FIELDS
 
 
 class CountEntry(models.Model):
@@ -100,6 +601,26 @@ class CountEntry(models.Model):
         on_delete=models.PROTECT,
         related_name="count_entries"
     )
+    item_version = models.ForeignKey(
+        'inventory.InventoryItemVersion',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="count_entries",
+        help_text=_("Catalog values in effect when this entry was counted")
+    )
+    count_date = models.DateField(
+        null=True, blank=True, editable=False,
+        help_text=_("Copy of the sheet's count date for date-bounded history queries")
+    )
+    client_updated_at = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        help_text=_("Device timestamp of the last edit made through sync")
+    )
+    counted_at = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        help_text=_("When a counter last entered the on-hand quantity; empty for pre-filled entries")
+    )
 
     on_hand_quantity = models.DecimalField(
         max_digits=9, decimal_places=2, default=0)
@@ -131,27 +652,113 @@ class CountEntry(models.Model):
         related_name="count_entries_deleted"
     )
 
+    objects = CountEntryQuerySet.as_manager()
+
+    COUNTER_ATTNAMES = {
+        "sheet_id", "deleted_at", "counted_at", "highlight_state", "calculated_order_units",
+    }
+
     def __str__(self) -> str:
         return f"{self.sheet} · {self.item}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded_state()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_loaded_state()
+
+    def _remember_loaded_state(self):
+        if self.COUNTER_ATTNAMES.issubset(self.__dict__):
+            self._counted_as = self.counter_contribution()
+        if "on_hand_quantity" in self.__dict__:
+            self._loaded_on_hand = self.on_hand_quantity
+
+    def is_recount(self, update_fields=None) -> bool:
+        """Whether saving now records a count, i.e. writes a new on-hand quantity.
+
+        A quantity equal to the loaded one is not a recount; when the loaded
+        value is unknown (deferred), any full save is treated as one.
+        """
+        if self._state.adding:
+            return True
+        if update_fields is not None:
+            return "on_hand_quantity" in update_fields
+        loaded = getattr(self, "_loaded_on_hand", None)
+        return loaded is None or Decimal(loaded) != Decimal(self.on_hand_quantity)
+
+    def counter_contribution(self) -> tuple:
+        """(sheet_id, {counter: value}) this entry adds to its sheet's progress counters."""
+        if self.deleted_at is not None:
+            return self.sheet_id, {}
+        contribution = {
+            "entry_count": 1,
+            "counted_count": int(self.counted_at is not None),
+            "total_order_units": self.calculated_order_units,
+        }
+        if self.highlight_state in dict(self.HIGHLIGHT_CHOICES):
+            contribution[f"{self.highlight_state}_count"] = 1
+        return self.sheet_id, contribution
+
+    def update_sheet_counters(self, before, after):
+        """Move the sheet counters from contribution ``before`` to ``after``.
+
+        ``before`` is None when the previous state is unknown (e.g. the entry
+        was loaded with deferred fields); the sheet is then recounted.
+        """
+        if before is None:
+            CountSheet.objects.filter(pk__in={self.sheet_id, after[0]}).refresh_counters()
+            return
+        deltas = {}
+        for sign, (sheet_id, values) in ((-1, before), (1, after)):
+            delta = deltas.setdefault(sheet_id, {})
+            for name, value in values.items():
+                delta[name] = delta.get(name, 0) + sign * value
+        for sheet_id, delta in deltas.items():
+            CountSheet.objects.filter(pk=sheet_id).add_to_counters(delta)
+
     def clean(self) -> None:
         super().clean()
         if self.on_hand_quantity < 0:
             raise ValidationError(
                 {"on_hand_quantity": _("Cannot be negative.")})
 
-    def save(self, *args, recalculate: bool = True, user=None, **kwargs):
+    def save(self, *args, recalculate: bool = True, user=None, client_updated_at=None, counted=None, **kwargs):
+        """Save and keep the sheet counters in step.
+
+        ``counted`` says whether this save records a count (sets counted_at);
+        by default it does when the on-hand quantity changes.
+        """
+        adding = self._state.adding
+        before = (self.sheet_id, {}) if adding else getattr(self, "_counted_as", None)
+        self.client_updated_at = client_updated_at
+        update_fields = kwargs.get("update_fields")
+        if counted is None:
+            counted = self.is_recount(update_fields)
+        if counted:
+            self.counted_at = timezone.now()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "counted_at"}
         if recalculate:
             calc = self.perform_calculation()
             self.calculated_qty_to_order = calc.qty_to_order
             self.calculated_order_units = calc.order_units
             self.highlight_state = calc.highlight_state
+            from inventory.models import InventoryItemVersion
+            self.item_version = InventoryItemVersion.objects.current_for(self.item_id)
+        self.count_date = self.sheet.count_date
         if not self.pk and user:
             self.created_by = user
         if user:
             self.updated_by = user
 
         super().save(*args, **kwargs)
+        self._loaded_on_hand = self.on_hand_quantity
+        self._counted_as = self.counter_contribution()
+        self.update_sheet_counters(before, self._counted_as)
         if self.sheet.status == CountSheetStatus.SUBMITTED and not self.sheet.submitted_at:
             self.sheet.submitted_at = timezone.now()
             self.sheet.save(update_fields=['submitted_at'])
@@ -176,37 +783,413 @@ class CountEntry(models.Model):
         """Check if count entry is soft deleted"""
         return self.deleted_at is not None
 
+    @property
+    def last_written_at(self):
+        """When the current values were written, for last-writer-wins sync."""
+        return self.client_updated_at or self.updated_at
+
+    @property
+    def catalog_snapshot(self):
+        """Item values as they were when counted, falling back to the live item"""
+        return self.item_version if self.item_version_id else self.item
+
     class Meta:
         verbose_name = _("Count Entry")
         verbose_name_plural = _("Count Entries")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['sheet', 'item'],
+                name='countentry_live_sheet_item_uniq',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+        ]
         indexes = [
-            models.Index(fields=['sheet', 'item']),
             models.Index(fields=['created_at', 'created_by']),
             models.Index(fields=['deleted_at']),
+            models.Index(
+                fields=['count_date', 'sheet'],
+                name='countentry_live_date_idx',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
         ]
 
+    def _effective_values(self):
+        if hasattr(self, "effective_par_level"):
+            return (self.effective_par_level, self.effective_order_point, self.effective_pack_size)
+        from inventory.models import EffectiveItemParameter
+        row = EffectiveItemParameter.objects.filter(
+            location_id=self.sheet.location_id, item_id=self.item_id
+        ).values_list("par_level", "order_point", "pack_size").first()
+        self.effective_par_level, self.effective_order_point, self.effective_pack_size = (
+            row or (None, None, None))
+        return row or (None, None, None)
+
+    def resolve_parameters(self) -> OrderParameters:
+        """Entry overrides win, then the location's effective values, then the item."""
+        eff_par, eff_order_point, eff_pack = self._effective_values()
+        par_level = next(
+            (v for v in (self.par_level, eff_par, self.item.par_level) if v is not None),
+            Decimal("0"))
+        order_point = next(
+            (v for v in (self.order_point, eff_order_point, self.item.order_point) if v is not None),
+            Decimal("0"))
+        pack_size = eff_pack or self.item.pack_size
+        return OrderParameters(
+            par_level=par_level,
+            order_point=order_point,
+            pack_size=Decimal(str(pack_size)) if pack_size else Decimal("1"),
+        )
+
     def perform_calculation(self) -> OrderCalculation:
-        par_level = self.par_level if self.par_level is not None else (self.item.par_level or Decimal("0"))
-        order_point = self.order_point if self.order_point is not None else (self.item.order_point or Decimal("0"))
-        on_hand = self.on_hand_quantity or Decimal("0")
-        pack_size = Decimal(str(self.item.pack_size)) if self.item.pack_size else Decimal("1")
-        if on_hand >= par_level:
-            return OrderCalculation(
-                Decimal("0"),
-                Decimal("0"),
-                self.HIGHLIGHT_GREEN
+        return calculate_order(self.on_hand_quantity, self.resolve_parameters())
+
+
+def calculate_order(on_hand, params: OrderParameters) -> OrderCalculation:
+    """Order quantity and highlight for an on-hand count under the given parameters."""
+    par_level = params.par_level
+    order_point = params.order_point
+    on_hand = on_hand or Decimal("0")
+    pack_size = params.pack_size
+    if on_hand >= par_level:
+        return OrderCalculation(
+            Decimal("0"),
+            Decimal("0"),
+            CountEntry.HIGHLIGHT_GREEN
+        )
+    deficit = par_level - on_hand
+    order_units_needed = (deficit / pack_size).quantize(
+        Decimal("1"), rounding=ROUND_CEILING
+    )
+    count_units_to_order = order_units_needed * pack_size
+    if on_hand <= order_point:
+        highlight = CountEntry.HIGHLIGHT_RED
+    else:
+        highlight = CountEntry.HIGHLIGHT_YELLOW
+    return OrderCalculation(
+        qty_to_order=count_units_to_order,
+        order_units=order_units_needed,
+        highlight_state=highlight
+    )
+
+
+class StockSnapshotQuerySet(models.QuerySet):
+    def low(self):
+        return self.filter(highlight_state=CountEntry.HIGHLIGHT_RED)
+
+    def by_location(self, location):
+        return self.filter(location=location)
+
+    def refresh_from_sheet(self, sheet) -> int:
+        return self.refresh_from_sheets([sheet])
+
+    def refresh_from_sheets(self, sheets) -> int:
+        """Upsert the latest on-hand figures of submitted sheets in one statement.
+
+        Rows already holding a newer count for the same location keep their
+        values; among the given sheets, the later count date wins.
+        """
+        sheets = {sheet.pk: sheet for sheet in sheets}
+        latest = {}
+        for entry in CountEntry.objects.filter(
+            sheet_id__in=sheets, deleted_at__isnull=True
+        ).order_by("updated_at"):
+            sheet = sheets[entry.sheet_id]
+            key = (sheet.location_id, entry.item_id)
+            if key not in latest or latest[key][0].count_date <= sheet.count_date:
+                latest[key] = (sheet, entry)
+        if not latest:
+            return 0
+        current = {
+            (location_id, item_id): count_date
+            for location_id, item_id, count_date in self.filter(
+                location_id__in={key[0] for key in latest},
+                item_id__in={key[1] for key in latest},
+            ).values_list("location_id", "item_id", "count_date")
+        }
+        snapshots = [
+            self.model(
+                location_id=location_id,
+                item_id=item_id,
+                sheet=sheet,
+                on_hand_quantity=entry.on_hand_quantity,
+                calculated_order_units=entry.calculated_order_units,
+                highlight_state=entry.highlight_state,
+                count_date=sheet.count_date,
             )
-        deficit = par_level - on_hand
-        order_units_needed = (deficit / pack_size).quantize(
-            Decimal("1"), rounding=ROUND_CEILING
+            for (location_id, item_id), (sheet, entry) in latest.items()
+            if current.get((location_id, item_id), sheet.count_date) <= sheet.count_date
+        ]
+        self.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=["location", "item"],
+            update_fields=[
+                "sheet", "on_hand_quantity", "calculated_order_units",
+                "highlight_state", "count_date", "updated_at",
+            ],
         )
-        count_units_to_order = order_units_needed * pack_size
-        if on_hand <= order_point:
-            highlight = self.HIGHLIGHT_RED
-        else:
-            highlight = self.HIGHLIGHT_YELLOW
-        return OrderCalculation(
-            qty_to_order=count_units_to_order,
-            order_units=order_units_needed,
-            highlight_state=highlight
+        return len(snapshots)
+
+
+class StockSnapshot(models.Model):
+    """Latest submitted count per (location, item), maintained on sheet submit."""
+    location = models.ForeignKey(
+        'locations.Location',
+        on_delete=models.CASCADE,
+        related_name="stock_snapshots"
+    )
+    item = models.ForeignKey(
+        'inventory.InventoryItem',
+        on_delete=models.CASCADE,
+        related_name="stock_snapshots"
+    )
+    sheet = models.ForeignKey(
+        CountSheet,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="stock_snapshots"
+    )
+    on_hand_quantity = models.DecimalField(
+        max_digits=9, decimal_places=2, default=0)
+    calculated_order_units = models.DecimalField(
+        max_digits=9, decimal_places=2, default=0)
+    highlight_state = models.CharField(
+        max_length=8, choices=CountEntry.HIGHLIGHT_CHOICES)
+    count_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = StockSnapshotQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Stock Snapshot")
+        verbose_name_plural = _("Stock Snapshots")
+        ordering = ["location", "item__display_order", "item__name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['location', 'item'], name='unique_stock_snapshot_location_item'),
+        ]
+        indexes = [
+            models.Index(fields=['location', 'highlight_state']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.location} · {self.item} ({self.on_hand_quantity})"
+
+
+class SheetArchiveQuerySet(models.QuerySet):
+    def archivable(self, before):
+        """Submitted sheets counted before ``before`` that are not archived yet."""
+        return CountSheet.objects.filter(
+            status=CountSheetStatus.SUBMITTED, count_date__lt=before, archive__isnull=True
         )
+
+    def archive_sheet(self, sheet) -> SheetArchive | None:
+        """Move a submitted sheet's entries into one compressed archive row.
+
+        Entries are stored exactly as CountEntrySerializer rendered them, with
+        the ids each report linked to, and then deleted from the hot table.
+        Returns None if the sheet is no longer eligible.
+        """
+        from counts.serializers import CountEntrySerializer
+
+        with transaction.atomic(), changelog.batch():
+            sheet = CountSheet.objects.select_for_update().filter(
+                pk=sheet.pk, status=CountSheetStatus.SUBMITTED, archive__isnull=True
+            ).first()
+            if sheet is None:
+                return None
+
+            entries = list(
+                CountEntry.objects.with_effective_parameters().select_related(
+                    "sheet", "item", "item__vendor", "item__brand", "item_version",
+                    "created_by", "updated_by", "deleted_by"
+                ).filter(sheet=sheet).order_by("pk")
+            )
+            links = Report.count_entries.through.objects.filter(
+                countentry__sheet=sheet
+            ).values_list("report_id", "countentry_id")
+            report_entries = {}
+            for report_id, entry_id in links:
+                report_entries.setdefault(str(report_id), []).append(entry_id)
+
+            archive = self.create(
+                sheet=sheet,
+                entry_count=len(entries),
+                payload=SheetArchive.pack({
+                    "entries": CountEntrySerializer(entries, many=True).data,
+                    "reports": report_entries,
+                }),
+            )
+            archive.reports.set([int(report_id) for report_id in report_entries])
+
+            CountEntry.objects.filter(sheet=sheet).delete()
+            sheet.status = CountSheetStatus.ARCHIVED
+            # Keep the final counts visible; the entries now live in the archive.
+            sheet.save(update_fields=["status", "updated_at", *SHEET_COUNTER_FIELDS])
+        return archive
+
+
+class SheetArchive(models.Model):
+    """Cold storage for an archived sheet: its entries as one zlib-compressed JSON blob."""
+    sheet = models.OneToOneField(
+        CountSheet,
+        on_delete=models.CASCADE,
+        related_name="archive"
+    )
+    reports = models.ManyToManyField(
+        'reports.Report',
+        related_name="sheet_archives",
+        blank=True
+    )
+    entry_count = models.PositiveIntegerField(default=0)
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = SheetArchiveQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Sheet Archive")
+        verbose_name_plural = _("Sheet Archives")
+        ordering = ["-archived_at"]
+
+    def __str__(self) -> str:
+        return f"{self.sheet} ({self.entry_count} entries)"
+
+    @staticmethod
+    def pack(data) -> bytes:
+        from core.renderers import FastJSONRenderer
+        return zlib.compress(FastJSONRenderer().render(data), 9)
+
+    def unpack(self) -> dict:
+        return json.loads(zlib.decompress(self.payload))
+
+    def entries_for_report(self, report_id) -> list[dict]:
+        """Archived entry representations that were linked to the given report."""
+        data = self.unpack()
+        linked = set(data["reports"].get(str(report_id), ()))
+        return [entry for entry in data["entries"] if entry["id"] in linked]
+
+
+class SyncOperationStatus(models.TextChoices):
+    APPLIED = "applied", _("Applied")
+    STALE = "stale", _("Stale")
+    REJECTED = "rejected", _("Rejected")
+
+
+class SyncOperationQuerySet(models.QuerySet):
+    def apply_batch(self, sheet, device_id, operations, user) -> list[dict]:
+        """Apply a device's queued operations on one sheet in a single transaction.
+
+        Each operation upserts or soft-deletes the sheet's entry for an item,
+        unless the entry was last written after the operation's ``updated_at``
+        (last writer wins, see CountEntry.last_written_at). Results are stored per (device, op_id)
+        so a retried operation returns its original result instead of running
+        again. Returns one result per operation, in request order.
+        """
+        from inventory.models import InventoryItem
+
+        with transaction.atomic(), changelog.batch():
+            sheet = CountSheet.objects.select_for_update().get(pk=sheet.pk)
+            done = {
+                op.op_id: op for op in self.filter(
+                    device_id=device_id, op_id__in=[op["op_id"] for op in operations])
+            }
+            known_items = set(InventoryItem.objects.filter(
+                pk__in={op["item"] for op in operations}).values_list("pk", flat=True))
+            entries = {
+                entry.item_id: entry
+                for entry in CountEntry.objects.with_effective_parameters()
+                .select_related("sheet").filter(sheet=sheet, deleted_at__isnull=True)
+            }
+
+            results, pending = [], []
+            for op in operations:
+                previous = done.get(op["op_id"])
+                if previous is not None:
+                    results.append({**previous.result, "duplicate": True})
+                    continue
+                result = self._apply(sheet, entries, known_items, op, user)
+                record = self.model(
+                    device_id=device_id,
+                    op_id=op["op_id"],
+                    sheet=sheet,
+                    entry_id=result["entry"],
+                    status=result["status"],
+                    result=result,
+                )
+                done[op["op_id"]] = record
+                pending.append(record)
+                results.append(result)
+            self.bulk_create(pending)
+        return results
+
+    def _apply(self, sheet, entries, known_items, op, user) -> dict:
+        result = {"op_id": op["op_id"], "status": SyncOperationStatus.APPLIED.value, "entry": None}
+        if sheet.status != CountSheetStatus.DRAFT:
+            return {**result, "status": SyncOperationStatus.REJECTED.value,
+                    "error": "Only draft sheets can be changed."}
+        if op["item"] not in known_items:
+            return {**result, "status": SyncOperationStatus.REJECTED.value,
+                    "error": "Unknown item."}
+
+        entry = entries.get(op["item"])
+        if entry is not None:
+            result["entry"] = entry.pk
+            if entry.last_written_at > op["updated_at"]:
+                return {**result, "status": SyncOperationStatus.STALE.value}
+
+        if op["type"] == "delete":
+            if entry is not None:
+                entry.deleted_at = timezone.now()
+                entry.deleted_by = user
+                entry.save(
+                    recalculate=False, client_updated_at=op["updated_at"],
+                    update_fields=["deleted_at", "deleted_by", "updated_at", "client_updated_at"])
+                del entries[op["item"]]
+            return result
+
+        if entry is None:
+            entry = CountEntry(sheet=sheet, item_id=op["item"])
+        for field in ("on_hand_quantity", "notes"):
+            if field in op:
+                setattr(entry, field, op[field])
+        confirmed = "on_hand_quantity" in op and entry.counted_at is None
+        entry.save(user=user, client_updated_at=op["updated_at"], counted=True if confirmed else None)
+        entries[op["item"]] = entry
+        result["entry"] = entry.pk
+        return result
+
+
+class SyncOperation(models.Model):
+    """A client operation received through the sync endpoint, kept to dedupe retries."""
+    device_id = models.CharField(max_length=64)
+    op_id = models.CharField(max_length=64)
+    sheet = models.ForeignKey(
+        CountSheet,
+        on_delete=models.CASCADE,
+        related_name="sync_operations"
+    )
+    entry = models.ForeignKey(
+        CountEntry,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="sync_operations"
+    )
+    status = models.CharField(max_length=16, choices=SyncOperationStatus.choices)
+    result = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = SyncOperationQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _("Sync Operation")
+        verbose_name_plural = _("Sync Operations")
+        constraints = [
+            models.UniqueConstraint(
+                fields=['device_id', 'op_id'], name='unique_sync_operation_device_op'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.device_id} · {self.op_id} ({self.status})"
@@ -1,4 +1,5 @@
-from counts.models import CountEntry, CountSheet
+from counts.models import CountEntry, CountSheet, StockSnapshot
+from django.utils.dateparse import parse_datetime
 from rest_framework import serializers
 from inventory.serializers import InventoryItemSerializer
 from inventory.models import InventoryItem
@@ -12,7 +13,7 @@ class CountEntrySerializer(serializers.ModelSerializer):
         write_only=True
     )
     item_detail = InventoryItemSerializer(source="item", read_only=True)
-    item_name = serializers.CharField(source='item.name', read_only=True)
+    item_name = serializers.CharField(source='catalog_snapshot.name', read_only=True)
     highlight_display = serializers.CharField(
         source='get_highlight_state_display', read_only=True
     )
@@ -21,28 +22,35 @@ class CountEntrySerializer(serializers.ModelSerializer):
     deleted_by_detail = serializers.SerializerMethodField()
 
     pack_size = serializers.DecimalField(
-        source='item.pack_size',
+        source='catalog_snapshot.pack_size',
         max_digits=10,
         decimal_places=2,
         read_only=True
     )
 
+    effective_parameters = serializers.SerializerMethodField()
+
     count_unit = serializers.CharField(
-        source='item.count_unit', read_only=True)
+        source='catalog_snapshot.count_unit', read_only=True)
     order_unit = serializers.CharField(
-        source='item.order_unit', read_only=True)
+        source='catalog_snapshot.order_unit', read_only=True)
+    vendor_name = serializers.CharField(
+        source='catalog_snapshot.vendor_name', read_only=True, default=None)
 
     class Meta:
         model = CountEntry
         fields = [
             'id', 'sheet', 'pack_size', 'count_unit', 'order_unit', 'item', 'item_detail', 'item_name',
+            'item_version', 'vendor_name',
             'on_hand_quantity', 'calculated_qty_to_order', 'calculated_order_units',
             'highlight_state', 'highlight_display', 'notes', 'par_level', 'order_point',
+            'effective_parameters', 'counted_at',
             'created_by', 'created_by_detail', 'created_at', 
             'updated_by', 'updated_by_detail', 'updated_at',
             'deleted_by', 'deleted_by_detail', 'deleted_at'
         ]
         read_only_fields = [
+            'item_version',
             'calculated_qty_to_order',
             'calculated_order_units',
             'highlight_state',
@@ -57,6 +65,14 @@ class CountEntrySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Quantity cannot be negative.")
         return value
 
+    def get_effective_parameters(self, obj):
+        params = obj.resolve_parameters()
+        return {
+            'par_level': str(params.par_level),
+            'order_point': str(params.order_point),
+            'pack_size': str(params.pack_size),
+        }
+
     def get_created_by_detail(self, obj):
         if obj.created_by:
             return {
@@ -96,7 +112,9 @@ class CountEntrySerializer(serializers.ModelSerializer):
         updated_by = validated_data.pop("updated_by", None)
         if updated_by is not None:
             instance.updated_by = updated_by
-        instance.save(recalculate=True) 
+        # Entering a quantity confirms an uncounted (copied forward) entry even if unchanged.
+        confirmed = "on_hand_quantity" in validated_data and instance.counted_at is None
+        instance.save(recalculate=True, counted=True if confirmed else None)
         return instance
 
 class CountSheetSerializer(serializers.ModelSerializer):
@@ -136,3 +154,67 @@ class CountSheetSerializer(serializers.ModelSerializer):
                 'email': obj.submitted_by.email
             }
         return None
+
+
+class StockSnapshotSerializer(serializers.ModelSerializer):
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    location_name = serializers.CharField(source='location.name', read_only=True)
+    highlight_display = serializers.CharField(
+        source='get_highlight_state_display', read_only=True
+    )
+
+    class Meta:
+        model = StockSnapshot
+        fields = [
+            'id', 'location', 'location_name', 'item', 'item_name', 'sheet',
+            'on_hand_quantity', 'calculated_order_units',
+            'highlight_state', 'highlight_display', 'count_date', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+MAX_SYNC_OPERATIONS = 1000
+MAX_UPSERT_ENTRIES = 1000
+
+
+class CountEntryUpsertSerializer(serializers.Serializer):
+    sheet = serializers.IntegerField(min_value=1)
+    item = serializers.IntegerField(min_value=1)
+    on_hand_quantity = serializers.DecimalField(max_digits=9, decimal_places=2, min_value=0)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+
+MAX_SUBMIT_BATCH_SHEETS = 100
+
+
+class CountSheetSubmitBatchSerializer(serializers.Serializer):
+    sheets = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_SUBMIT_BATCH_SHEETS)
+
+
+class SyncOperationSerializer(serializers.Serializer):
+    op_id = serializers.CharField(max_length=64)
+    type = serializers.ChoiceField(choices=("upsert", "delete"), default="upsert")
+    item = serializers.IntegerField(min_value=1)
+    on_hand_quantity = serializers.DecimalField(
+        max_digits=9, decimal_places=2, min_value=0, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    updated_at = serializers.DateTimeField()
+
+
+class SyncRequestSerializer(serializers.Serializer):
+    sheet = serializers.PrimaryKeyRelatedField(queryset=CountSheet.objects.all())
+    device_id = serializers.CharField(max_length=64)
+    token = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    operations = SyncOperationSerializer(many=True, required=False, max_length=MAX_SYNC_OPERATIONS)
+
+    def validate_token(self, value):
+        if not value:
+            return None
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            parsed = None
+        if parsed is None:
+            raise serializers.ValidationError("Invalid sync token.")
+        return parsed
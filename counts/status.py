@@ -0,0 +1,143 @@
+"""Due / in-progress / overdue state of every (location, frequency) pair.
+
+One windowed query finds the latest sheet counted up to today for each pair
+of an active location and active frequency that has active items; the
+frequency's cadence then decides what that sheet means. The result is cached
+for COUNT_STATUS_CACHE_SECONDS under a version counter row that every sheet,
+location or frequency write bumps in its own transaction, so all workers
+drop their copy at once.
+"""
+from datetime import datetime, timedelta, time as dt_time, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.utils import timezone
+from frequency.models import Frequency
+from inventory.models import InventoryItem
+from locations.models import Location
+from core.models import ChangeSequence
+from .models import CountSheet, CountSheetStatus
+
+VERSION_KEY = "counts:status"
+
+DUE = "due"
+IN_PROGRESS = "in_progress"
+OVERDUE = "overdue"
+SUBMITTED = "submitted"
+UNSCHEDULED = "unscheduled"
+
+
+def invalidate():
+    ChangeSequence.objects.bump(VERSION_KEY)
+
+
+def _status_sql(quote):
+    item, location, frequency, sheet = (
+        quote(model._meta.db_table) for model in (InventoryItem, Location, Frequency, CountSheet))
+    return f"""
+        WITH pairs AS (
+            SELECT DISTINCT i.location_id, i.frequency_id
+            FROM {item} i
+            JOIN {location} l ON l.id = i.location_id
+            JOIN {frequency} f ON f.id = i.frequency_id
+            WHERE i.is_active AND l.is_active AND f.is_active
+        ),
+        ranked AS (
+            SELECT s.id, s.location_id, s.frequency_id, s.count_date, s.status, s.submitted_at,
+                   s.entry_count, s.counted_count, s.red_count,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY s.location_id, s.frequency_id
+                       ORDER BY s.count_date DESC, s.id DESC
+                   ) AS position,
+                   MAX(s.submitted_at) OVER (PARTITION BY s.location_id, s.frequency_id) AS last_submitted_at
+            FROM {sheet} s
+            JOIN pairs p ON p.location_id = s.location_id AND p.frequency_id = s.frequency_id
+            WHERE s.count_date <= %s
+        )
+        SELECT p.location_id, l.name, p.frequency_id, f.frequency_name,
+               f.interval_days, f.weekday, f.cutoff_time,
+               r.id, r.count_date, r.status, r.submitted_at, r.entry_count, r.counted_count, r.red_count,
+               r.last_submitted_at
+        FROM pairs p
+        JOIN {location} l ON l.id = p.location_id
+        JOIN {frequency} f ON f.id = p.frequency_id
+        LEFT JOIN ranked r
+            ON r.location_id = p.location_id AND r.frequency_id = p.frequency_id AND r.position = 1
+        ORDER BY l.name, f.frequency_name
+    """
+
+
+def _datetime(value):
+    value = CountSheet._meta.get_field("submitted_at").to_python(value)
+    if value is not None and settings.USE_TZ and timezone.is_naive(value):
+        # SQLite hands window results back as naive UTC strings.
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def pair_status(frequency, sheet, today, now):
+    """Status of a pair whose latest sheet up to today is ``sheet`` (or None)."""
+    due = frequency.last_due_on(today)
+    current = sheet if sheet and (due is None or sheet["count_date"] >= due) else None
+    if current and current["status"] != CountSheetStatus.DRAFT:
+        return SUBMITTED, due, None
+    if due is None:
+        return (IN_PROGRESS if current else UNSCHEDULED), None, None
+    deadline = frequency.cutoff_for(due) or timezone.make_aware(
+        datetime.combine(due + timedelta(days=1), dt_time.min))
+    if now >= deadline:
+        return OVERDUE, due, deadline
+    return (IN_PROGRESS if current else DUE), due, deadline
+
+
+def compute(today=None, now=None):
+    now = now or timezone.now()
+    today = today or timezone.localdate(now)
+    connection = connections[router.db_for_read(CountSheet)]
+    with connection.cursor() as cursor:
+        cursor.execute(_status_sql(connection.ops.quote_name), [
+            CountSheet._meta.get_field("count_date").get_db_prep_value(today, connection)])
+        rows = cursor.fetchall()
+
+    results = []
+    for (location_id, location_name, frequency_id, frequency_name, interval_days, weekday, cutoff_time,
+         sheet_id, count_date, sheet_status, submitted_at, total, counted, red, last_submitted_at) in rows:
+        frequency = Frequency(
+            pk=frequency_id, frequency_name=frequency_name, interval_days=interval_days, weekday=weekday,
+            cutoff_time=Frequency._meta.get_field("cutoff_time").to_python(cutoff_time),
+        )
+        sheet = None
+        if sheet_id is not None:
+            sheet = {
+                "id": sheet_id,
+                "count_date": CountSheet._meta.get_field("count_date").to_python(count_date),
+                "status": sheet_status,
+                "submitted_at": _datetime(submitted_at),
+                "counted": counted,
+                "total": total,
+                "red": red,
+            }
+        status, due, deadline = pair_status(frequency, sheet, today, now)
+        results.append({
+            "location": location_id,
+            "location_name": location_name,
+            "frequency": frequency_id,
+            "frequency_name": frequency_name,
+            "status": status,
+            "due_date": due,
+            "deadline": deadline,
+            "last_submitted_at": _datetime(last_submitted_at),
+            "sheet": sheet,
+        })
+    return results
+
+
+def get_status():
+    """Cached status rows, recomputed at most every COUNT_STATUS_CACHE_SECONDS."""
+    version = ChangeSequence.objects.filter(name=VERSION_KEY).values_list("value", flat=True).first()
+    key = f"counts:status:{version or 0}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = compute()
+        cache.set(key, rows, timeout=settings.COUNT_STATUS_CACHE_SECONDS)
+    return rows
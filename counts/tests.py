@@ -1,9 +1,24 @@
+from io import StringIO
+from unittest import mock
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.urls import reverse
+from django.test.utils import CaptureQueriesContext
 from decimal import Decimal
-from counts.models import CountEntry, CountSheet
+from datetime import date, datetime, time, timedelta
+from django.utils import timezone
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from users.models import User, UserRole
+from reports.models import Report
+from counts import status as count_status
+from core import outbox
+from core.models import OutboxEvent
+from counts.models import CountEntry, CountSheet, CountSheetStatus, SheetArchive, StockSnapshot, SyncOperation
 from inventory.models import InventoryItem
 from locations.models import Location
-from frequency.models import Frequency
+from frequency.models import Frequency, Weekday
 
 
 class CountEntryOrderCalculationTests(TestCase):
@@ -13,12 +28,12 @@ class CountEntryOrderCalculationTests(TestCase):
         )
         
         self.location = Location.objects.create(
-            name="Test Location",
-            frequency=self.frequency
+            name="Test Location"
         )
         
         self.sheet = CountSheet.objects.create(
             location=self.location,
+            frequency=self.frequency,
             status="draft"
         )
 
@@ -157,3 +172,714 @@ class CountEntryOrderCalculationTests(TestCase):
         
         self.assertEqual(entry.calculated_order_units, Decimal("1"))
         self.assertEqual(entry.calculated_qty_to_order, Decimal("24"))
+
+
+class StockSnapshotTests(TestCase):
+    def setUp(self):
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.location = Location.objects.create(name="Test Location")
+        self.item = InventoryItem.objects.create(
+            name="Oat Milk",
+            pack_size=6,
+            par_level=Decimal("12"),
+            order_point=Decimal("4"),
+            location=self.location,
+            frequency=self.frequency
+        )
+
+    def _submit_sheet(self, count_date, on_hand):
+        sheet = CountSheet.objects.create(
+            location=self.location,
+            frequency=self.frequency,
+            count_date=count_date
+        )
+        CountEntry.objects.create(
+            sheet=sheet, item=self.item, on_hand_quantity=Decimal(on_hand)
+        )
+        sheet.submit(None)
+        return sheet
+
+    def test_submit_upserts_snapshot(self):
+        self._submit_sheet(date(2025, 1, 1), "2")
+        self._submit_sheet(date(2025, 1, 2), "20")
+
+        snapshot = StockSnapshot.objects.get(location=self.location, item=self.item)
+        self.assertEqual(snapshot.on_hand_quantity, Decimal("20"))
+        self.assertEqual(snapshot.highlight_state, CountEntry.HIGHLIGHT_GREEN)
+        self.assertEqual(snapshot.count_date, date(2025, 1, 2))
+
+    def test_older_sheet_does_not_overwrite_newer_snapshot(self):
+        self._submit_sheet(date(2025, 1, 2), "20")
+        self._submit_sheet(date(2025, 1, 1), "2")
+
+        snapshot = StockSnapshot.objects.get(location=self.location, item=self.item)
+        self.assertEqual(snapshot.count_date, date(2025, 1, 2))
+
+    def test_low_stock_reads_snapshots(self):
+        self.assertFalse(InventoryItem.objects.low_stock().exists())
+        self._submit_sheet(date(2025, 1, 1), "2")
+
+        self.assertEqual(list(InventoryItem.objects.low_stock()), [self.item])
+        self.assertEqual(
+            list(InventoryItem.objects.low_stock(location=self.location)), [self.item]
+        )
+
+
+class CountEntryHistoryTests(TestCase):
+    def setUp(self):
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.location = Location.objects.create(name="Test Location")
+        self.item = InventoryItem.objects.create(
+            name="Oat Milk",
+            pack_size=6,
+            par_level=Decimal("12"),
+            order_point=Decimal("4"),
+            location=self.location,
+            frequency=self.frequency
+        )
+
+    def _entry(self, count_date, **kwargs):
+        sheet = CountSheet.objects.create(
+            location=self.location, frequency=self.frequency, count_date=count_date)
+        return CountEntry.objects.create(sheet=sheet, item=self.item, **kwargs)
+
+    def test_count_date_follows_sheet(self):
+        entry = self._entry(date(2025, 1, 5))
+        self.assertEqual(entry.count_date, date(2025, 1, 5))
+
+        entry.sheet.count_date = date(2025, 1, 6)
+        entry.sheet.save()
+        entry.refresh_from_db()
+        self.assertEqual(entry.count_date, date(2025, 1, 6))
+
+    def test_counted_between_skips_deleted_and_out_of_range(self):
+        old = self._entry(date(2025, 1, 5))
+        recent = self._entry(date(2025, 3, 5))
+        deleted = self._entry(date(2025, 3, 6), deleted_at=timezone.now())
+
+        qs = CountEntry.objects.counted_between(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(list(qs), [recent])
+        self.assertEqual(set(CountEntry.objects.counted_between(end=date(2025, 2, 1))), {old})
+        self.assertNotIn(deleted, CountEntry.objects.counted_between())
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="history", password="pw"))
+        response = client.get("/api/count-entries/", {"since": "2025-03-01"})
+        self.assertEqual([row["id"] for row in response.json()["results"]], [recent.pk])
+        response = client.get("/api/count-entries/", {"since": "2025-02-30"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_count_history_command_backfills_and_purges(self):
+        kept = self._entry(date(2025, 1, 5), deleted_at=timezone.now())
+        purged = self._entry(date(2024, 12, 5), deleted_at=timezone.now())
+        live = self._entry(date(2024, 12, 6))
+        CountEntry.objects.update(count_date=None)
+
+        out = StringIO()
+        call_command(
+            "count_history", "--backfill", "--purge-deleted-before", "2025-01-01",
+            "--batch-size", "1", stdout=out,
+        )
+
+        self.assertFalse(CountEntry.objects.filter(pk=purged.pk).exists())
+        self.assertEqual(
+            dict(CountEntry.objects.values_list("pk", "count_date")),
+            {kept.pk: date(2025, 1, 5), live.pk: date(2024, 12, 6)},
+        )
+        self.assertIn("Backfilled count_date on 3 entries", out.getvalue())
+        self.assertIn("2024-12  live         1  deleted         0", out.getvalue())
+
+
+class SheetArchiveTests(TestCase):
+    def setUp(self):
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.location = Location.objects.create(name="Test Location")
+        self.items = [
+            InventoryItem.objects.create(
+                name=name, pack_size=6, par_level=Decimal("12"), order_point=Decimal("4"),
+                location=self.location, frequency=self.frequency,
+            )
+            for name in ("Oat Milk", "Soy Milk")
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user(username="archivist", password="pw", role=UserRole.ADMIN))
+
+    def _submitted_sheet(self, count_date):
+        sheet = CountSheet.objects.create(
+            location=self.location, frequency=self.frequency, count_date=count_date)
+        for on_hand, item in enumerate(self.items):
+            CountEntry.objects.create(sheet=sheet, item=item, on_hand_quantity=Decimal(on_hand))
+        sheet.submit(None)
+        return sheet
+
+    def test_archived_sheet_reads_through_reports_api(self):
+        old = self._submitted_sheet(date(2024, 1, 1))
+        recent = self._submitted_sheet(timezone.localdate())
+        report = Report.objects.get(period_start=old.count_date)
+        before = self.client.get(f"/api/reports/{report.pk}/").json()
+
+        out = StringIO()
+        call_command("archive_sheets", "--days", "30", stdout=out)
+
+        self.assertIn("Archived 1 sheets (2 entries)", out.getvalue())
+        old.refresh_from_db()
+        self.assertEqual(old.status, "archived")
+        self.assertEqual(old.entry_count, 2)
+        self.assertFalse(CountEntry.objects.filter(sheet=old).exists())
+        self.assertEqual(CountEntry.objects.filter(sheet=recent).count(), 2)
+        archive = SheetArchive.objects.get(sheet=old)
+        self.assertEqual(archive.entry_count, 2)
+        self.assertEqual(list(archive.reports.all()), [report])
+
+        after = self.client.get(f"/api/reports/{report.pk}/").json()
+        self.assertEqual(after["count_entries"], before["count_entries"])
+        self.assertEqual(len(after["count_entries"]), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            listed = self.client.get("/api/reports/", {"location": self.location.pk}).json()
+        archive_queries = [q["sql"] for q in queries if 'FROM "counts_sheetarchive"' in q["sql"]]
+        self.assertEqual(len(archive_queries), 1)
+        self.assertNotIn('"payload"', archive_queries[0])
+        row = next(r for r in listed["results"] if r["id"] == report.pk)
+        self.assertEqual((row["count_entries"], row["archived_sheets"]), ([], [old.pk]))
+
+        listed = self.client.get("/api/reports/", {"include_archived": "1"}).json()
+        row = next(r for r in listed["results"] if r["id"] == report.pk)
+        self.assertEqual(row["count_entries"], before["count_entries"])
+
+    def test_dry_run_and_repeat_runs_are_safe(self):
+        old = self._submitted_sheet(date(2024, 1, 1))
+        out = StringIO()
+        call_command("archive_sheets", "--days", "30", "--dry-run", stdout=out)
+        self.assertIn("1 sheets", out.getvalue())
+        self.assertFalse(SheetArchive.objects.exists())
+
+        call_command("archive_sheets", "--days", "30", stdout=StringIO())
+        call_command("archive_sheets", "--days", "30", stdout=StringIO())
+        self.assertEqual(SheetArchive.objects.filter(sheet=old).count(), 1)
+        self.assertIsNone(SheetArchive.objects.archive_sheet(old))
+
+
+class CountSyncTests(TestCase):
+    def setUp(self):
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.location = Location.objects.create(name="Test Location")
+        self.items = [
+            InventoryItem.objects.create(
+                name=name, pack_size=6, par_level=Decimal("12"), order_point=Decimal("4"),
+                location=self.location, frequency=self.frequency,
+            )
+            for name in ("Oat Milk", "Soy Milk")
+        ]
+        self.sheet = CountSheet.objects.create(location=self.location, frequency=self.frequency)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="counter", password="pw"))
+        self.offline_at = timezone.now() - timedelta(minutes=30)
+
+    def _op(self, op_id, item, minutes=0, **fields):
+        return {
+            "op_id": op_id, "item": item.pk,
+            "updated_at": (self.offline_at + timedelta(minutes=minutes)).isoformat(), **fields,
+        }
+
+    def _sync(self, operations=(), token=None):
+        response = self.client.post("/api/sync/", {
+            "sheet": self.sheet.pk, "device_id": "tablet-1",
+            "token": token, "operations": list(operations),
+        }, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_batch_applies_and_retries_are_deduplicated(self):
+        operations = [
+            self._op("op-1", self.items[0], on_hand_quantity="3"),
+            self._op("op-2", self.items[1], on_hand_quantity="8", notes="back shelf"),
+            self._op("op-3", self.items[0], minutes=5, on_hand_quantity="2"),
+        ]
+        first = self._sync(operations)
+
+        self.assertEqual([r["status"] for r in first["results"]], ["applied"] * 3)
+        entry = CountEntry.objects.get(sheet=self.sheet, item=self.items[0])
+        self.assertEqual(entry.on_hand_quantity, Decimal("2"))
+        self.assertEqual(entry.highlight_state, CountEntry.HIGHLIGHT_RED)
+        self.assertEqual({c["id"] for c in first["changes"]},
+                         set(CountEntry.objects.values_list("pk", flat=True)))
+
+        retry = self._sync(operations)
+        self.assertTrue(all(r["duplicate"] for r in retry["results"]))
+        self.assertEqual([r["entry"] for r in retry["results"]],
+                         [r["entry"] for r in first["results"]])
+        self.assertEqual(CountEntry.objects.count(), 2)
+        self.assertEqual(SyncOperation.objects.count(), 3)
+
+    def test_last_writer_wins_and_deletes(self):
+        entry = CountEntry.objects.create(
+            sheet=self.sheet, item=self.items[0], on_hand_quantity=Decimal("7"))
+
+        result = self._sync([
+            self._op("stale", self.items[0], on_hand_quantity="1"),
+        ])["results"][0]
+        self.assertEqual((result["status"], result["entry"]), ("stale", entry.pk))
+        entry.refresh_from_db()
+        self.assertEqual(entry.on_hand_quantity, Decimal("7"))
+
+        later = (timezone.now() + timedelta(seconds=1)).isoformat()
+        result = self._sync([{
+            "op_id": "delete", "type": "delete", "item": self.items[0].pk, "updated_at": later,
+        }])["results"][0]
+        self.assertEqual(result["status"], "applied")
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.deleted_at)
+
+    def test_returns_changes_since_token(self):
+        old = CountEntry.objects.create(sheet=self.sheet, item=self.items[0])
+        CountEntry.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        token = (timezone.now() - timedelta(minutes=30)).isoformat()
+
+        data = self._sync([self._op("new", self.items[1], on_hand_quantity="4")], token=token)
+        self.assertEqual([c["item_name"] for c in data["changes"]], ["Soy Milk"])
+        self.assertTrue(data["token"])
+
+        self.sheet.status = "submitted"
+        self.sheet.save()
+        result = self._sync([self._op("late", self.items[0], minutes=90)])["results"][0]
+        self.assertEqual(result["status"], "rejected")
+
+    def test_rejects_malformed_token(self):
+        for token in ("yesterday", "2031-13-45T00:00:00"):
+            response = self.client.post("/api/sync/", {
+                "sheet": self.sheet.pk, "device_id": "tablet-1", "token": token,
+            }, format="json")
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["token"], ["Invalid sync token."])
+
+
+class CountEntryUpsertTests(TestCase):
+    def setUp(self):
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.location = Location.objects.create(name="Test Location")
+        self.items = [
+            InventoryItem.objects.create(
+                name=name, pack_size=6, par_level=Decimal("12"), order_point=Decimal("4"),
+                location=self.location, frequency=self.frequency,
+            )
+            for name in ("Oat Milk", "Soy Milk")
+        ]
+        self.sheet = CountSheet.objects.create(location=self.location, frequency=self.frequency)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="counter", password="pw"))
+
+    def _upsert(self, rows, expected=200):
+        response = self.client.post("/api/count-entries/upsert/", rows, format="json")
+        self.assertEqual(response.status_code, expected, response.content)
+        return response.json()
+
+    def test_creates_then_updates_with_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = self._upsert([
+                {"sheet": self.sheet.pk, "item": self.items[0].pk, "on_hand_quantity": "3", "notes": "cooler"},
+                {"sheet": self.sheet.pk, "item": self.items[1].pk, "on_hand_quantity": "20"},
+            ])
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "counts_countentry"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual([row["created"] for row in first["entries"]], [True, True])
+
+        second = self._upsert({"entries": [
+            {"sheet": self.sheet.pk, "item": self.items[0].pk, "on_hand_quantity": "1"},
+        ]})
+        self.assertEqual(second["entries"][0]["id"], first["entries"][0]["id"])
+        self.assertFalse(second["entries"][0]["created"])
+
+        entry = CountEntry.objects.get(sheet=self.sheet, item=self.items[0])
+        self.assertEqual((entry.on_hand_quantity, entry.notes), (Decimal("1"), "cooler"))
+        self.assertEqual(entry.count_date, self.sheet.count_date)
+        self.assertIsNotNone(entry.item_version_id)
+        expected = entry.perform_calculation()
+        self.assertEqual(
+            (entry.calculated_qty_to_order, entry.calculated_order_units, entry.highlight_state),
+            (expected.qty_to_order, expected.order_units, expected.highlight_state),
+        )
+        self.assertEqual(CountEntry.objects.filter(sheet=self.sheet).count(), 2)
+
+        detail = self.client.get(f"/api/count-entries/{entry.pk}/").json()
+        for field in ("on_hand_quantity", "calculated_qty_to_order", "calculated_order_units"):
+            self.assertEqual(second["entries"][0][field], detail[field])
+        self.assertEqual(second["entries"][0]["on_hand_quantity"], "1.00")
+
+    def test_chunks_insert_by_backend_parameter_limit(self):
+        self.items.append(InventoryItem.objects.create(
+            name="Rice Milk", pack_size=6, par_level=Decimal("12"), order_point=Decimal("4"),
+            location=self.location, frequency=self.frequency,
+        ))
+        rows = [{"sheet": self.sheet.pk, "item": item.pk, "on_hand_quantity": "3"} for item in self.items]
+        # Room for two rows of parameters per statement.
+        with mock.patch.object(connection.features, "max_query_params", 40), \
+                CaptureQueriesContext(connection) as queries:
+            body = self._upsert(rows)
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "counts_countentry"')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual([row["created"] for row in body["entries"]], [True, True, True])
+        self.assertEqual(
+            set(CountEntry.objects.filter(sheet=self.sheet).values_list("item_id", flat=True)),
+            {item.pk for item in self.items},
+        )
+        self.assertEqual(len({row["id"] for row in body["entries"]}), 3)
+
+    def test_rejects_batch_with_unknown_item_or_submitted_sheet(self):
+        body = self._upsert([
+            {"sheet": self.sheet.pk, "item": self.items[0].pk, "on_hand_quantity": "3"},
+            {"sheet": self.sheet.pk, "item": 999999, "on_hand_quantity": "3"},
+        ], expected=400)
+        self.assertEqual(body["error"], ["Inventory item 999999 does not exist."])
+
+        CountSheet.objects.filter(pk=self.sheet.pk).update(status="submitted")
+        self._upsert([{"sheet": self.sheet.pk, "item": self.items[0].pk, "on_hand_quantity": "3"}],
+                     expected=400)
+        self.assertFalse(CountEntry.objects.exists())
+
+    def test_only_one_live_entry_per_sheet_item(self):
+        entry = CountEntry.objects.create(sheet=self.sheet, item=self.items[0], on_hand_quantity=1)
+        response = self.client.post("/api/count-entries/create/", {
+            "sheet": self.sheet.pk, "item": self.items[0].pk, "on_hand_quantity": "2",
+        }, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        entry.soft_delete(None)
+        created = self._upsert([{"sheet": self.sheet.pk, "item": self.items[0].pk, "on_hand_quantity": "2"}])
+        self.assertTrue(created["entries"][0]["created"])
+        self.assertEqual(CountEntry.objects.filter(sheet=self.sheet, item=self.items[0]).count(), 2)
+
+
+class SheetCounterTests(TestCase):
+    def setUp(self):
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.location = Location.objects.create(name="Test Location")
+        self.items = [
+            InventoryItem.objects.create(
+                name=f"Item {n}", pack_size=6, par_level=Decimal("12"), order_point=Decimal("4"),
+                location=self.location, frequency=self.frequency,
+            )
+            for n in range(3)
+        ]
+        self.sheet = CountSheet.objects.create(location=self.location, frequency=self.frequency)
+
+    def _counters(self):
+        sheet = CountSheet.objects.get(pk=self.sheet.pk)
+        return (sheet.entry_count, sheet.counted_count, sheet.red_count, sheet.yellow_count,
+                sheet.green_count, sheet.total_order_units)
+
+    def test_entry_writes_move_counters(self):
+        entries = [
+            CountEntry.objects.create(sheet=self.sheet, item=item, on_hand_quantity=quantity)
+            for item, quantity in zip(self.items, (2, 8, 20))
+        ]
+        self.assertEqual(self._counters(), (3, 3, 1, 1, 1, Decimal("3")))
+
+        entry = CountEntry.objects.get(pk=entries[0].pk)
+        entry.on_hand_quantity = 12
+        entry.save()
+        self.assertEqual(self._counters(), (3, 3, 0, 1, 2, Decimal("1")))
+
+        entries[1].soft_delete(None)
+        self.assertEqual(self._counters(), (2, 2, 0, 0, 2, Decimal("0")))
+
+        CountEntry.objects.get(pk=entries[2].pk).delete()
+        self.assertEqual(self._counters(), (1, 1, 0, 0, 1, Decimal("0")))
+
+        CountEntry.objects.filter(sheet=self.sheet).delete()
+        self.assertEqual(self._counters(), (0, 0, 0, 0, 0, Decimal("0")))
+
+    def test_only_quantity_changes_mark_entries_counted(self):
+        entry = CountEntry.objects.create(sheet=self.sheet, item=self.items[0], on_hand_quantity=2)
+        CountEntry.objects.filter(pk=entry.pk).update(counted_at=None)
+        CountSheet.objects.filter(pk=self.sheet.pk).refresh_counters()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="counter", password="pw"))
+        url = reverse("api:countentry-update", args=[entry.pk])
+
+        client.patch(url, {"notes": "top shelf"}, format="json")
+        self.assertIsNone(CountEntry.objects.get(pk=entry.pk).counted_at)
+        self.assertEqual(self._counters()[1], 0)
+
+        client.patch(url, {"on_hand_quantity": "2"}, format="json")
+        counted_at = CountEntry.objects.get(pk=entry.pk).counted_at
+        self.assertIsNotNone(counted_at)
+        self.assertEqual(self._counters()[1], 1)
+
+        client.patch(url, {"notes": "moved", "on_hand_quantity": "2.00"}, format="json")
+        self.assertEqual(CountEntry.objects.get(pk=entry.pk).counted_at, counted_at)
+        client.patch(url, {"on_hand_quantity": "3"}, format="json")
+        self.assertGreater(CountEntry.objects.get(pk=entry.pk).counted_at, counted_at)
+
+    def test_sheet_saves_and_bulk_writes_keep_counters(self):
+        stale = CountSheet.objects.get(pk=self.sheet.pk)
+        CountEntry.objects.create(sheet=self.sheet, item=self.items[0], on_hand_quantity=2)
+        stale.notes = "edited"
+        stale.save()
+        self.assertEqual(self._counters(), (1, 1, 1, 0, 0, Decimal("2")))
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="counter", password="pw"))
+        client.post("/api/count-entries/upsert/", [
+            {"sheet": self.sheet.pk, "item": self.items[0].pk, "on_hand_quantity": "20"},
+            {"sheet": self.sheet.pk, "item": self.items[1].pk, "on_hand_quantity": "8"},
+        ], format="json")
+        self.assertEqual(self._counters(), (2, 2, 0, 1, 1, Decimal("1")))
+
+        response = client.get(f"/api/count-sheets/{self.sheet.pk}/")
+        self.assertEqual(response.data["entry_count"], 2)
+        self.assertEqual(response.data["total_order_units"], "1.00")
+
+        CountSheet.objects.update(entry_count=0, counted_count=0, yellow_count=0, green_count=0)
+        call_command("count_history", "--recount-sheets", stdout=StringIO())
+        self.assertEqual(self._counters(), (2, 2, 0, 1, 1, Decimal("1")))
+
+
+class CopyForwardTests(TestCase):
+    def setUp(self):
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.location = Location.objects.create(name="Test Location")
+        self.items = [
+            InventoryItem.objects.create(
+                name=f"Item {n}", pack_size=6, par_level=Decimal("12"), order_point=Decimal("4"),
+                location=self.location, frequency=self.frequency,
+            )
+            for n in range(4)
+        ]
+        self.previous = CountSheet.objects.create(
+            location=self.location, frequency=self.frequency, count_date=date(2024, 3, 1))
+        for item, on_hand in zip(self.items, (2, 8, 20, 5)):
+            CountEntry.objects.create(sheet=self.previous, item=item, on_hand_quantity=on_hand, notes=f"n{on_hand}")
+        CountEntry.objects.get(sheet=self.previous, item=self.items[2]).soft_delete(None)
+        self.previous.submit(None)
+        InventoryItem.objects.filter(pk=self.items[3].pk).update(is_active=False)
+        CountSheet.objects.create(location=self.location, frequency=self.frequency, count_date=date(2024, 2, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="counter", password="pw"))
+
+    def _create(self, **extra):
+        response = self.client.post("/api/count-sheets/create/", {
+            "location": self.location.pk, "frequency": self.frequency.pk, "count_date": "2024-03-02", **extra,
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def test_copies_live_entries_of_previous_submitted_sheet(self):
+        with CaptureQueriesContext(connection) as queries:
+            sheet = self._create(copy_forward=True)
+        inserts = [q for q in queries if q["sql"].lstrip().startswith('INSERT INTO "counts_countentry"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual((sheet["entry_count"], sheet["counted_count"], sheet["red_count"]), (2, 0, 1))
+
+        entries = CountEntry.objects.filter(sheet_id=sheet["id"]).order_by("item__name")
+        self.assertEqual(
+            [(e.item_id, e.on_hand_quantity, e.notes) for e in entries],
+            [(self.items[0].pk, Decimal("2"), "n2"), (self.items[1].pk, Decimal("8"), "n8")],
+        )
+        self.assertTrue(all(e.count_date == date(2024, 3, 2) and e.counted_at is None for e in entries))
+        self.assertTrue(all(e.item_version_id for e in entries))
+
+    def test_recalculates_under_current_parameters(self):
+        item = InventoryItem.objects.get(pk=self.items[0].pk)
+        item.par_level = Decimal("2")
+        item.save()
+
+        sheet = self._create(copy_forward=True)
+        self.assertEqual((sheet["red_count"], sheet["green_count"]), (0, 1))
+        entry = CountEntry.objects.get(sheet_id=sheet["id"], item=item)
+        self.assertEqual(
+            (entry.calculated_qty_to_order, entry.highlight_state), (Decimal("0"), CountEntry.HIGHLIGHT_GREEN))
+        self.assertEqual(
+            CountEntry.objects.get(sheet=self.previous, item=item).highlight_state, CountEntry.HIGHLIGHT_RED)
+
+    def test_plain_create_starts_empty(self):
+        sheet = self._create()
+        self.assertEqual(sheet["entry_count"], 0)
+        self.assertFalse(CountEntry.objects.filter(sheet_id=sheet["id"]).exists())
+
+
+class GenerateDueSheetsTests(TestCase):
+    def setUp(self):
+        self.daily = Frequency.objects.create(frequency_name="Daily", interval_days=1)
+        self.weekly = Frequency.objects.create(frequency_name="Weekly", interval_days=7, weekday=Weekday.WEDNESDAY)
+        Frequency.objects.create(frequency_name="Ad hoc")
+        self.location = Location.objects.create(name="Open Store")
+        closed = Location.objects.create(name="Closed Store", is_active=False)
+        self.milk, self.eggs, self.flour = [
+            InventoryItem.objects.create(
+                name=name, par_level=Decimal("12"), order_point=Decimal("4"),
+                location=self.location, frequency=frequency,
+            )
+            for name, frequency in (("Milk", self.daily), ("Eggs", self.daily), ("Flour", self.weekly))
+        ]
+        InventoryItem.objects.create(name="Retired", location=self.location, frequency=self.daily, is_active=False)
+        InventoryItem.objects.create(name="Elsewhere", location=closed, frequency=self.daily)
+        self.monday = date(2024, 4, 1)
+
+    def _generate(self, *args):
+        out = StringIO()
+        call_command("generate_due_sheets", "--date", str(self.monday), "--days-ahead", "6", *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_due_sheets_with_uncounted_entries_once(self):
+        self.assertIn("Created 8 sheets (15 entries)", self._generate())
+        sheets = CountSheet.objects.order_by("count_date", "frequency__frequency_name")
+        self.assertEqual(
+            [(s.frequency_id, s.count_date) for s in sheets if s.frequency_id == self.weekly.pk],
+            [(self.weekly.pk, date(2024, 4, 3))],
+        )
+        daily = sheets.filter(frequency=self.daily).first()
+        self.assertEqual(
+            set(daily.entries.values_list("item_id", flat=True)), {self.milk.pk, self.eggs.pk})
+        self.assertEqual((daily.entry_count, daily.counted_count, daily.red_count), (2, 0, 2))
+        self.assertFalse(CountEntry.objects.filter(counted_at__isnull=False).exists())
+
+        self.assertIn("Created 0 sheets", self._generate())
+        self.assertEqual(CountSheet.objects.count(), 8)
+
+    def test_copy_forward_and_dry_run(self):
+        previous = CountSheet.objects.create(
+            location=self.location, frequency=self.daily, count_date=self.monday - timedelta(days=1))
+        CountEntry.objects.create(sheet=previous, item=self.milk, on_hand_quantity=9)
+        previous.submit(None)
+
+        self.assertIn("8 sheets (15 entries)", self._generate("--dry-run"))
+        self.assertEqual(CountSheet.objects.count(), 1)
+
+        self._generate("--copy-forward")
+        entries = CountEntry.objects.filter(sheet__count_date=self.monday)
+        self.assertEqual(
+            dict(entries.values_list("item_id", "on_hand_quantity")),
+            {self.milk.pk: Decimal("9"), self.eggs.pk: Decimal("0")},
+        )
+
+    def test_cadence(self):
+        biweekly = Frequency(frequency_name="Biweekly", interval_days=14, weekday=Weekday.FRIDAY)
+        due = [day for day in (self.monday + timedelta(days=n) for n in range(28)) if biweekly.is_due_on(day)]
+        self.assertEqual(len(due), 2)
+        self.assertEqual(due[1] - due[0], timedelta(days=14))
+        self.assertTrue(all(day.weekday() == Weekday.FRIDAY for day in due))
+        self.assertFalse(Frequency(frequency_name="Manual").is_due_on(self.monday))
+        with self.assertRaises(ValidationError):
+            Frequency(frequency_name="Odd", interval_days=3, weekday=Weekday.MONDAY).clean()
+
+
+class CountStatusTests(TestCase):
+    def setUp(self):
+        self.daily = Frequency.objects.create(frequency_name="Daily", interval_days=1, cutoff_time=time(17))
+        self.weekly = Frequency.objects.create(frequency_name="Weekly", interval_days=7, weekday=Weekday.WEDNESDAY)
+        self.adhoc = Frequency.objects.create(frequency_name="Ad hoc")
+        self.location = Location.objects.create(name="Store")
+        for frequency in (self.daily, self.weekly, self.adhoc):
+            InventoryItem.objects.create(name=frequency.frequency_name, location=self.location, frequency=frequency)
+        self.monday = date(2024, 4, 1)
+
+    def _status(self, hour=10):
+        now = timezone.make_aware(datetime.combine(self.monday, time(hour)))
+        return {row["frequency"]: row for row in count_status.compute(self.monday, now)}
+
+    def test_due_overdue_and_unscheduled_without_sheets(self):
+        with self.assertNumQueries(1):
+            rows = self._status()
+        self.assertEqual(rows[self.daily.pk]["status"], count_status.DUE)
+        self.assertEqual(rows[self.daily.pk]["deadline"].time(), time(17))
+        self.assertEqual(rows[self.weekly.pk]["status"], count_status.OVERDUE)
+        self.assertEqual(rows[self.weekly.pk]["due_date"], date(2024, 3, 27))
+        self.assertEqual(rows[self.adhoc.pk]["status"], count_status.UNSCHEDULED)
+        self.assertIsNone(rows[self.daily.pk]["sheet"])
+
+    def test_in_progress_overdue_and_submitted_sheets(self):
+        sheet = CountSheet.objects.create(location=self.location, frequency=self.daily, count_date=self.monday)
+        weekly = CountSheet.objects.create(
+            location=self.location, frequency=self.weekly, count_date=date(2024, 3, 27))
+        weekly.submit(None)
+        CountSheet.objects.create(location=self.location, frequency=self.weekly, count_date=date(2024, 4, 3))
+
+        rows = self._status()
+        self.assertEqual(rows[self.daily.pk]["status"], count_status.IN_PROGRESS)
+        self.assertEqual(rows[self.daily.pk]["sheet"]["id"], sheet.pk)
+        self.assertEqual(rows[self.weekly.pk]["status"], count_status.SUBMITTED)
+        self.assertEqual(rows[self.weekly.pk]["sheet"]["id"], weekly.pk)
+        self.assertIsNotNone(rows[self.weekly.pk]["last_submitted_at"])
+        self.assertEqual(self._status(hour=18)[self.daily.pk]["status"], count_status.OVERDUE)
+
+        sheet.submit(None)
+        self.assertEqual(self._status(hour=18)[self.daily.pk]["status"], count_status.SUBMITTED)
+
+    def test_endpoint_is_cached_until_a_sheet_changes(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username="viewer", password="pw"))
+        url = reverse("api:count-status")
+        self.assertEqual(len(client.get(url).json()), 3)
+        # Only the version row is read on a cache hit.
+        with self.assertNumQueries(1):
+            client.get(url)
+
+        CountSheet.objects.create(location=self.location, frequency=self.adhoc, count_date=timezone.localdate())
+        rows = client.get(url, {"status": "in_progress"}).json()
+        self.assertEqual([row["frequency"] for row in rows], [self.adhoc.pk])
+        self.assertEqual(client.get(url, {"location": "x"}).status_code, 400)
+
+
+class SubmitBatchTests(TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(name="Store")
+        self.frequencies = [Frequency.objects.create(frequency_name=f"List {n}") for n in range(3)]
+        self.item = InventoryItem.objects.create(
+            name="Shared", par_level=Decimal("12"), order_point=Decimal("4"),
+            location=self.location, frequency=self.frequencies[0])
+        self.sheets = []
+        for n, frequency in enumerate(self.frequencies):
+            sheet = CountSheet.objects.create(
+                location=self.location, frequency=frequency, count_date=date(2024, 3, 1 + n))
+            CountEntry.objects.create(sheet=sheet, item=self.item, on_hand_quantity=n + 1)
+            self.sheets.append(sheet)
+        self.existing = Report.objects.create(
+            location=self.location, frequency=self.frequencies[0], period_start=date(2024, 3, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username="closer", password="pw"))
+        self.url = reverse("api:countsheet-submit-batch")
+
+    def test_submits_all_sheets_with_reports_snapshots_and_events(self):
+        ids = [sheet.pk for sheet in self.sheets]
+        response = self.client.post(self.url, {"sheets": ids}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.json()["sheets"]
+        self.assertEqual([row["id"] for row in results], ids)
+        self.assertEqual(results[0]["report"], self.existing.pk)
+
+        self.assertFalse(CountSheet.objects.filter(status=CountSheetStatus.DRAFT).exists())
+        self.assertEqual(Report.objects.count(), 3)
+        for sheet, row in zip(self.sheets, results):
+            self.assertEqual(
+                list(Report.objects.get(pk=row["report"]).count_entries.values_list("sheet_id", flat=True)),
+                [sheet.pk])
+        snapshot = StockSnapshot.objects.get(item=self.item)
+        self.assertEqual((snapshot.sheet_id, snapshot.on_hand_quantity), (self.sheets[2].pk, Decimal("3")))
+        events = OutboxEvent.objects.filter(topic=outbox.SHEET_SUBMITTED).order_by("pk")
+        self.assertEqual([event.payload["sheet_id"] for event in events], ids)
+        self.assertEqual(events[1].payload["entries"][0]["item_id"], self.item.pk)
+
+    def test_one_invalid_sheet_submits_nothing(self):
+        self.sheets[1].submit(None)
+        response = self.client.post(self.url, {"sheets": [self.sheets[0].pk, self.sheets[1].pk, 999999]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["sheets"]), {str(self.sheets[1].pk), "999999"})
+        self.assertEqual(CountSheet.objects.get(pk=self.sheets[0].pk).status, CountSheetStatus.DRAFT)
+        self.assertEqual(self.client.post(self.url, {"sheets": []}, format="json").status_code, 400)
+
+    def test_query_count_does_not_grow_with_sheets(self):
+        def submit(sheets):
+            with CaptureQueriesContext(connection) as queries:
+                CountSheet.objects.submit_batch([sheet.pk for sheet in sheets], None)
+            return len(queries)
+
+        single = submit(self.sheets[:1])
+        self.assertEqual(submit(self.sheets[1:]), single)
+
+    def test_single_submit_rejects_non_draft(self):
+        self.sheets[0].submit(None)
+        response = self.client.post(reverse("api:countsheet-submit", args=[self.sheets[0].pk]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"detail": "Only draft sheets can be submitted."})
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import CountEntryViewSet, CountSheetViewSet
+from .views import CountEntryViewSet, CountSheetViewSet, CountStatusView, CountSyncView, StockSnapshotViewSet
 
 urlpatterns = [
     path(
@@ -12,6 +12,11 @@ urlpatterns = [
         CountEntryViewSet.as_view({"post": "create"}),
         name="countentry-create",
     ),
+    path(
+        "count-entries/upsert/",
+        CountEntryViewSet.as_view({"post": "upsert"}),
+        name="countentry-upsert",
+    ),
     path(
         "count-entries/<int:pk>/",
         CountEntryViewSet.as_view({"get": "retrieve"}),
@@ -54,9 +59,21 @@ urlpatterns = [
         CountSheetViewSet.as_view({"delete": "destroy"}),
         name="countsheet-delete",
     ),
+    path(
+        "count-sheets/submit-batch/",
+        CountSheetViewSet.as_view({"post": "submit_batch"}),
+        name="countsheet-submit-batch",
+    ),
     path(
         "count-sheets/<int:pk>/submit/",
         CountSheetViewSet.as_view({"post": "submit"}),
         name="countsheet-submit",
     ),
+    path(
+        "stock/",
+        StockSnapshotViewSet.as_view({"get": "list"}),
+        name="stocksnapshot-list",
+    ),
+    path("sync/", CountSyncView.as_view(), name="count-sync"),
+    path("counts/status/", CountStatusView.as_view(), name="count-status"),
 ]
@@ -1,11 +1,21 @@
 from rest_framework import status
-from .models import CountEntry, CountSheet
+from django.utils.dateparse import parse_date
+from django.utils import timezone
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from core import changelog
+from . import status as count_status
+from rest_framework.views import APIView
+from .models import SHEET_COUNTER_FIELDS, CountEntry, CountSheet, StockSnapshot, SyncOperation
 from rest_framework import viewsets, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
-from .serializers import CountEntrySerializer, CountSheetSerializer
+from .serializers import (
+    MAX_UPSERT_ENTRIES, CountEntrySerializer, CountEntryUpsertSerializer, CountSheetSerializer,
+    CountSheetSubmitBatchSerializer, StockSnapshotSerializer, SyncRequestSerializer
+)
 
 class CountEntryViewSet(viewsets.ModelViewSet):
     serializer_class = CountEntrySerializer
@@ -13,57 +23,229 @@ class CountEntryViewSet(viewsets.ModelViewSet):
     filter_backends = (filters.OrderingFilter,)
     ordering_fields = ("item__display_order", "item__name",)
     ordering = ("item__display_order", "item__name",)
-    queryset = CountEntry.objects.select_related(
-        "sheet", "sheet__location", "item"
+    queryset = CountEntry.objects.with_effective_parameters().select_related(
+        "sheet", "sheet__location", "item", "item__vendor", "item__brand", "item_version",
+        "created_by", "updated_by", "deleted_by"
     )
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        sheet_id = self.request.query_params.get("sheet")
+        if sheet_id and sheet_id.isdigit():
+            qs = qs.filter(sheet_id=int(sheet_id))
+        bounds = {}
+        for param in ("since", "until"):
+            value = self.request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                bounds[param] = parse_date(value)
+            except ValueError:
+                bounds[param] = None
+            if bounds[param] is None:
+                raise ValidationError({param: "Use YYYY-MM-DD."})
+        if bounds:
+            qs = qs.counted_between(bounds.get("since"), bounds.get("until"))
+        return qs
+
     def create(self, request, *args, **kwargs):
         many = isinstance(request.data, list)
         serializer = self.get_serializer(data=request.data, many=many)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        try:
+            with transaction.atomic(), changelog.batch():
+                self.perform_create(serializer)
+        except IntegrityError:
+            return Response(
+                {"error": "An item can only be counted once per sheet."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user, updated_by=self.request.user)
 
+    @action(detail=False, methods=['post'], url_path='upsert')
+    def upsert(self, request):
+        """Create or update entries by (sheet, item), without looking them up first.
+
+        Accepts a list of ``{"sheet", "item", "on_hand_quantity", "notes"?}``
+        rows or ``{"entries": [...]}``, and writes them in one statement.
+        """
+        payload = request.data.get("entries") if isinstance(request.data, dict) else request.data
+        serializer = CountEntryUpsertSerializer(
+            data=payload, many=True, allow_empty=False, max_length=MAX_UPSERT_ENTRIES)
+        serializer.is_valid(raise_exception=True)
+        try:
+            entries = CountEntry.objects.upsert(serializer.validated_data, user=request.user)
+        except DjangoValidationError as e:
+            return Response({"error": e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "entries": [
+                {
+                    "id": entry.pk,
+                    "sheet": entry.sheet_id,
+                    "item": entry.item_id,
+                    "created": entry.created,
+                    "on_hand_quantity": str(entry.on_hand_quantity),
+                    "calculated_qty_to_order": str(entry.calculated_qty_to_order),
+                    "calculated_order_units": str(entry.calculated_order_units),
+                    "highlight_state": entry.highlight_state,
+                }
+                for entry in entries
+            ]
+        }, status=status.HTTP_200_OK)
+
     def perform_update(self, serializer):
-        serializer.save(updated_by=self.request.user)
+        with transaction.atomic(), changelog.batch():
+            serializer.save(updated_by=self.request.user)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(), changelog.batch():
+            instance.delete()
 
     @action(detail=True, methods=['post'], url_path='soft-delete')
     def soft_delete(self, request, pk=None):
         entry = self.get_object()
-        entry.soft_delete(request.user)
+        with transaction.atomic(), changelog.batch():
+            entry.soft_delete(request.user)
         return Response({'status': 'deleted'}, status=status.HTTP_200_OK)
 
 class CountSheetViewSet(viewsets.ModelViewSet):
     serializer_class = CountSheetSerializer
     permission_classes = [IsAuthenticated]
-    queryset = CountSheet.objects.all()
+    queryset = CountSheet.objects.select_related(
+        "created_by", "updated_by", "submitted_by"
+    )
 
     def create(self, request, *args, **kwargs):
+        """Create a sheet; ``"copy_forward": true`` seeds it from the previous submitted sheet."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(created_by=request.user, updated_by=request.user)
+        copy_forward = str(request.data.get("copy_forward", "")).lower() in ("1", "true")
+        with transaction.atomic(), changelog.batch():
+            sheet = serializer.save(created_by=request.user, updated_by=request.user)
+            if copy_forward and CountEntry.objects.copy_forward(sheet, user=request.user):
+                sheet.refresh_from_db(fields=SHEET_COUNTER_FIELDS)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def perform_update(self, serializer):
-        serializer.save(updated_by=self.request.user)
+        with transaction.atomic(), changelog.batch():
+            serializer.save(updated_by=self.request.user)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(), changelog.batch():
+            instance.delete()
 
     @action(detail=True, methods=['post'], url_path='submit')
     def submit(self, request, pk=None):
         sheet = self.get_object()
-        print("request",request)
         try:
             sheet.submit(request.user)
             return Response({'status': 'submitted'}, status=status.HTTP_200_OK)
-        except ValidationError as e:
-            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except DjangoValidationError as e:
+            return Response({'detail': " ".join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'], url_path='submit-batch')
+    def submit_batch(self, request):
+        """Submit several draft sheets at once: ``{"sheets": [id, ...]}``.
+
+        All sheets are submitted in one transaction, or none are if any of
+        them is missing or not a draft.
+        """
+        serializer = CountSheetSubmitBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            submitted = CountSheet.objects.submit_batch(serializer.validated_data["sheets"], request.user)
+        except DjangoValidationError as e:
+            return Response({"error": "No sheets were submitted.", "sheets": e.message_dict},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "sheets": [
+                {
+                    "id": sheet.pk,
+                    "status": sheet.status,
+                    "submitted_at": sheet.submitted_at,
+                    "report": report.pk,
+                }
+                for sheet, report in submitted
+            ]
+        }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], url_path='soft-delete')
     def soft_delete(self, request, pk=None):
         sheet = self.get_object()
         sheet.soft_delete(request.user)
         return Response({'status': 'deleted'}, status=status.HTTP_200_OK)
+
+
+class StockSnapshotViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = StockSnapshotSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        qs = StockSnapshot.objects.select_related("location", "item")
+        params = self.request.query_params
+        location_id = params.get("location")
+        highlight_state = params.get("highlight_state")
+
+        if location_id and location_id.isdigit():
+            qs = qs.filter(location_id=int(location_id))
+        if highlight_state:
+            qs = qs.filter(highlight_state=highlight_state)
+        if params.get("low") == "true":
+            qs = qs.low()
+        return qs
+
+
+class CountSyncView(APIView):
+    """Batch sync for offline counting devices.
+
+    Applies the queued operations for one sheet in a single transaction and
+    returns the sheet's entries changed since the device's last token,
+    together with a new token for the next sync.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = SyncRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        sheet = data["sheet"]
+
+        results = SyncOperation.objects.apply_batch(
+            sheet, data["device_id"], data.get("operations", []), request.user)
+        token = timezone.now()
+
+        changes = CountEntry.objects.with_effective_parameters().select_related(
+            "sheet", "item", "item__vendor", "item__brand", "item_version",
+            "created_by", "updated_by", "deleted_by"
+        ).filter(sheet=sheet).changed_since(data.get("token")).order_by("pk")
+        return Response({
+            "sheet": sheet.pk,
+            "results": results,
+            "changes": CountEntrySerializer(changes, many=True).data,
+            "token": token.isoformat(),
+        }, status=status.HTTP_200_OK)
+
+
+class CountStatusView(APIView):
+    """Due, in-progress, overdue and submitted state of every location/frequency.
+
+    Optional ``status`` and ``location`` query parameters narrow the list.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        rows = count_status.get_status()
+        wanted = request.query_params.get("status")
+        if wanted:
+            rows = [row for row in rows if row["status"] == wanted]
+        location = request.query_params.get("location")
+        if location:
+            if not location.isdigit():
+                return Response({"error": "location must be an integer id."}, status=status.HTTP_400_BAD_REQUEST)
+            rows = [row for row in rows if row["location"] == int(location)]
+        return Response(rows)
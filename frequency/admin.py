@@ -9,6 +9,9 @@ class FrequencyAdmin(admin.ModelAdmin):
         "frequency_name",
         "description",
         "is_active",
+        "interval_days",
+        "weekday",
+        "cutoff_time",
         "created_at",
         "updated_at",
     )
@@ -32,6 +35,13 @@ class FrequencyAdmin(admin.ModelAdmin):
                 "description",
             )
         }),
+        ("Schedule", {
+            "fields": (
+                "interval_days",
+                "weekday",
+                "cutoff_time",
+            )
+        }),
         ("Status", {
             "fields": (
                 "is_active",
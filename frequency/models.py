@@ -1,6 +1,31 @@
+from datetime import date, datetime, timedelta
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+# Interval schedules count from this Monday, so a 14-day cadence always
+# lands on the same alternate weeks.
+SCHEDULE_EPOCH = date(2000, 1, 3)
+
+
+class Weekday(models.IntegerChoices):
+    MONDAY = 0, _("Monday")
+    TUESDAY = 1, _("Tuesday")
+    WEDNESDAY = 2, _("Wednesday")
+    THURSDAY = 3, _("Thursday")
+    FRIDAY = 4, _("Friday")
+    SATURDAY = 5, _("Saturday")
+    SUNDAY = 6, _("Sunday")
+
+
+class FrequencyQuerySet(models.QuerySet):
+    def scheduled(self):
+        """Active frequencies with a cadence, i.e. whose sheets are generated automatically."""
+        return self.filter(is_active=True, interval_days__isnull=False)
+
+
 class Frequency(models.Model):
     frequency_name = models.CharField(
         max_length=255,
@@ -17,6 +42,29 @@ class Frequency(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    interval_days = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        verbose_name=_("Interval (days)"),
+        help_text=_("Days between counts, e.g. 1 for daily or 7 for weekly. "
+                    "Leave empty to create sheets manually."),
+    )
+    weekday = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        choices=Weekday.choices,
+        help_text=_("Day of the week counts fall on; needs an interval that is a multiple of 7"),
+    )
+    cutoff_time = models.TimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Cutoff time"),
+        help_text=_("Local time on the count date by which the sheet should be submitted"),
+    )
+
+    objects = FrequencyQuerySet.as_manager()
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -27,3 +75,26 @@ class Frequency(models.Model):
 
     def __str__(self):
         return self.frequency_name
+
+    def clean(self):
+        super().clean()
+        if self.weekday is not None and (not self.interval_days or self.interval_days % 7):
+            raise ValidationError(
+                {"weekday": _("A weekday needs an interval that is a multiple of 7 days.")})
+
+    def last_due_on(self, day):
+        """The most recent count date on or before ``day``, or None without a cadence."""
+        if not self.interval_days:
+            return None
+        anchor = SCHEDULE_EPOCH + timedelta(days=self.weekday or 0)
+        return day - timedelta(days=(day - anchor).days % self.interval_days)
+
+    def is_due_on(self, day) -> bool:
+        """Whether a sheet should be counted on ``day`` under this cadence."""
+        return self.last_due_on(day) == day
+
+    def cutoff_for(self, day):
+        """Aware datetime by which the sheet for ``day`` is due, or None without a cutoff."""
+        if self.cutoff_time is None:
+            return None
+        return timezone.make_aware(datetime.combine(day, self.cutoff_time))
@@ -10,6 +10,9 @@ class FrequencySerializer(serializers.ModelSerializer):
             "frequency_name",
             "description",
             "is_active",
+            "interval_days",
+            "weekday",
+            "cutoff_time",
             "created_at",
             "updated_at",
         ]
@@ -39,6 +42,14 @@ class FrequencySerializer(serializers.ModelSerializer):
 
         return value
 
+    def validate(self, attrs):
+        interval_days = attrs.get("interval_days", getattr(self.instance, "interval_days", None))
+        weekday = attrs.get("weekday", getattr(self.instance, "weekday", None))
+        if weekday is not None and (not interval_days or interval_days % 7):
+            raise serializers.ValidationError(
+                {"weekday": "A weekday needs an interval that is a multiple of 7 days."})
+        return attrs
+
     def validate_description(self, value):
         if value and len(value) > 500:
             raise serializers.ValidationError("Description must be 500 characters or less.")
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import InventoryItem
+from .models import InventoryItem, InventoryItemVersion, LocationItemOverride
 from django.utils.html import format_html
 
 
@@ -112,3 +112,61 @@ class InventoryItemAdmin(admin.ModelAdmin):
     def pack_ratio_display(self, obj):
         return self.pack_ratio(obj)
     pack_ratio_display.short_description = "Pack Ratio"
+
+
+@admin.register(LocationItemOverride)
+class LocationItemOverrideAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "item",
+        "location",
+        "par_level",
+        "order_point",
+        "pack_size",
+        "updated_at",
+    )
+
+    list_filter = (
+        "location",
+    )
+
+    search_fields = (
+        "item__name",
+        "location__name",
+    )
+
+    list_select_related = ("item", "location")
+
+    readonly_fields = (
+        "created_at",
+        "updated_at",
+    )
+
+
+@admin.register(InventoryItemVersion)
+class InventoryItemVersionAdmin(admin.ModelAdmin):
+
+    list_display = (
+        "name",
+        "vendor_name",
+        "pack_size",
+        "par_level",
+        "order_point",
+        "valid_from",
+        "valid_to",
+    )
+
+    list_filter = (
+        ("valid_from", admin.DateFieldListFilter),
+    )
+
+    search_fields = (
+        "name",
+        "vendor_name",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
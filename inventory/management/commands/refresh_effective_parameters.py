@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from inventory.models import EffectiveItemParameter
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the effective par/order point/pack size table from items and location overrides'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--item', type=int, action='append', dest='items',
+            help='Only refresh the given item id (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        if options['items']:
+            total = EffectiveItemParameter.objects.refresh_for_items(options['items'])
+        else:
+            total = EffectiveItemParameter.objects.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Refreshed {total} effective parameter rows')
+        )
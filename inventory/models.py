@@ -1,5 +1,6 @@
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
 
@@ -14,11 +15,11 @@ class InventoryItemQuerySet(models.QuerySet):
     def by_location(self, location):
         return self.filter(location=location)
 
-    def low_stock(self):
-        return self.filter(
-            models.Q(par_level__lte=models.F('order_point')) |
-            models.Q(order_point__isnull=False, par_level__isnull=False)
-        )
+    def low_stock(self, location=None):
+        snapshots = models.Q(stock_snapshots__highlight_state="red")
+        if location is not None:
+            snapshots &= models.Q(stock_snapshots__location=location)
+        return self.filter(snapshots).distinct()
 
 
 class InventoryItem(models.Model):
@@ -157,3 +158,245 @@ class InventoryItem(models.Model):
         if self.pack_size and self.order_unit and self.count_unit:
             return f"1 {self.order_unit} = {self.pack_size} {self.count_unit}"
         return "N/A"
+
+
+class LocationItemOverride(models.Model):
+    """Per-location stock parameters for a catalog item.
+
+    Empty fields fall back to the values on the item itself.
+    """
+    location = models.ForeignKey(
+        'locations.Location',
+        on_delete=models.CASCADE,
+        related_name="item_overrides"
+    )
+    item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name="location_overrides"
+    )
+    par_level = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        help_text="Preferred stock level at this location"
+    )
+    order_point = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(Decimal('0.01'))],
+        help_text="When to reorder this item at this location"
+    )
+    pack_size = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Pack size used by this location's vendor"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['location', 'item']
+        verbose_name = "Location Item Override"
+        verbose_name_plural = "Location Item Overrides"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['location', 'item'], name='unique_location_item_override'),
+        ]
+
+    def __str__(self):
+        return f"{self.item} @ {self.location}"
+
+
+class EffectiveItemParameterQuerySet(models.QuerySet):
+    def for_location(self, location):
+        return self.filter(location=location)
+
+    def refresh_for_items(self, item_ids):
+        """Rebuild the effective rows of the given items from the item and its overrides."""
+        item_ids = list(item_ids)
+        if not item_ids:
+            return 0
+        items = InventoryItem.objects.filter(pk__in=item_ids).only(
+            'id', 'location_id', 'par_level', 'order_point', 'pack_size'
+        )
+        rows = {}
+        for item in items:
+            if item.location_id:
+                rows[(item.location_id, item.pk)] = self.model(
+                    location_id=item.location_id,
+                    item_id=item.pk,
+                    par_level=item.par_level,
+                    order_point=item.order_point,
+                    pack_size=item.pack_size,
+                )
+        overrides = LocationItemOverride.objects.filter(item_id__in=item_ids).select_related('item')
+        for override in overrides:
+            item = override.item
+            rows[(override.location_id, item.pk)] = self.model(
+                location_id=override.location_id,
+                item_id=item.pk,
+                par_level=override.par_level if override.par_level is not None else item.par_level,
+                order_point=override.order_point if override.order_point is not None else item.order_point,
+                pack_size=override.pack_size or item.pack_size,
+            )
+        with transaction.atomic():
+            self.filter(item_id__in=item_ids).delete()
+            self.bulk_create(rows.values(), batch_size=1000)
+        return len(rows)
+
+    def rebuild(self):
+        item_ids = InventoryItem.objects.values_list('pk', flat=True).iterator()
+        batch, total = [], 0
+        for pk in item_ids:
+            batch.append(pk)
+            if len(batch) == 1000:
+                total += self.refresh_for_items(batch)
+                batch = []
+        return total + self.refresh_for_items(batch)
+
+
+class EffectiveItemParameter(models.Model):
+    """Precomputed par level, order point and pack size per (location, item).
+
+    Maintained from InventoryItem and LocationItemOverride changes so that
+    calculations and exports can read the resolved values in a single join.
+    """
+    location = models.ForeignKey(
+        'locations.Location',
+        on_delete=models.CASCADE,
+        related_name="effective_item_parameters"
+    )
+    item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name="effective_parameters"
+    )
+    par_level = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True)
+    order_point = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True)
+    pack_size = models.PositiveIntegerField(default=1)
+
+    objects = EffectiveItemParameterQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Effective Item Parameter"
+        verbose_name_plural = "Effective Item Parameters"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['location', 'item'], name='unique_effective_item_parameter'),
+        ]
+
+    def __str__(self):
+        return f"{self.item} @ {self.location}"
+
+
+class InventoryItemVersionQuerySet(models.QuerySet):
+    TRACKED_FIELDS = (
+        'name', 'category', 'count_unit', 'order_unit', 'pack_size',
+        'vendor_name', 'brand_name', 'par_level', 'order_point',
+    )
+
+    def current(self):
+        return self.filter(valid_to__isnull=True)
+
+    def as_of(self, moment):
+        return self.filter(valid_from__lte=moment).filter(
+            models.Q(valid_to__isnull=True) | models.Q(valid_to__gt=moment)
+        )
+
+    def record(self, item_ids):
+        """Append a version for every item whose tracked values changed.
+
+        Returns a mapping of item id to its current version.
+        """
+        item_ids = list(item_ids)
+        if not item_ids:
+            return {}
+        items = InventoryItem.objects.filter(pk__in=item_ids).select_related('vendor', 'brand')
+        current = {v.item_id: v for v in self.current().filter(item_id__in=item_ids)}
+        now = timezone.now()
+        closed, created = [], []
+        for item in items:
+            values = {
+                'name': item.name,
+                'category': item.category,
+                'count_unit': item.count_unit,
+                'order_unit': item.order_unit,
+                'pack_size': item.pack_size,
+                'vendor_name': item.vendor.name if item.vendor else None,
+                'brand_name': item.brand.name if item.brand else None,
+                'par_level': item.par_level,
+                'order_point': item.order_point,
+            }
+            version = current.get(item.pk)
+            if version is not None:
+                if all(getattr(version, f) == values[f] for f in self.TRACKED_FIELDS):
+                    continue
+                version.valid_to = now
+                closed.append(version)
+            new_version = self.model(item=item, valid_from=now, **values)
+            created.append(new_version)
+            current[item.pk] = new_version
+        with transaction.atomic():
+            if closed:
+                self.bulk_update(closed, ['valid_to'])
+            self.bulk_create(created)
+        return current
+
+    def current_for(self, item_id):
+        version = self.current().filter(item_id=item_id).first()
+        if version is None:
+            version = self.record([item_id]).get(item_id)
+        return version
+
+
+class InventoryItemVersion(models.Model):
+    """Append-only copy of an item's catalog values for a validity window.
+
+    Rows are never updated apart from closing ``valid_to``, so historical
+    reads can be served from them without joining the live catalog.
+    """
+    item = models.ForeignKey(
+        InventoryItem,
+        on_delete=models.CASCADE,
+        related_name="versions"
+    )
+    name = models.CharField(max_length=255)
+    category = models.CharField(max_length=50, choices=InventoryItem.ItemCategory.choices)
+    count_unit = models.CharField(max_length=32, blank=True, null=True)
+    order_unit = models.CharField(max_length=32, blank=True, null=True)
+    pack_size = models.PositiveIntegerField(default=1)
+    vendor_name = models.CharField(max_length=255, blank=True, null=True)
+    brand_name = models.CharField(max_length=255, blank=True, null=True)
+    par_level = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True)
+    order_point = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True)
+    valid_from = models.DateTimeField(db_index=True)
+    valid_to = models.DateTimeField(null=True, blank=True)
+
+    objects = InventoryItemVersionQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['item', '-valid_from']
+        verbose_name = "Inventory Item Version"
+        verbose_name_plural = "Inventory Item Versions"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['item'],
+                condition=models.Q(valid_to__isnull=True),
+                name='unique_current_item_version',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['item', 'valid_from']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.valid_from:%Y-%m-%d})"
@@ -1,4 +1,5 @@
-from .models import InventoryItem
+from decimal import Decimal
+from .models import InventoryItem, LocationItemOverride
 from rest_framework import serializers
 from vendor.models import Vendor
 from locations.models import Location
@@ -189,3 +190,63 @@ class InventoryItemSerializer(serializers.ModelSerializer):
         unit = obj.count_unit or ""
         plural = "s" if obj.pack_size != 1 else ""
         return f"1 {obj.order_unit} = {obj.pack_size} {unit}{plural}"
+
+
+class InventoryItemBulkUpdateSerializer(serializers.Serializer):
+    BULK_FIELDS = ('display_order', 'par_level', 'order_point', 'is_active')
+
+    id = serializers.IntegerField()
+    display_order = serializers.IntegerField(required=False, min_value=0)
+    # Same minimum as the model's MinValueValidator, which bulk_update skips.
+    par_level = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, allow_null=True,
+        min_value=Decimal('0.01'),
+    )
+    order_point = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False, allow_null=True,
+        min_value=Decimal('0.01'),
+    )
+    is_active = serializers.BooleanField(required=False)
+
+    def validate(self, data):
+        if not any(field in data for field in self.BULK_FIELDS):
+            raise serializers.ValidationError(
+                f"Provide at least one of: {', '.join(self.BULK_FIELDS)}."
+            )
+        return data
+
+
+class LocationItemOverrideSerializer(serializers.ModelSerializer):
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    location_name = serializers.CharField(source='location.name', read_only=True)
+
+    class Meta:
+        model = LocationItemOverride
+        fields = [
+            'id',
+            'location',
+            'location_name',
+            'item',
+            'item_name',
+            'par_level',
+            'order_point',
+            'pack_size',
+            'created_at',
+            'updated_at',
+        ]
+        read_only_fields = ['id', 'item_name', 'location_name', 'created_at', 'updated_at']
+
+    def validate_par_level(self, value):
+        if value is not None and value < 0:
+            raise serializers.ValidationError("Par level cannot be negative.")
+        return value
+
+    def validate_order_point(self, value):
+        if value is not None and value < 0:
+            raise serializers.ValidationError("Order point cannot be negative.")
+        return value
+
+    def validate_pack_size(self, value):
+        if value is not None and value <= 0:
+            raise serializers.ValidationError("Pack size must be greater than 0.")
+        return value
@@ -0,0 +1,24 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from .models import (
+    InventoryItem,
+    InventoryItemVersion,
+    LocationItemOverride,
+    EffectiveItemParameter,
+)
+
+
+@receiver(post_save, sender=InventoryItem)
+def refresh_item_parameters(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    EffectiveItemParameter.objects.refresh_for_items([instance.pk])
+    InventoryItemVersion.objects.record([instance.pk])
+
+
+@receiver(post_save, sender=LocationItemOverride)
+@receiver(post_delete, sender=LocationItemOverride)
+def refresh_override_parameters(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    EffectiveItemParameter.objects.refresh_for_items([instance.item_id])
@@ -1,2 +1,195 @@
+from decimal import Decimal
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from counts.models import CountEntry, CountSheet
+from frequency.models import Frequency
+from inventory.models import InventoryItem, LocationItemOverride, EffectiveItemParameter
+from locations.models import Location
+from users.models import User, UserRole
 
+
+class InventoryItemBulkUpdateTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass1234", role=UserRole.ADMIN
+        )
+        self.staff = User.objects.create_user(
+            username="staff", password="pass1234", role=UserRole.STAFF
+        )
+        self.client = APIClient()
+        self.url = reverse("api:inventoryitem-bulk-update")
+        self.items = [
+            InventoryItem.objects.create(
+                name=f"Item {i}", par_level=Decimal("10"), display_order=i
+            )
+            for i in range(3)
+        ]
+
+    def test_reorders_items_in_one_batch(self):
+        self.client.force_authenticate(self.staff)
+        payload = [
+            {"id": item.pk, "display_order": 10 - index}
+            for index, item in enumerate(self.items)
+        ]
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["errors"], [])
+        orders = dict(InventoryItem.objects.values_list("pk", "display_order"))
+        self.assertEqual(orders[self.items[0].pk], 10)
+        self.assertEqual(orders[self.items[2].pk], 8)
+
+    def test_par_level_requires_admin(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.post(
+            self.url, [{"id": self.items[0].pk, "par_level": "20"}], format="json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_item_errors_do_not_abort_batch(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(self.url, [
+            {"id": self.items[0].pk, "par_level": "25"},
+            {"id": 999999, "par_level": "5"},
+            {"id": self.items[1].pk, "order_point": "-1"},
+        ], format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], [self.items[0].pk])
+        self.assertEqual([e["index"] for e in response.data["errors"]], [1, 2])
+        self.items[0].refresh_from_db()
+        self.assertEqual(self.items[0].par_level, Decimal("25"))
+
+    def test_string_ids_and_minimum_parameters(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(self.url, [
+            {"id": str(self.items[0].pk), "par_level": "30"},
+            {"id": self.items[1].pk, "order_point": "0"},
+        ], format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], [self.items[0].pk])
+        self.assertEqual([(e["index"], list(e["errors"])) for e in response.data["errors"]], [(1, ["order_point"])])
+        self.items[0].refresh_from_db()
+        self.assertEqual(self.items[0].par_level, Decimal("30"))
+
+    def test_atomic_mode_rejects_whole_batch(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(self.url, {
+            "atomic": True,
+            "items": [
+                {"id": self.items[0].pk, "is_active": False},
+                {"id": 999999, "is_active": False},
+            ],
+        }, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.items[0].refresh_from_db()
+        self.assertTrue(self.items[0].is_active)
+
+
+class EffectiveItemParameterTests(TestCase):
+    def setUp(self):
+        self.home = Location.objects.create(name="Home")
+        self.other = Location.objects.create(name="Other")
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.item = InventoryItem.objects.create(
+            name="Kale",
+            pack_size=4,
+            par_level=Decimal("10"),
+            order_point=Decimal("3"),
+            location=self.home,
+        )
+
+    def _params(self, location):
+        return EffectiveItemParameter.objects.get(location=location, item=self.item)
+
+    def test_item_save_populates_home_location(self):
+        self.assertEqual(self._params(self.home).par_level, Decimal("10"))
+        self.item.par_level = Decimal("12")
+        self.item.save()
+        self.assertEqual(self._params(self.home).par_level, Decimal("12"))
+
+    def test_override_falls_back_to_item_values(self):
+        override = LocationItemOverride.objects.create(
+            location=self.other, item=self.item, par_level=Decimal("40")
+        )
+        params = self._params(self.other)
+        self.assertEqual(params.par_level, Decimal("40"))
+        self.assertEqual(params.order_point, Decimal("3"))
+        self.assertEqual(params.pack_size, 4)
+
+        override.delete()
+        self.assertFalse(
+            EffectiveItemParameter.objects.filter(location=self.other).exists()
+        )
+
+    def test_calculation_uses_location_override(self):
+        LocationItemOverride.objects.create(
+            location=self.other, item=self.item, par_level=Decimal("40"), pack_size=10
+        )
+        sheet = CountSheet.objects.create(location=self.other, frequency=self.frequency)
+        entry = CountEntry.objects.create(
+            sheet=sheet, item=self.item, on_hand_quantity=Decimal("5")
+        )
+        self.assertEqual(entry.calculated_order_units, Decimal("4"))
+        self.assertEqual(entry.calculated_qty_to_order, Decimal("40"))
+
+        annotated = CountEntry.objects.with_effective_parameters().get(pk=entry.pk)
+        self.assertEqual(annotated.effective_par_level, Decimal("40"))
+        self.assertEqual(annotated.resolve_parameters().pack_size, Decimal("10"))
+
+    def test_override_par_level_requires_admin(self):
+        manager = User.objects.create_user(username="manager", password="pass1234", role=UserRole.MANAGER)
+        client = APIClient()
+        client.force_authenticate(manager)
+        response = client.post(reverse("api:locationitemoverride-create"), {
+            "location": self.other.pk, "item": self.item.pk, "par_level": "40",
+        }, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data, {"error": "Only administrators can modify Par Level."})
+
+        response = client.post(reverse("api:locationitemoverride-create"), {
+            "location": self.other.pk, "item": self.item.pk, "order_point": "5",
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        url = reverse("api:locationitemoverride-update", args=[response.data["id"]])
+        self.assertEqual(client.patch(url, {"par_level": "40"}, format="json").status_code, 403)
+        self.assertEqual(client.put(url, {
+            "location": self.other.pk, "item": self.item.pk, "par_level": "40",
+        }, format="json").status_code, 403)
+        self.assertIsNone(LocationItemOverride.objects.get().par_level)
+
+
+class InventoryItemVersionTests(TestCase):
+    def setUp(self):
+        self.location = Location.objects.create(name="Home")
+        self.frequency = Frequency.objects.create(frequency_name="Daily")
+        self.item = InventoryItem.objects.create(
+            name="Kale", pack_size=4, par_level=Decimal("10"), location=self.location
+        )
+
+    def test_changes_append_versions(self):
+        self.item.save()
+        self.assertEqual(self.item.versions.count(), 1)
+
+        self.item.pack_size = 6
+        self.item.save()
+        versions = list(self.item.versions.order_by("valid_from", "pk"))
+        self.assertEqual(len(versions), 2)
+        self.assertIsNotNone(versions[0].valid_to)
+        self.assertIsNone(versions[1].valid_to)
+        self.assertEqual(versions[1].pack_size, 6)
+
+    def test_entry_keeps_version_it_was_counted_with(self):
+        sheet = CountSheet.objects.create(location=self.location, frequency=self.frequency)
+        entry = CountEntry.objects.create(
+            sheet=sheet, item=self.item, on_hand_quantity=Decimal("1")
+        )
+        self.item.name = "Curly Kale"
+        self.item.save()
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.catalog_snapshot.name, "Kale")
+        self.assertEqual(entry.item.name, "Curly Kale")
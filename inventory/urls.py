@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import InventoryItemViewSet
+from .views import InventoryItemViewSet, LocationItemOverrideViewSet
 
 urlpatterns = [
     path(
@@ -12,6 +12,11 @@ urlpatterns = [
         InventoryItemViewSet.as_view({"post": "create"}),
         name="inventoryitem-create",
     ),
+    path(
+        "inventory-items/bulk-update/",
+        InventoryItemViewSet.as_view({"post": "bulk_update", "patch": "bulk_update"}),
+        name="inventoryitem-bulk-update",
+    ),
     path(
         "inventory-items/<int:pk>/",
         InventoryItemViewSet.as_view({"get": "retrieve"}),
@@ -28,4 +33,25 @@ urlpatterns = [
         InventoryItemViewSet.as_view({"delete": "destroy"}),
         name="inventoryitem-delete",
     ),
+    path(
+        "inventory-overrides/",
+        LocationItemOverrideViewSet.as_view({"get": "list"}),
+        name="locationitemoverride-list",
+    ),
+    path(
+        "inventory-overrides/create/",
+        LocationItemOverrideViewSet.as_view({"post": "create"}),
+        name="locationitemoverride-create",
+    ),
+    path(
+        "inventory-overrides/<int:pk>/update/",
+        LocationItemOverrideViewSet.as_view(
+            {"put": "update", "patch": "partial_update"}),
+        name="locationitemoverride-update",
+    ),
+    path(
+        "inventory-overrides/<int:pk>/delete/",
+        LocationItemOverrideViewSet.as_view({"delete": "destroy"}),
+        name="locationitemoverride-delete",
+    ),
 ]
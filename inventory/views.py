@@ -1,11 +1,26 @@
-from .models import InventoryItem
+from .models import (
+    InventoryItem,
+    InventoryItemVersion,
+    EffectiveItemParameter,
+    LocationItemOverride,
+)
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import viewsets, filters, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
-from .serializers import InventoryItemSerializer
+from .serializers import (
+    InventoryItemSerializer,
+    InventoryItemBulkUpdateSerializer,
+    LocationItemOverrideSerializer,
+)
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import FormParser, MultiPartParser, JSONParser
 from users.models import UserRole
+from users.permissions import IsAdminOrManager
+from core import changelog, outbox
+from core.models import ChangeAction
 
 
 class InventoryItemViewSet(viewsets.ModelViewSet):
@@ -43,6 +58,19 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
             
         return qs
 
+    def perform_create(self, serializer):
+        # Keeps the item row, its change log row and its outbox event in one transaction.
+        with transaction.atomic(), changelog.batch():
+            super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        with transaction.atomic(), changelog.batch():
+            super().perform_update(serializer)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(), changelog.batch():
+            super().perform_destroy(instance)
+
     def create(self, request, *args, **kwargs):
         try:
             serializer = self.get_serializer(data=request.data)
@@ -96,3 +124,113 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
                 {"error": "An unexpected error occurred. Please try again."}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk-update')
+    def bulk_update(self, request, *args, **kwargs):
+        """Apply a list of partial updates in one transaction.
+
+        Accepts either a list of ``{"id": ..., <field>: ...}`` rows or
+        ``{"items": [...], "atomic": true}``. Rows that fail validation are
+        reported per index; in atomic mode any error rejects the whole batch.
+        """
+        payload = request.data
+        atomic = False
+        if isinstance(payload, dict):
+            atomic = str(payload.get("atomic", "")).lower() in ("1", "true")
+            payload = payload.get("items")
+        if not isinstance(payload, list) or not payload:
+            return Response(
+                {"error": "Expected a non-empty list of item updates."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if any(isinstance(row, dict) and 'par_level' in row for row in payload):
+            user = request.user
+            if not (user.is_superuser or getattr(user, 'role', None) == UserRole.ADMIN):
+                return Response(
+                    {"error": "Only administrators can modify Par Level."},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+
+        errors = []
+        valid = []
+        for index, row in enumerate(payload):
+            serializer = InventoryItemBulkUpdateSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors.append({"index": index, "id": row.get("id") if isinstance(row, dict) else None,
+                               "errors": serializer.errors})
+        items = InventoryItem.objects.in_bulk([data["id"] for _, data in valid])
+
+        changed = {}
+        fields = set()
+        for index, data in valid:
+            item = changed.get(data["id"]) or items.get(data["id"])
+            if item is None:
+                errors.append({"index": index, "id": data["id"],
+                               "errors": {"id": ["Inventory item not found."]}})
+                continue
+            for field in InventoryItemBulkUpdateSerializer.BULK_FIELDS:
+                if field in data:
+                    setattr(item, field, data[field])
+                    fields.add(field)
+            changed[item.pk] = item
+        errors.sort(key=lambda error: error["index"])
+
+        if errors and (atomic or not changed):
+            return Response(
+                {"updated": [], "errors": errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        now = timezone.now()
+        for item in changed.values():
+            item.updated_at = now
+        with transaction.atomic():
+            InventoryItem.objects.bulk_update(
+                list(changed.values()), sorted(fields | {"updated_at"}), batch_size=500
+            )
+            if fields & {"par_level", "order_point"}:
+                EffectiveItemParameter.objects.refresh_for_items(changed)
+                InventoryItemVersion.objects.record(changed)
+            changelog.record(changed.values(), ChangeAction.UPDATE)
+            outbox.publish_item_changes(changed.values(), ChangeAction.UPDATE)
+
+        return Response(
+            {"updated": sorted(changed), "errors": errors},
+            status=status.HTTP_200_OK
+        )
+
+
+class LocationItemOverrideViewSet(viewsets.ModelViewSet):
+    serializer_class = LocationItemOverrideSerializer
+    permission_classes = (IsAuthenticated, IsAdminOrManager)
+
+    def _forbid_par_level(self, request):
+        # An override's par takes precedence over the item's, so it is admin-only too.
+        if 'par_level' in request.data:
+            user = request.user
+            if not (user.is_superuser or getattr(user, 'role', None) == UserRole.ADMIN):
+                return Response(
+                    {"error": "Only administrators can modify Par Level."},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        return None
+
+    def create(self, request, *args, **kwargs):
+        return self._forbid_par_level(request) or super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return self._forbid_par_level(request) or super().update(request, *args, **kwargs)
+
+    def get_queryset(self):
+        qs = LocationItemOverride.objects.select_related('location', 'item')
+        location_id = self.request.query_params.get("location")
+        item_id = self.request.query_params.get("item")
+
+        if location_id and location_id.isdigit():
+            qs = qs.filter(location_id=int(location_id))
+        if item_id and item_id.isdigit():
+            qs = qs.filter(item_id=int(item_id))
+        return qs
@@ -13,12 +13,14 @@ class ReportSerializer(serializers.ModelSerializer):
     created_by_detail = serializers.SerializerMethodField()
     updated_by_detail = serializers.SerializerMethodField()
     deleted_by_detail = serializers.SerializerMethodField()
+    archived_sheets = serializers.SerializerMethodField()
 
     class Meta:
         model = Report
         fields = [
             'id',
             'count_entries',
+            'archived_sheets',
             'location',
             'frequency',
             'frequency_name',
@@ -33,6 +35,18 @@ class ReportSerializer(serializers.ModelSerializer):
             'created_by', 'updated_by', 'deleted_by', 'deleted_at'
         ]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Entries of archived sheets live in SheetArchive blobs, not count_entries;
+        # the view only loads the payloads when they are asked for.
+        if self.context.get('include_archived'):
+            for archive in instance.sheet_archives.all():
+                data['count_entries'].extend(archive.entries_for_report(instance.pk))
+        return data
+
+    def get_archived_sheets(self, obj):
+        return [archive.sheet_id for archive in obj.sheet_archives.all()]
+
     def get_created_by_detail(self, obj):
         if obj.created_by:
             return {
@@ -1,9 +1,10 @@
 from .models import Report
-from django.db.models import Max
+from django.db.models import Max, Prefetch
 from django.db import transaction
 from rest_framework import status
 from rest_framework import viewsets
-from counts.models import CountEntry
+from core import changelog
+from counts.models import CountEntry, SheetArchive
 from .serializers import ReportSerializer
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -22,7 +23,21 @@ class ReportViewSet(viewsets.ModelViewSet):
     pagination_class = ReportCursorPagination
 
     def get_queryset(self):
-        queryset = Report.objects.all()
+        queryset = Report.objects.select_related(
+            "location", "frequency", "created_by", "updated_by", "deleted_by"
+        ).prefetch_related(
+            Prefetch(
+                "count_entries",
+                queryset=CountEntry.objects.with_effective_parameters().select_related(
+                    "sheet", "item", "item__vendor", "item__brand", "item_version",
+                    "created_by", "updated_by", "deleted_by"),
+            ),
+            Prefetch(
+                "sheet_archives",
+                queryset=SheetArchive.objects.all() if self.include_archived()
+                else SheetArchive.objects.defer("payload"),
+            ),
+        )
         params = self.request.query_params
         
         try:
@@ -46,16 +61,32 @@ class ReportViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    def include_archived(self):
+        """Archived entries are unpacked for single reports, or for lists on ?include_archived=1."""
+        if self.detail:
+            return True
+        return str(self.request.query_params.get("include_archived", "")).lower() in ("1", "true")
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), "include_archived": self.include_archived()}
+
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user, updated_by=self.request.user)
+        with transaction.atomic(), changelog.batch():
+            serializer.save(created_by=self.request.user, updated_by=self.request.user)
 
     def perform_update(self, serializer):
-        serializer.save(updated_by=self.request.user)
+        with transaction.atomic(), changelog.batch():
+            serializer.save(updated_by=self.request.user)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic(), changelog.batch():
+            instance.delete()
 
     @action(detail=True, methods=['post'], url_path='soft-delete')
     def soft_delete(self, request, pk=None):
         report = self.get_object()
-        report.soft_delete(request.user)
+        with transaction.atomic(), changelog.batch():
+            report.soft_delete(request.user)
         return Response({'status': 'deleted'}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["post"])
@@ -83,7 +114,7 @@ class ReportViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         try:
-            with transaction.atomic():
+            with transaction.atomic(), changelog.batch():
                 reports_qs = Report.objects.filter(location__id=location_id)
                 if frequency_id:
                     reports_qs = reports_qs.filter(frequency__id=frequency_id)
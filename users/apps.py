@@ -5,5 +5,8 @@ try:
     class UsersConfig(AppConfig):
         default_auto_field = 'django.db.models.BigAutoField'
         name = 'users'
+
+        def ready(self):
+            from . import signals  # noqa: F401
 except Exception as e:
     logging.error(f"UsersConfig initialization failed: {e}")
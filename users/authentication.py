@@ -0,0 +1,124 @@
+import time
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from .models import User
+
+USER_STATE_FIELDS = (
+    "id", "username", "email", "first_name", "last_name",
+    "role", "is_active", "is_staff", "is_superuser",
+)
+
+
+# Claims RoleTokenObtainPairSerializer adds; a token whose values no longer
+# match the user's current state is rejected.
+CHECKED_CLAIMS = ("role", "is_active", "is_superuser")
+
+
+def _cache_max_size():
+    return getattr(settings, "JWT_USER_CACHE", {}).get("MAX_SIZE", 10000)
+
+
+def _cache_ttl():
+    config = getattr(settings, "JWT_USER_CACHE", {})
+    ttl = config.get("TTL", 60)
+    if config.get("STRICT", False):
+        ttl = min(ttl, config.get("STRICT_TTL", 5))
+    return ttl
+
+
+class UserStateCache:
+    """Per-process cache of the user fields needed to authorize a request.
+
+    Entries expire after ``JWT_USER_CACHE["TTL"]`` seconds and are dropped
+    immediately by the User save/delete signals in this process. Strict mode
+    caps the TTL so deactivations made in other workers apply within seconds.
+    At most ``JWT_USER_CACHE["MAX_SIZE"]`` users are kept, least recently
+    used first out.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, user_id, state):
+        key = str(user_id)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + _cache_ttl(), state)
+            self._entries.move_to_end(key)
+            while len(self._entries) > _cache_max_size():
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_state_cache = UserStateCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that resolves the user from token claims and a short-lived cache.
+
+    Only a cache miss touches the users table; the returned instance holds the
+    cached fields and defers the rest, so ``save()`` never overwrites them.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        state = user_state_cache.get(user_id)
+        if state is None:
+            # Always the primary: a replica could lag behind a deactivation.
+            state = User.objects.using(DEFAULT_DB_ALIAS).filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values(*USER_STATE_FIELDS).first()
+            if state is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            user_state_cache.set(user_id, state)
+
+        if validated_token.get("is_active") is False or not state["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        # Tokens issued before a role or superuser change must not keep the old rights.
+        if any(
+            claim in validated_token and validated_token[claim] != state[claim]
+            for claim in CHECKED_CLAIMS
+        ):
+            raise AuthenticationFailed(_("Token is out of date"), code="token_outdated")
+
+        field_names = [
+            f.attname for f in User._meta.concrete_fields if f.attname in state
+        ]
+        return User.from_db(
+            DEFAULT_DB_ALIAS, field_names, [state[name] for name in field_names]
+        )
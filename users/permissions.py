@@ -13,3 +13,12 @@ class IsAdminOrManager(BasePermission):
             user.is_superuser or
             getattr(user, "role", None) in {UserRole.ADMIN, UserRole.MANAGER}
         )
+
+class IsAdmin(BasePermission):
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+
+        return user.is_superuser or getattr(user, "role", None) == UserRole.ADMIN
@@ -1,5 +1,6 @@
 from .models import User, UserRole
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
@@ -123,4 +124,15 @@ class UserRegisterSerializer(serializers.ModelSerializer):
             instance.set_password(password)
 
         instance.save()
-        return instance
\ No newline at end of file
+        return instance
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Adds the claims CachedJWTAuthentication checks without loading the user."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["role"] = user.role
+        token["is_active"] = user.is_active
+        token["is_superuser"] = user.is_superuser
+        return token
@@ -0,0 +1,10 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from .models import User
+from .authentication import user_state_cache
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_state(sender, instance, **kwargs):
+    user_state_cache.invalidate(instance.pk)
@@ -1 +1,62 @@
-from django.test import TestCase
\ No newline at end of file
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import UserStateCache, user_state_cache
+from .models import User, UserRole
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_state_cache.clear()
+        self.user = User.objects.create_user(
+            username="manager", password="pass1234", role=UserRole.MANAGER
+        )
+        self.client = APIClient()
+        response = self.client.post(
+            reverse("api:token_obtain_pair"),
+            {"username": "manager", "password": "pass1234"},
+            format="json",
+        )
+        self.access = response.data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        self.me = reverse("api:current-user")
+
+    def test_token_carries_role_claims(self):
+        token = AccessToken(self.access)
+        self.assertEqual(token["role"], UserRole.MANAGER)
+        self.assertTrue(token["is_active"])
+
+    def test_cached_user_skips_users_query(self):
+        self.assertEqual(self.client.get(self.me).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.me)
+        self.assertEqual(response.data["username"], "manager")
+        self.assertEqual(response.data["role"], UserRole.MANAGER)
+
+    def test_deactivation_revokes_access(self):
+        self.assertEqual(self.client.get(self.me).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.me).status_code, 401)
+
+    def test_role_change_rejects_old_token(self):
+        self.assertEqual(self.client.get(self.me).status_code, 200)
+        self.user.role = UserRole.STAFF
+        self.user.save()
+
+        response = self.client.get(self.me)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"].code, "token_outdated")
+
+    @override_settings(JWT_USER_CACHE={"TTL": 60, "MAX_SIZE": 2})
+    def test_cache_evicts_least_recently_used(self):
+        cache = UserStateCache()
+        for user_id in (1, 2):
+            cache.set(user_id, {"id": user_id})
+        cache.get(1)
+        cache.set(3, {"id": 3})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), {"id": 1})